@@ -0,0 +1,80 @@
+"""Partition review by month and add the review ingestion watermark
+
+Recreates review with a (id, created_at) primary key and, on PostgreSQL,
+PARTITION BY RANGE (created_at). Monthly partitions are created as reviews
+are ingested. Nothing wrote to review before this revision, so the table is
+recreated rather than copied.
+
+Revision ID: 0b6e4c8f27a1
+Revises: f3d8a6c21e94
+Create Date: 2026-10-20 10:12:37.904215
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6e4c8f27a1"
+down_revision: str | None = "f3d8a6c21e94"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+REVIEW_INDEXES = {
+    "ix_review_assignment_id": ["assignment_id"],
+    "ix_review_subject_id": ["subject_id"],
+    "ix_review_user_id": ["user_id"],
+}
+
+
+def create_review_table(primary_key: list[str], **kwargs) -> None:
+    op.create_table(
+        "review",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("assignment_id", sa.Integer(), nullable=False),
+        sa.Column("subject_id", sa.Integer(), nullable=False),
+        sa.Column("starting_srs_stage", sa.Integer(), nullable=False),
+        sa.Column("ending_srs_stage", sa.Integer(), nullable=False),
+        sa.Column("incorrect_meaning_answers", sa.Integer(), nullable=False),
+        sa.Column("incorrect_reading_answers", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("data_updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["subject_id"], ["subject.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint(*primary_key),
+        **kwargs,
+    )
+    for name, columns in REVIEW_INDEXES.items():
+        op.create_index(name, "review", columns, unique=False)
+
+
+def drop_review_table() -> None:
+    for name in REVIEW_INDEXES:
+        op.drop_index(name, table_name="review")
+    op.drop_table("review")
+
+
+def upgrade() -> None:
+    op.add_column("user", sa.Column("reviews_updated_at", sa.DateTime(), nullable=True))
+    drop_review_table()
+    create_review_table(
+        ["id", "created_at"], postgresql_partition_by="RANGE (created_at)"
+    )
+    op.create_index(
+        "ix_review_user_id_created_at",
+        "review",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_user_id_created_at", table_name="review")
+    # Dropping a partitioned table drops its partitions too
+    drop_review_table()
+    create_review_table(["id"])
+    op.drop_column("user", "reviews_updated_at")
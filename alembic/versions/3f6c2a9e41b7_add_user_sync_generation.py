@@ -0,0 +1,30 @@
+"""Add user sync generation for response cache invalidation
+
+Revision ID: 3f6c2a9e41b7
+Revises: 9d90676243fe
+Create Date: 2026-10-19 09:12:41.318205
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6c2a9e41b7"
+down_revision: str | None = "9d90676243fe"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user",
+        sa.Column("sync_generation", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user", "sync_generation")
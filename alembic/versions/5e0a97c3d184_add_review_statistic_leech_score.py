@@ -0,0 +1,84 @@
+"""Add persisted leech score and (user_id, leech_score) index
+
+Revision ID: 5e0a97c3d184
+Revises: b81d4e0c7a52
+Create Date: 2026-10-19 11:20:53.190442
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0a97c3d184"
+down_revision: str | None = "b81d4e0c7a52"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 5000
+
+
+def _leech_score(row) -> float:
+    # Mirrors wanikani_mcp.leeches.leech_score at the time of this revision
+    incorrect = row.meaning_incorrect + row.reading_incorrect
+    if incorrect == 0:
+        return 0.0
+    streak = max(min(row.meaning_current_streak, row.reading_current_streak), 1)
+    return round(incorrect / streak**1.5, 4)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "reviewstatistic",
+        sa.Column("leech_score", sa.Float(), nullable=False, server_default="0"),
+    )
+
+    stats = sa.table(
+        "reviewstatistic",
+        sa.column("id", sa.Integer()),
+        sa.column("meaning_incorrect", sa.Integer()),
+        sa.column("reading_incorrect", sa.Integer()),
+        sa.column("meaning_current_streak", sa.Integer()),
+        sa.column("reading_current_streak", sa.Integer()),
+        sa.column("leech_score", sa.Float()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(
+            stats.c.id,
+            stats.c.meaning_incorrect,
+            stats.c.reading_incorrect,
+            stats.c.meaning_current_streak,
+            stats.c.reading_current_streak,
+        ).where(stats.c.meaning_incorrect + stats.c.reading_incorrect > 0)
+    ).all()
+    statement = (
+        stats.update()
+        .where(stats.c.id == sa.bindparam("stat_id"))
+        .values(leech_score=sa.bindparam("score"))
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(
+            statement,
+            [
+                {"stat_id": row.id, "score": _leech_score(row)}
+                for row in rows[start : start + BATCH_SIZE]
+            ],
+        )
+
+    op.create_index(
+        "ix_reviewstatistic_user_id_leech_score",
+        "reviewstatistic",
+        ["user_id", "leech_score"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_reviewstatistic_user_id_leech_score", table_name="reviewstatistic"
+    )
+    op.drop_column("reviewstatistic", "leech_score")
@@ -0,0 +1,52 @@
+"""Add daily rollup table for activity trends
+
+Revision ID: 6a2f9c0d8e13
+Revises: 0b6e4c8f27a1
+Create Date: 2026-10-19 18:24:51.406219
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6a2f9c0d8e13"
+down_revision: str | None = "0b6e4c8f27a1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SUBJECT_TYPES = ("RADICAL", "KANJI", "VOCABULARY", "KANA_VOCABULARY")
+
+
+def upgrade() -> None:
+    # The subjecttype enum already exists on PostgreSQL
+    subject_type = sa.Enum(*SUBJECT_TYPES, name="subjecttype").with_variant(
+        postgresql.ENUM(*SUBJECT_TYPES, name="subjecttype", create_type=False),
+        "postgresql",
+    )
+    op.create_table(
+        "dailyrollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("subject_type", subject_type, nullable=False),
+        sa.Column("reviews", sa.Integer(), nullable=False),
+        sa.Column("reviews_correct", sa.Integer(), nullable=False),
+        sa.Column("reviews_incorrect", sa.Integer(), nullable=False),
+        sa.Column("meaning_incorrect", sa.Integer(), nullable=False),
+        sa.Column("reading_incorrect", sa.Integer(), nullable=False),
+        sa.Column("items_passed", sa.Integer(), nullable=False),
+        sa.Column("items_burned", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "day", "subject_type"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dailyrollup")
@@ -0,0 +1,74 @@
+"""Add SRS system table and key stages by system
+
+Revision ID: 8c5d3e1a7f40
+Revises: 6a2f9c0d8e13
+Create Date: 2026-10-19 20:12:37.582114
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c5d3e1a7f40"
+down_revision: str | None = "6a2f9c0d8e13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "srssystem",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("unlocking_stage_position", sa.Integer(), nullable=False),
+        sa.Column("starting_stage_position", sa.Integer(), nullable=False),
+        sa.Column("passing_stage_position", sa.Integer(), nullable=False),
+        sa.Column("burning_stage_position", sa.Integer(), nullable=False),
+        sa.Column("data_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("synced_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Never populated, so recreated with WaniKani's per-system stages
+    op.drop_index("ix_srsstage_position", table_name="srsstage")
+    op.drop_table("srsstage")
+    op.create_table(
+        "srsstage",
+        sa.Column("system_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("interval", sa.Integer(), nullable=True),
+        sa.Column("interval_unit", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["system_id"],
+            ["srssystem.id"],
+        ),
+        sa.PrimaryKeyConstraint("system_id", "position"),
+    )
+    op.add_column(
+        "subject",
+        sa.Column("spaced_repetition_system_id", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("subject", "spaced_repetition_system_id")
+    op.drop_table("srsstage")
+    op.create_table(
+        "srsstage",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("meaning_correct", sa.Integer(), nullable=False),
+        sa.Column("meaning_incorrect", sa.Integer(), nullable=False),
+        sa.Column("reading_correct", sa.Integer(), nullable=False),
+        sa.Column("reading_incorrect", sa.Integer(), nullable=False),
+        sa.Column("interval", sa.Integer(), nullable=False),
+        sa.Column("interval_unit", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_srsstage_position", "srsstage", ["position"], unique=True)
+    op.drop_table("srssystem")
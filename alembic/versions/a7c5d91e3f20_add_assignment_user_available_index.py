@@ -0,0 +1,30 @@
+"""Add (user_id, available_at) index to assignment
+
+Revision ID: a7c5d91e3f20
+Revises: e6b3f0a2d517
+Create Date: 2026-10-19 18:05:12.417903
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c5d91e3f20"
+down_revision: str | None = "e6b3f0a2d517"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_assignment_user_id_available_at",
+        "assignment",
+        ["user_id", "available_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assignment_user_id_available_at", table_name="assignment")
@@ -0,0 +1,101 @@
+"""Add materialised primary meaning, reading and search key to subject
+
+Revision ID: b81d4e0c7a52
+Revises: 3f6c2a9e41b7
+Create Date: 2026-10-19 10:02:17.664310
+
+"""
+
+import json
+import unicodedata
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b81d4e0c7a52"
+down_revision: str | None = "3f6c2a9e41b7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _decode(value):
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or []
+
+
+def upgrade() -> None:
+    op.add_column("subject", sa.Column("primary_meaning", sa.String(), nullable=True))
+    op.add_column("subject", sa.Column("primary_reading", sa.String(), nullable=True))
+    op.add_column("subject", sa.Column("search_key", sa.String(), nullable=True))
+
+    # Backfill from the JSON columns; mirrors wanikani_mcp.catalog at the time
+    # of this revision so later changes there don't alter the migration
+    subject = sa.table(
+        "subject",
+        sa.column("id", sa.Integer()),
+        sa.column("slug", sa.String()),
+        sa.column("characters", sa.String()),
+        sa.column("meanings", sa.JSON()),
+        sa.column("readings", sa.JSON()),
+        sa.column("primary_meaning", sa.String()),
+        sa.column("primary_reading", sa.String()),
+        sa.column("search_key", sa.String()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(
+            subject.c.id,
+            subject.c.slug,
+            subject.c.characters,
+            subject.c.meanings,
+            subject.c.readings,
+        )
+    ).all()
+
+    updates = []
+    for row in rows:
+        meanings = _decode(row.meanings)
+        readings = _decode(row.readings)
+        terms = [row.characters, row.slug]
+        terms += [m.get("meaning") for m in meanings]
+        terms += [r.get("reading") for r in readings]
+        updates.append(
+            {
+                "subject_id": row.id,
+                "primary_meaning": next(
+                    (m["meaning"] for m in meanings if m.get("primary")), None
+                ),
+                "primary_reading": next(
+                    (r["reading"] for r in readings if r.get("primary")), None
+                ),
+                "search_key": "|".join(
+                    dict.fromkeys(_normalize(term) for term in terms if term)
+                ),
+            }
+        )
+
+    if updates:
+        connection.execute(
+            subject.update()
+            .where(subject.c.id == sa.bindparam("subject_id"))
+            .values(
+                primary_meaning=sa.bindparam("primary_meaning"),
+                primary_reading=sa.bindparam("primary_reading"),
+                search_key=sa.bindparam("search_key"),
+            ),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("subject", "search_key")
+    op.drop_column("subject", "primary_reading")
+    op.drop_column("subject", "primary_meaning")
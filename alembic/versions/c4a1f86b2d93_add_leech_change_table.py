@@ -0,0 +1,57 @@
+"""Add leech change table for per-sync leech deltas
+
+Revision ID: c4a1f86b2d93
+Revises: 5e0a97c3d184
+Create Date: 2026-10-19 12:41:06.502117
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a1f86b2d93"
+down_revision: str | None = "5e0a97c3d184"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "leechchange",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("subject_id", sa.Integer(), nullable=False),
+        sa.Column("sync_log_id", sa.Integer(), nullable=True),
+        sa.Column("became_leech", sa.Boolean(), nullable=False),
+        sa.Column("previous_score", sa.Float(), nullable=False),
+        sa.Column("leech_score", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["subject_id"],
+            ["subject.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["sync_log_id"],
+            ["synclog.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_leechchange_user_id_created_at",
+        "leechchange",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leechchange_user_id_created_at", table_name="leechchange")
+    op.drop_table("leechchange")
@@ -0,0 +1,31 @@
+"""Add per-collection phase stats to sync log
+
+Revision ID: e6b3f0a2d517
+Revises: 9d2e7b41c6f8
+Create Date: 2026-10-19 15:20:44.930251
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e6b3f0a2d517"
+down_revision: str | None = "9d2e7b41c6f8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("synclog", sa.Column("phase_stats", sa.JSON(), nullable=True))
+    op.create_index(
+        op.f("ix_synclog_started_at"), "synclog", ["started_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_synclog_started_at"), table_name="synclog")
+    op.drop_column("synclog", "phase_stats")
@@ -0,0 +1,27 @@
+"""Add user synced_at for read replica routing
+
+Revision ID: f3d8a6c21e94
+Revises: a7c5d91e3f20
+Create Date: 2026-10-19 21:34:08.562190
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3d8a6c21e94"
+down_revision: str | None = "a7c5d91e3f20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("user", sa.Column("synced_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("user", "synced_at")
@@ -0,0 +1,499 @@
+"""Synthetic WaniKani data at real scale.
+
+Builds deterministic, WaniKani v2 shaped resources (the same JSON the API
+returns) for one shared subject set and any number of users, and serves
+them a page at a time with the API's `updated_after` and `page_after_id`
+semantics. The benchmark suite and the fake API server both read from it.
+"""
+
+import hashlib
+import random
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+BASE_URL = "https://api.wanikani.com/v2"
+MAX_LEVEL = 60
+
+# Share of each subject type in the real ~9k subject set
+SUBJECT_MIX = (("radical", 0.055), ("kanji", 0.235), ("vocabulary", 0.71))
+
+# Default page sizes of the real API
+PAGE_SIZES = {
+    "subjects": 1000,
+    "assignments": 500,
+    "review_statistics": 500,
+    "reviews": 1000,
+    "spaced_repetition_systems": 500,
+}
+
+# Hours until the next review after reaching each SRS stage (1-8)
+SRS_INTERVAL_HOURS = {1: 4, 2: 8, 3: 23, 4: 47, 5: 167, 6: 335, 7: 719, 8: 2879}
+# The accelerated system levels 1 and 2 use
+ACCELERATED_INTERVAL_HOURS = SRS_INTERVAL_HOURS | {1: 2, 2: 4, 3: 8, 4: 23}
+
+KANA = (
+    "あいうえおかきくけこさしすせそたちつてとなにぬねの"
+    "はひふへほまみむめもやゆよらりるれろわん"
+)
+SYLLABLES = ("ka", "ri", "to", "mo", "na", "shi", "ru", "ne", "yo", "mi", "su", "te")
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def etag(body: bytes) -> str:
+    """A weak ETag for a response body, as WaniKani sends"""
+    return f'W/"{hashlib.md5(body).hexdigest()}"'
+
+
+def _resource(
+    object_type: str, resource_id: int, collection: str, updated_at: datetime, data
+) -> dict[str, Any]:
+    return {
+        "id": resource_id,
+        "object": object_type,
+        "url": f"{BASE_URL}/{collection}/{resource_id}",
+        "data_updated_at": iso(updated_at),
+        "data": data,
+    }
+
+
+@dataclass
+class UserData:
+    api_key: str
+    username: str
+    level: int
+    collections: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+
+
+class Dataset:
+    """A shared subject set plus per-user assignments, statistics and reviews.
+
+    Everything derives from the seed, so two runs with the same arguments
+    produce identical data.
+    """
+
+    def __init__(
+        self,
+        users: int = 3,
+        subjects: int = 9000,
+        reviews_per_item: int = 3,
+        seed: int = 42,
+    ):
+        self.rng = random.Random(seed)
+        self.now = datetime.now(UTC).replace(microsecond=0)
+        self.subjects = self._generate_subjects(subjects)
+        self.srs_systems = [
+            self._srs_system(1, "Wanikani Accelerated", ACCELERATED_INTERVAL_HOURS),
+            self._srs_system(2, "Wanikani", SRS_INTERVAL_HOURS),
+        ]
+        self.users: dict[str, UserData] = {}
+        for user_number in range(1, users + 1):
+            user = self._generate_user(user_number, reviews_per_item)
+            self.users[user.api_key] = user
+
+    # -- generation ---------------------------------------------------------
+
+    def _word(self) -> str:
+        return "".join(
+            self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4))
+        )
+
+    def _kana(self, length: int) -> str:
+        return "".join(self.rng.choice(KANA) for _ in range(length))
+
+    def _generate_subjects(self, count: int) -> list[dict[str, Any]]:
+        subjects: list[dict[str, Any]] = []
+        by_type_level: dict[tuple[str, int], list[int]] = {}
+        subject_id = 0
+        remaining = count
+        for index, (object_type, share) in enumerate(SUBJECT_MIX):
+            last = index == len(SUBJECT_MIX) - 1
+            type_count = remaining if last else min(round(count * share), remaining)
+            remaining -= type_count
+            for position in range(type_count):
+                subject_id += 1
+                # Spread evenly over the levels, in level order like the API
+                level = position * MAX_LEVEL // type_count + 1
+                by_type_level.setdefault((object_type, level), []).append(subject_id)
+                subjects.append(self._subject(subject_id, object_type, level))
+
+        # Kanji are built from radicals, vocabulary from kanji, at or below
+        # their own level
+        components = {"kanji": "radical", "vocabulary": "kanji"}
+        by_id = {subject["id"]: subject for subject in subjects}
+        for subject in subjects:
+            component_type = components.get(subject["object"])
+            if not component_type:
+                continue
+            level = subject["data"]["level"]
+            pool = [
+                candidate
+                for candidate_level in range(max(level - 2, 1), level + 1)
+                for candidate in by_type_level.get(
+                    (component_type, candidate_level), []
+                )
+            ]
+            if not pool:
+                continue
+            chosen = self.rng.sample(pool, min(len(pool), self.rng.randint(1, 3)))
+            subject["data"]["component_subject_ids"] = sorted(chosen)
+            for component_id in chosen:
+                by_id[component_id]["data"]["amalgamation_subject_ids"].append(
+                    subject["id"]
+                )
+        return subjects
+
+    def _subject(self, subject_id: int, object_type: str, level: int) -> dict:
+        collection = {"radical": "radicals", "kanji": "kanji"}.get(
+            object_type, "vocabulary"
+        )
+        meaning = self._word()
+        if object_type == "radical":
+            characters = chr(0x2E80 + subject_id % 0x7F) if subject_id % 7 else None
+            readings = None
+        elif object_type == "kanji":
+            characters = chr(0x4E00 + subject_id % 0x5000)
+            readings = [
+                {
+                    "reading": self._kana(self.rng.randint(1, 3)),
+                    "primary": index == 0,
+                    "accepted_answer": True,
+                    "type": "onyomi" if index == 0 else "kunyomi",
+                }
+                for index in range(self.rng.randint(1, 3))
+            ]
+        else:
+            characters = "".join(
+                chr(0x4E00 + self.rng.randrange(0x5000))
+                for _ in range(self.rng.randint(1, 3))
+            )
+            readings = [
+                {
+                    "reading": self._kana(self.rng.randint(2, 5)),
+                    "primary": True,
+                    "accepted_answer": True,
+                }
+            ]
+        data = {
+            "created_at": iso(self.now - timedelta(days=3000)),
+            "level": level,
+            "slug": characters or meaning,
+            "hidden_at": None,
+            "document_url": f"https://www.wanikani.com/{collection}/{subject_id}",
+            "characters": characters,
+            "meanings": [
+                {"meaning": meaning, "primary": True, "accepted_answer": True},
+                {"meaning": self._word(), "primary": False, "accepted_answer": True},
+            ],
+            "auxiliary_meanings": [],
+            "readings": readings,
+            "component_subject_ids": [],
+            "amalgamation_subject_ids": [],
+            "lesson_position": subject_id % 100,
+            "meaning_mnemonic": " ".join(self._word() for _ in range(40)),
+            "spaced_repetition_system_id": 1 if level <= 2 else 2,
+        }
+        updated_at = self.now - timedelta(days=self.rng.randint(30, 900))
+        return _resource(object_type, subject_id, "subjects", updated_at, data)
+
+    def _srs_system(self, system_id: int, name: str, hours: dict[int, int]) -> dict:
+        stages = [{"position": 0, "interval": None, "interval_unit": None}]
+        stages += [
+            {"position": position, "interval": hour * 3600, "interval_unit": "seconds"}
+            for position, hour in sorted(hours.items())
+        ]
+        stages.append({"position": 9, "interval": None, "interval_unit": None})
+        data = {
+            "created_at": iso(self.now - timedelta(days=2000)),
+            "name": name,
+            "description": f"{name} SRS system",
+            "unlocking_stage_position": 0,
+            "starting_stage_position": 1,
+            "passing_stage_position": 5,
+            "burning_stage_position": 9,
+            "stages": stages,
+        }
+        updated_at = self.now - timedelta(days=1000)
+        return _resource(
+            "spaced_repetition_system",
+            system_id,
+            "spaced_repetition_systems",
+            updated_at,
+            data,
+        )
+
+    def _generate_user(self, user_number: int, reviews_per_item: int) -> UserData:
+        # Skewed towards the early levels, like real accounts, with a tail of
+        # veterans who have thousands of items
+        level = round(self.rng.triangular(1, MAX_LEVEL, 8))
+        user = UserData(
+            api_key=f"bench-wanikani-key-{user_number}",
+            username=f"bench_user_{user_number}",
+            level=level,
+        )
+        assignments = []
+        statistics = []
+        reviews = []
+        id_base = user_number * 1_000_000
+        for subject in self.subjects:
+            subject_level = subject["data"]["level"]
+            if subject_level > level:
+                continue
+            assignment_id = id_base + subject["id"]
+            stage = self._srs_stage(level - subject_level)
+            assignment_data, updated_at = self._assignment(subject, stage)
+            assignments.append(
+                _resource(
+                    "assignment",
+                    assignment_id,
+                    "assignments",
+                    updated_at,
+                    assignment_data,
+                )
+            )
+            if stage == 0:
+                continue
+            statistics.append(
+                _resource(
+                    "review_statistic",
+                    assignment_id,
+                    "review_statistics",
+                    updated_at,
+                    self._review_statistic(subject, stage),
+                )
+            )
+            for review_number in range(min(stage, reviews_per_item)):
+                review_id = user_number * 100_000_000 + len(reviews) + 1
+                created_at = updated_at - timedelta(days=review_number * 7)
+                reviews.append(
+                    _resource(
+                        "review",
+                        review_id,
+                        "reviews",
+                        created_at,
+                        {
+                            "created_at": iso(created_at),
+                            "assignment_id": assignment_id,
+                            "subject_id": subject["id"],
+                            "spaced_repetition_system_id": 2,
+                            "starting_srs_stage": max(stage - 1, 1),
+                            "ending_srs_stage": stage,
+                            "incorrect_meaning_answers": int(self.rng.random() < 0.15),
+                            "incorrect_reading_answers": int(self.rng.random() < 0.2),
+                        },
+                    )
+                )
+        reviews.sort(key=lambda review: review["id"])
+        user.collections = {
+            "assignments": assignments,
+            "review_statistics": statistics,
+            "reviews": reviews,
+        }
+        return user
+
+    def _srs_stage(self, levels_behind: int) -> int:
+        """Pick a stage for an item unlocked `levels_behind` levels ago"""
+        if levels_behind >= 12:
+            return self.rng.choices((9, 8, 7), weights=(70, 20, 10))[0]
+        if levels_behind >= 4:
+            return self.rng.choices((5, 6, 7, 8, 4), weights=(25, 30, 25, 10, 10))[0]
+        if levels_behind >= 1:
+            return self.rng.choices((3, 4, 5, 2), weights=(30, 35, 20, 15))[0]
+        return self.rng.choices((0, 1, 2, 3, 4), weights=(30, 25, 20, 15, 10))[0]
+
+    def _assignment(self, subject: dict, stage: int) -> tuple[dict, datetime]:
+        unlocked_at = self.now - timedelta(days=self.rng.randint(1, 700))
+        started_at = unlocked_at + timedelta(hours=self.rng.randint(1, 72))
+        available_at = None
+        if 1 <= stage <= 8:
+            # A share of the reviews are already due
+            hours = SRS_INTERVAL_HOURS[stage] * self.rng.uniform(-0.3, 1.0)
+            available_at = iso(self.now + timedelta(hours=hours))
+        data = {
+            "created_at": iso(unlocked_at),
+            "subject_id": subject["id"],
+            "subject_type": subject["object"],
+            "srs_stage": stage,
+            "unlocked_at": iso(unlocked_at),
+            "started_at": iso(started_at) if stage else None,
+            "passed_at": iso(started_at + timedelta(days=7)) if stage >= 5 else None,
+            "burned_at": iso(started_at + timedelta(days=200)) if stage == 9 else None,
+            "available_at": available_at,
+            "resurrected_at": None,
+            "hidden": False,
+        }
+        updated_at = self.now - timedelta(days=self.rng.randint(1, 300))
+        return data, updated_at
+
+    def _review_statistic(self, subject: dict, stage: int) -> dict:
+        has_reading = subject["object"] != "radical"
+        # A few percent of items are real leeches with many misses
+        leech = self.rng.random() < 0.05
+        misses = self.rng.randint(4, 12) if leech else int(self.rng.expovariate(1))
+        meaning_incorrect = self.rng.randint(0, misses)
+        reading_incorrect = misses - meaning_incorrect if has_reading else 0
+        correct = stage + self.rng.randint(0, 3)
+        meaning_streak = self.rng.randint(1, max(stage, 1))
+        reading_streak = self.rng.randint(1, max(stage, 1)) if has_reading else 1
+        total = 2 * correct + meaning_incorrect + reading_incorrect
+        return {
+            "created_at": iso(self.now - timedelta(days=300)),
+            "subject_id": subject["id"],
+            "subject_type": subject["object"],
+            "meaning_correct": correct,
+            "meaning_incorrect": meaning_incorrect,
+            "meaning_max_streak": max(meaning_streak, correct),
+            "meaning_current_streak": meaning_streak,
+            "reading_correct": correct if has_reading else 1,
+            "reading_incorrect": reading_incorrect,
+            "reading_max_streak": max(reading_streak, correct),
+            "reading_current_streak": reading_streak,
+            "percentage_correct": round(200 * correct / total) if total else 100,
+            "hidden": False,
+        }
+
+    # -- mutation -----------------------------------------------------------
+
+    def touch(self, fraction: float = 0.02) -> int:
+        """Advance a fraction of every user's items, as a study session would.
+
+        The changed assignments and statistics get a fresh data_updated_at,
+        so an incremental sync fetches exactly these. Returns the number of
+        resources changed.
+        """
+        changed = 0
+        updated_at = iso(datetime.now(UTC))
+        for user in self.users.values():
+            assignments = user.collections["assignments"]
+            statistics = {
+                stat["data"]["subject_id"]: stat
+                for stat in user.collections["review_statistics"]
+            }
+            for assignment in self.rng.sample(
+                assignments, int(len(assignments) * fraction)
+            ):
+                data = assignment["data"]
+                if data["srs_stage"] in (0, 9):
+                    continue
+                data["srs_stage"] = min(data["srs_stage"] + 1, 9)
+                assignment["data_updated_at"] = updated_at
+                changed += 1
+                stat = statistics.get(data["subject_id"])
+                if stat:
+                    stat["data"]["meaning_correct"] += 1
+                    stat["data"]["meaning_current_streak"] += 1
+                    stat["data_updated_at"] = updated_at
+                    changed += 1
+        return changed
+
+    # -- serving ------------------------------------------------------------
+
+    def user_resource(self, api_key: str) -> dict[str, Any]:
+        user = self.users[api_key]
+        return {
+            "object": "user",
+            "url": f"{BASE_URL}/user",
+            "data_updated_at": iso(self.now),
+            "data": {
+                "id": f"00000000-0000-0000-0000-{user.username[-12:]:0>12}",
+                "username": user.username,
+                "level": user.level,
+                "profile_url": f"https://www.wanikani.com/users/{user.username}",
+                "started_at": iso(self.now - timedelta(days=700)),
+                "current_vacation_started_at": None,
+                "subscription": {
+                    "active": True,
+                    "type": "lifetime",
+                    "max_level_granted": MAX_LEVEL,
+                    "period_ends_at": None,
+                },
+            },
+        }
+
+    def summary_resource(self, api_key: str) -> dict[str, Any]:
+        now = datetime.now(UTC)
+        lessons = []
+        reviews: dict[str, list[int]] = {}
+        for assignment in self.users[api_key].collections["assignments"]:
+            data = assignment["data"]
+            if data["srs_stage"] == 0:
+                lessons.append(data["subject_id"])
+            elif data["available_at"]:
+                available_at = parse_iso(data["available_at"])
+                hour = max(available_at, now).replace(minute=0, second=0, microsecond=0)
+                if hour <= now + timedelta(hours=24):
+                    reviews.setdefault(iso(hour), []).append(data["subject_id"])
+        return {
+            "object": "report",
+            "url": f"{BASE_URL}/summary",
+            "data_updated_at": iso(now),
+            "data": {
+                "lessons": [
+                    {"available_at": iso(now.replace(minute=0)), "subject_ids": lessons}
+                ],
+                "next_reviews_at": min(reviews) if reviews else None,
+                "reviews": [
+                    {"available_at": hour, "subject_ids": ids}
+                    for hour, ids in sorted(reviews.items())
+                ],
+            },
+        }
+
+    def collection(self, api_key: str, name: str) -> list[dict[str, Any]]:
+        if name == "subjects":
+            return self.subjects
+        if name == "spaced_repetition_systems":
+            return self.srs_systems
+        return self.users[api_key].collections[name]
+
+    def page(
+        self,
+        api_key: str,
+        name: str,
+        updated_after: datetime | None = None,
+        page_after_id: int | None = None,
+        per_page: int | None = None,
+        base_url: str = BASE_URL,
+    ) -> dict[str, Any]:
+        """Return one page of a collection, filtered like the real API"""
+        per_page = per_page or PAGE_SIZES[name]
+        items = self.collection(api_key, name)
+        if updated_after is not None:
+            if updated_after.tzinfo is None:
+                updated_after = updated_after.replace(tzinfo=UTC)
+            items = [
+                item
+                for item in items
+                if parse_iso(item["data_updated_at"]) > updated_after
+            ]
+        total_count = len(items)
+        if page_after_id is not None:
+            items = [item for item in items if item["id"] > page_after_id]
+        page_items = items[:per_page]
+
+        next_url = None
+        if len(items) > per_page:
+            next_url = f"{base_url}/{name}?page_after_id={page_items[-1]['id']}"
+            if updated_after is not None:
+                next_url += f"&updated_after={iso(updated_after)}"
+        return {
+            "object": "collection",
+            "url": f"{base_url}/{name}",
+            "pages": {
+                "per_page": per_page,
+                "next_url": next_url,
+                "previous_url": None,
+            },
+            "total_count": total_count,
+            "data_updated_at": max(
+                (item["data_updated_at"] for item in page_items), default=None
+            ),
+            "data": page_items,
+        }
@@ -0,0 +1,208 @@
+"""Stand-in WaniKani v2 API serving a synthetic dataset.
+
+Serves `user`, `summary`, `subjects`, `assignments`, `reviews`,
+`review_statistics` and `spaced_repetition_systems` with the real pagination
+and `updated_after` semantics, ETags, rate-limit headers and optional latency
+and 429 injection, so sync can be load-tested without touching the real API:
+
+    python -m benchmarks.fake_wanikani --users 3 --port 8100 --latency-ms 40
+    WANIKANI_API_BASE_URL=http://127.0.0.1:8100/v2 wanikani-mcp sync-worker
+
+Users authenticate with `bench-wanikani-key-<n>`.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from .datagen import PAGE_SIZES, Dataset, etag, parse_iso
+
+COLLECTIONS = tuple(PAGE_SIZES)
+
+
+@dataclass
+class FakeApiOptions:
+    # Added to every response, plus up to jitter_ms of random extra delay
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Overrides the real page sizes for every collection
+    page_size: int | None = None
+    # Requests per minute per API key, as enforced by WaniKani
+    rate_limit: int = 60
+    # Share of requests answered with 429 regardless of the limit
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class RateLimitWindow:
+    """Fixed one-minute windows per API key, like WaniKani's limiter"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._windows: dict[str, tuple[int, int]] = {}
+
+    def hit(self, api_key: str) -> tuple[bool, dict[str, str]]:
+        window = math.floor(time.time() / 60)
+        start, count = self._windows.get(api_key, (window, 0))
+        if start != window:
+            start, count = window, 0
+        count += 1
+        self._windows[api_key] = (start, count)
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.limit - count, 0)),
+            "RateLimit-Reset": str((window + 1) * 60),
+        }
+        return count <= self.limit, headers
+
+
+def create_fake_api(dataset: Dataset, options: FakeApiOptions | None = None) -> FastAPI:
+    options = options or FakeApiOptions()
+    limiter = RateLimitWindow(options.rate_limit)
+    rng = random.Random(options.seed)
+    app = FastAPI(title="Fake WaniKani API")
+    app.state.requests = 0
+    app.state.throttled = 0
+
+    async def respond(request: Request, build) -> Response:
+        app.state.requests += 1
+        authorization = request.headers.get("Authorization", "")
+        api_key = authorization.removeprefix("Bearer ").strip()
+        if api_key not in dataset.users:
+            return JSONResponse({"error": "Unauthorized", "code": 401}, 401)
+
+        allowed, headers = limiter.hit(api_key)
+        if allowed and rng.random() < options.error_rate:
+            # Injected errors are transient: retrying a second later succeeds
+            allowed = False
+            headers["RateLimit-Reset"] = str(math.ceil(time.time()) + 1)
+        if not allowed:
+            app.state.throttled += 1
+            return JSONResponse(
+                {"error": "Rate limit exceeded", "code": 429}, 429, headers=headers
+            )
+
+        delay = options.latency_ms + rng.uniform(0, options.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        response = JSONResponse(build(api_key), headers=headers)
+        response.headers["ETag"] = etag(response.body)
+        if request.headers.get("If-None-Match") == response.headers["ETag"]:
+            return Response(status_code=304, headers=dict(response.headers))
+        return response
+
+    @app.get("/v2/user")
+    async def user(request: Request):
+        return await respond(request, dataset.user_resource)
+
+    @app.get("/v2/summary")
+    async def summary(request: Request):
+        return await respond(request, dataset.summary_resource)
+
+    def collection_route(name: str):
+        async def collection(
+            request: Request,
+            updated_after: str | None = None,
+            page_after_id: int | None = None,
+        ):
+            base_url = str(request.base_url).rstrip("/") + "/v2"
+
+            def build(api_key: str) -> dict[str, Any]:
+                return dataset.page(
+                    api_key,
+                    name,
+                    updated_after=parse_iso(updated_after) if updated_after else None,
+                    page_after_id=page_after_id,
+                    per_page=options.page_size,
+                    base_url=base_url,
+                )
+
+            return await respond(request, build)
+
+        return collection
+
+    for name in COLLECTIONS:
+        app.add_api_route(f"/v2/{name}", collection_route(name), methods=["GET"])
+
+    return app
+
+
+class FakeApiServer:
+    """Run the fake API on a background thread, e.g. inside a benchmark"""
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        options: FakeApiOptions | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.app = create_fake_api(dataset, options)
+        config = uvicorn.Config(
+            self.app, host=host, port=port, log_level="warning", lifespan="off"
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(
+            target=self.server.run, name="fake-wanikani", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v2"
+
+    def __enter__(self) -> "FakeApiServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--subjects", type=int, default=9000)
+    parser.add_argument("--reviews-per-item", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int)
+    parser.add_argument("--rate-limit", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    dataset = Dataset(
+        users=args.users,
+        subjects=args.subjects,
+        reviews_per_item=args.reviews_per_item,
+        seed=args.seed,
+    )
+    options = FakeApiOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        page_size=args.page_size,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"Serving {len(dataset.users)} users at http://{args.host}:{args.port}/v2")
+    uvicorn.run(create_fake_api(dataset, options), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Drive a running MCP server with a mix of agent tool calls and resource reads.
+
+Seeds a SQLite database with synthetic users, serves their WaniKani data from
+the fake API, starts the server over stdio or streamable HTTP and replays a
+weighted mix of operations from concurrent client sessions:
+
+    python -m benchmarks.loadgen --transport http --sessions 20 --duration 60
+    python -m benchmarks.loadgen --mix get_leeches=3,user_progress=1 --no-sync
+
+Over stdio there is one server process and one connection, so the sessions
+are concurrent requests on it. Over HTTP each session is its own client.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from pydantic import AnyUrl
+from sqlmodel import Session
+
+from wanikani_mcp import database
+from wanikani_mcp import sync_service as sync_service_module
+from wanikani_mcp.models import User
+from wanikani_mcp.sync_service import SyncService
+from wanikani_mcp.sync_stats import percentile
+
+from .fake_wanikani import FakeApiOptions, FakeApiServer
+from .run import RESULTS_DIR, DatasetClient, git_commit, load_users, make_dataset
+
+TOOLS = ("get_status", "get_leeches", "sync_data")
+RESOURCES = ("user_progress", "review_forecast", "item_database")
+# Roughly what an agent session does: mostly reads, the odd status or sync
+DEFAULT_MIX = (
+    "get_status=2,get_leeches=3,sync_data=1,"
+    "user_progress=2,review_forecast=2,item_database=1"
+)
+SERVER_START_TIMEOUT_SECONDS = 60.0
+
+
+@dataclass
+class Sample:
+    operation: str
+    seconds: float
+    ok: bool
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse "operation=weight,..." into weights for the known operations"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in TOOLS + RESOURCES:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("The mix needs a positive weight")
+    return mix
+
+
+async def call_operation(session: ClientSession, operation: str, mcp_api_key: str):
+    """Run one operation, returning whether the server answered without error"""
+    if operation in TOOLS:
+        result = await session.call_tool(operation, {"mcp_api_key": mcp_api_key})
+        # Failures come back as text rather than with isError set
+        text = getattr(result.content[0], "text", "")
+        return not result.isError and not text.startswith(
+            ("Error:", "Unexpected error:")
+        )
+
+    uri = AnyUrl(f"wanikani://{operation}?mcp_api_key={mcp_api_key}")
+    result = await session.read_resource(uri)
+    text = getattr(result.contents[0], "text", "")
+    return not text.startswith('{"error"')
+
+
+async def run_session(
+    session: ClientSession,
+    mix: dict[str, float],
+    mcp_api_keys: list[str],
+    deadline: float,
+    think_seconds: float,
+    rng: random.Random,
+) -> list[Sample]:
+    operations, weights = list(mix), list(mix.values())
+    samples = []
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok = await call_operation(session, operation, rng.choice(mcp_api_keys))
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"{operation} failed: {e}")
+            ok = False
+        samples.append(Sample(operation, time.perf_counter() - start, ok))
+        if think_seconds:
+            await asyncio.sleep(rng.uniform(0, 2 * think_seconds))
+    return samples
+
+
+def summarize_samples(samples: list[Sample], elapsed: float) -> dict[str, Any]:
+    """Per-operation and overall throughput and latency percentiles"""
+    by_operation: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_operation[sample.operation].append(sample)
+    by_operation["total"] = samples
+
+    results = {}
+    for operation, operation_samples in sorted(by_operation.items()):
+        if not operation_samples:
+            continue
+        ms = [sample.seconds * 1000 for sample in operation_samples]
+        results[operation] = {
+            "requests": len(ms),
+            "errors": sum(not sample.ok for sample in operation_samples),
+            "throughput_per_second": round(len(ms) / elapsed, 2),
+            "p50_ms": round(percentile(ms, 0.5), 3),
+            "p95_ms": round(percentile(ms, 0.95), 3),
+            "p99_ms": round(percentile(ms, 0.99), 3),
+            "max_ms": round(max(ms), 3),
+        }
+    return results
+
+
+async def seed_database(url: str, dataset) -> list[str]:
+    """Create the schema, add the dataset's users and give each a first sync.
+
+    The first sync is served from memory so seeding stays quick. Returns the
+    users' MCP API keys.
+    """
+    engine = database.make_engine(url)
+    database.engine = engine
+    # Stamped like a migrated database, so the server skips create_all
+    database.ensure_schema()
+    with Session(engine) as session:
+        for number, data in enumerate(dataset.users.values(), start=1):
+            session.add(
+                User(
+                    wanikani_api_key=data.api_key,
+                    mcp_api_key=f"bench-mcp-key-{number}",
+                    username=data.username,
+                    level=data.level,
+                )
+            )
+        session.commit()
+        users = load_users(session)
+
+    DatasetClient.dataset = dataset
+    sync_service_module.WaniKaniClient = DatasetClient
+    service = SyncService()
+    for user in users:
+        await service._sync_user_data(user)
+    database.dispose_engines()
+    return [user.mcp_api_key for user in users]
+
+
+def server_environment(args, database_url: str, api_base_url: str) -> dict[str, str]:
+    return os.environ | {
+        "DATABASE_URL": database_url,
+        "WANIKANI_API_BASE_URL": api_base_url,
+        "WANIKANI_RATE_LIMIT": str(args.api_rate_limit),
+        "SYNC_ENABLED": "true" if args.sync else "false",
+        "SYNC_INTERVAL_MINUTES": str(args.sync_interval_minutes),
+        "MANUAL_SYNC_COOLDOWN_SECONDS": str(args.sync_cooldown_seconds),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def stdio_sessions(args, env: dict[str, str], directory: str):
+    """One stdio server process; every session shares its connection"""
+    parameters = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "wanikani_mcp.server", "--mode", "stdio"],
+        env=env,
+        cwd=directory,
+    )
+    async with (
+        stdio_client(parameters) as (read_stream, write_stream),
+        ClientSession(read_stream, write_stream) as session,
+    ):
+        await session.initialize()
+        yield [session] * args.sessions
+
+
+@asynccontextmanager
+async def http_sessions(args, env: dict[str, str], directory: str):
+    """One HTTP server (with --workers processes) and a client per session"""
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "wanikani_mcp.server",
+        "--mode",
+        "http",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(args.workers),
+        env=env,
+        cwd=directory,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_for_health(base_url, process)
+        async with AsyncExitStack() as stack:
+            sessions = []
+            for _ in range(args.sessions):
+                read_stream, write_stream, _ = await stack.enter_async_context(
+                    streamablehttp_client(f"{base_url}/mcp")
+                )
+                session = await stack.enter_async_context(
+                    ClientSession(read_stream, write_stream)
+                )
+                await session.initialize()
+                sessions.append(session)
+            yield sessions
+    finally:
+        process.terminate()
+        await process.wait()
+
+
+async def wait_for_health(base_url: str, process: asyncio.subprocess.Process):
+    deadline = time.perf_counter() + SERVER_START_TIMEOUT_SECONDS
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.returncode is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+SESSION_FACTORIES = {"stdio": stdio_sessions, "http": http_sessions}
+
+
+async def run_load(args) -> dict[str, Any]:
+    dataset = make_dataset(args)
+    options = FakeApiOptions(
+        latency_ms=args.api_latency_ms,
+        jitter_ms=args.api_jitter_ms,
+        rate_limit=args.api_rate_limit,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{directory}/loadgen.db"
+        mcp_api_keys = await seed_database(database_url, dataset)
+
+        with FakeApiServer(dataset, options) as api:
+            env = server_environment(args, database_url, api.base_url)
+            open_sessions = SESSION_FACTORIES[args.transport]
+            async with open_sessions(args, env, directory) as sessions:
+                # Let the server finish its deferred startup before measuring
+                await call_operation(sessions[0], "get_leeches", mcp_api_keys[0])
+                rng = random.Random(args.seed)
+                start = time.perf_counter()
+                deadline = start + args.duration
+                results = await asyncio.gather(
+                    *(
+                        run_session(
+                            session,
+                            args.mix,
+                            mcp_api_keys,
+                            deadline,
+                            args.think_ms / 1000,
+                            random.Random(rng.random()),
+                        )
+                        for session in sessions
+                    )
+                )
+                elapsed = time.perf_counter() - start
+            api_requests = api.app.state.requests
+
+    samples = [sample for session_samples in results for sample in session_samples]
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "transport": args.transport,
+            "sessions": args.sessions,
+            "workers": args.workers,
+            "duration": args.duration,
+            "think_ms": args.think_ms,
+            "mix": args.mix,
+            "sync": args.sync,
+            "users": args.users,
+            "subjects": args.subjects,
+            "seed": args.seed,
+            "api": vars(options),
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "wanikani_api_requests": api_requests,
+        "operations": summarize_samples(samples, elapsed),
+    }
+
+
+def print_report(report: dict[str, Any]):
+    parameters = report["parameters"]
+    print(
+        f"\n{parameters['transport']}, {parameters['sessions']} sessions, "
+        f"sync {'on' if parameters['sync'] else 'off'}, "
+        f"{report['elapsed_seconds']} s"
+    )
+    for operation, result in report["operations"].items():
+        print(
+            f"  {operation:<16} {result['throughput_per_second']:>8.2f}/s  "
+            f"p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+            f"p99 {result['p99_ms']:>9.3f} ms  "
+            f"n={result['requests']} errors={result['errors']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio")
+    parser.add_argument(
+        "--sessions", type=int, default=10, help="Concurrent agent sessions"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="HTTP worker processes")
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds to apply load"
+    )
+    parser.add_argument(
+        "--think-ms",
+        type=float,
+        default=0.0,
+        help="Mean pause between a session's calls",
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix(DEFAULT_MIX),
+        help=f"Operation weights (default {DEFAULT_MIX})",
+    )
+    parser.add_argument(
+        "--sync",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run the background sync scheduler in the server",
+    )
+    parser.add_argument(
+        "--sync-interval-minutes",
+        type=int,
+        default=1,
+        help="Background sync interval while --sync is on",
+    )
+    parser.add_argument(
+        "--sync-cooldown-seconds",
+        type=int,
+        default=300,
+        help="Window in which sync_data reuses the last sync",
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--subjects", type=int, default=9000)
+    parser.add_argument("--reviews-per-item", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--api-latency-ms", type=float, default=50.0)
+    parser.add_argument("--api-jitter-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--api-rate-limit",
+        type=int,
+        default=600,
+        help="Requests per minute allowed by the fake API and the server",
+    )
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(UTC):%Y%m%dT%H%M%SZ}-{report['commit']}-load.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""Time the hot paths against a synthetic WaniKani-scale dataset.
+
+Covers the sync upserts, full and incremental `_sync_user_data`,
+`get_leeches` and every resource type, on SQLite and, when a scratch
+database URL is given, PostgreSQL. Results are written as JSON so runs from
+different commits can be compared:
+
+    python -m benchmarks.run --users 3
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, col, select
+
+from wanikani_mcp import database
+from wanikani_mcp import sync_service as sync_service_module
+from wanikani_mcp.cache import response_cache
+from wanikani_mcp.catalog import subject_catalog
+from wanikani_mcp.config import settings
+from wanikani_mcp.mcp_server import call_tool, read_resource
+from wanikani_mcp.metrics import SyncStepStats
+from wanikani_mcp.models import SyncLog, User
+from wanikani_mcp.sync_service import SyncService
+from wanikani_mcp.sync_stats import percentile
+from wanikani_mcp.wanikani_client import RateLimiter, WaniKaniClient
+
+from .datagen import Dataset, parse_iso
+from .datagen import etag as body_etag
+from .fake_wanikani import FakeApiOptions, FakeApiServer
+
+RESULTS_DIR = Path(__file__).parent / "results"
+RESOURCE_QUERIES = {
+    "user_progress": "",
+    "review_forecast": "",
+    "item_database": "",
+    "item_database_search": "&search=ka",
+}
+
+
+class DatasetClient(WaniKaniClient):
+    """WaniKaniClient that answers from a Dataset in memory.
+
+    Responses still go through a JSON round trip, so sync benchmarks measure
+    decoding, parsing and writing without the network or the rate limiter.
+    """
+
+    dataset: Dataset
+
+    async def _get(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> dict[str, Any]:
+        return json.loads(self._body(endpoint, params, stats))
+
+    async def _get_if_changed(
+        self,
+        endpoint: str,
+        etag: str | None,
+        stats: SyncStepStats | None = None,
+    ) -> tuple[dict[str, Any] | None, str | None]:
+        body = self._body(endpoint, None, stats)
+        current = body_etag(body.encode())
+        if current == etag:
+            return None, etag
+        return json.loads(body), current
+
+    def _body(
+        self, endpoint: str, params: dict | None, stats: SyncStepStats | None
+    ) -> str:
+        path, _, query = endpoint.lstrip("/").partition("?")
+        query_params = dict(parse_qsl(query)) | (params or {})
+        if path == "user":
+            payload = self.dataset.user_resource(self.api_key)
+        elif path == "summary":
+            payload = self.dataset.summary_resource(self.api_key)
+        else:
+            updated_after = query_params.get("updated_after")
+            page_after_id = query_params.get("page_after_id")
+            payload = self.dataset.page(
+                self.api_key,
+                path,
+                updated_after=parse_iso(updated_after) if updated_after else None,
+                page_after_id=int(page_after_id) if page_after_id else None,
+            )
+        body = json.dumps(payload)
+        if stats is not None:
+            stats.pages += 1
+            stats.bytes += len(body)
+        return body
+
+
+def summarize(samples: list[float], **extra: Any) -> dict[str, Any]:
+    """Summarise timings given in seconds as milliseconds"""
+    ms = [sample * 1000 for sample in samples]
+    return {
+        "iterations": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentile(ms, 0.5), 3),
+        "p95_ms": round(percentile(ms, 0.95), 3),
+        "min_ms": round(min(ms), 3),
+        "max_ms": round(max(ms), 3),
+        **extra,
+    }
+
+
+async def time_calls(
+    call: Callable[[], Awaitable[Any]],
+    iterations: int,
+    before: Callable[[], None] | None = None,
+) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def flatten(resource: dict[str, Any], **extra: Any) -> dict[str, Any]:
+    """Shape an API resource the way the sync loop hands it to the upserts"""
+    return json.loads(json.dumps(resource["data"])) | {
+        "id": resource["id"],
+        "data_updated_at": resource["data_updated_at"],
+        **extra,
+    }
+
+
+def phase_totals(engine, syncs: int) -> dict[str, int]:
+    """Add up the phase stats of the latest syncs across collections"""
+    totals: dict[str, int] = {}
+    with Session(engine) as session:
+        logs = session.exec(
+            select(SyncLog).order_by(col(SyncLog.id).desc()).limit(syncs)
+        ).all()
+    for log in logs:
+        for stats in (log.phase_stats or {}).values():
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def load_users(session: Session) -> list[User]:
+    return list(session.exec(select(User).order_by(User.id)).all())
+
+
+async def run_suite(url: str, dataset: Dataset, args) -> dict[str, Any]:
+    """Run every benchmark against a freshly created schema at `url`"""
+    engine = database.make_engine(url)
+    database.engine = engine
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    response_cache.clear()
+
+    with Session(engine) as session:
+        for number, data in enumerate(dataset.users.values(), start=1):
+            session.add(
+                User(
+                    wanikani_api_key=data.api_key,
+                    mcp_api_key=f"bench-mcp-key-{number}",
+                    username=data.username,
+                    level=data.level,
+                )
+            )
+        session.commit()
+        users = load_users(session)
+
+    service = SyncService()
+    results: dict[str, Any] = {}
+
+    # Full sync: the first sync of each user writes everything
+    samples, rows = [], 0
+    for user in users:
+        start = time.perf_counter()
+        rows += await service._sync_user_data(user)
+        samples.append(time.perf_counter() - start)
+    results["sync_full"] = summarize(
+        samples,
+        rows=rows,
+        rows_per_second=round(rows / sum(samples)),
+        phases=phase_totals(engine, len(users)),
+    )
+
+    # Incremental sync after a study session changed a few percent of items
+    changed = dataset.touch(args.touch_fraction)
+    with Session(engine) as session:
+        users = load_users(session)
+    samples, rows = [], 0
+    for user in users:
+        start = time.perf_counter()
+        rows += await service._sync_user_data(user)
+        samples.append(time.perf_counter() - start)
+    results["sync_incremental"] = summarize(
+        samples,
+        rows=rows,
+        changed=changed,
+        phases=phase_totals(engine, len(users)),
+    )
+
+    # Single-row upserts of existing rows, the common case during sync
+    user = users[-1]
+    user_data = dataset.users[user.wanikani_api_key].collections
+    subjects = dataset.subjects[: args.upsert_rows]
+    assignments = user_data["assignments"][: args.upsert_rows]
+    review_statistics = user_data["review_statistics"][: args.upsert_rows]
+    # Payloads are prepared up front so only the upsert itself is timed
+    upserts: dict[str, list[Callable[[], Awaitable[Any]]]] = {
+        "upsert_subject": [
+            partial(service._upsert_subject, flatten(item, object_type=item["object"]))
+            for item in subjects
+        ],
+        "upsert_assignment": [
+            partial(service._upsert_assignment, user.id, flatten(item))
+            for item in assignments
+        ],
+        "upsert_review_statistic": [
+            partial(service._upsert_review_statistic, user.id, flatten(item))
+            for item in review_statistics
+        ],
+    }
+    for name, calls in upserts.items():
+        samples = []
+        for call in calls:
+            samples += await time_calls(call, 1)
+        results[name] = summarize(samples)
+
+    # Read paths, with the response cache cleared (cold) and primed (warm)
+    subject_catalog.load()
+    with Session(engine) as session:
+        users = load_users(session)
+    reads: dict[str, Callable[[User], Callable[[], Awaitable[Any]]]] = {
+        "get_leeches": lambda user: lambda: call_tool(
+            "get_leeches", {"mcp_api_key": user.mcp_api_key}
+        ),
+        "project_workload": lambda user: lambda: call_tool(
+            "project_workload", {"mcp_api_key": user.mcp_api_key, "lessons_per_day": 15}
+        ),
+        "get_unlock_impact": lambda user: lambda: call_tool(
+            "get_unlock_impact", {"mcp_api_key": user.mcp_api_key}
+        ),
+        "get_critical_path": lambda user: lambda: call_tool(
+            "get_critical_path", {"mcp_api_key": user.mcp_api_key}
+        ),
+        "get_lesson_order": lambda user: lambda: call_tool(
+            "get_lesson_order", {"mcp_api_key": user.mcp_api_key}
+        ),
+    }
+    for name, query in RESOURCE_QUERIES.items():
+        resource_type = name.removesuffix("_search")
+        reads[f"resource_{name}"] = (
+            lambda user, resource_type=resource_type, query=query: lambda: (
+                read_resource(
+                    f"wanikani://{resource_type}?mcp_api_key={user.mcp_api_key}{query}"
+                )
+            )
+        )
+    for name, make_call in reads.items():
+        cold, warm = [], []
+        for user in users:
+            call = make_call(user)
+            cold += await time_calls(call, args.iterations, response_cache.clear)
+            warm += await time_calls(call, args.iterations)
+        results[f"{name}_cold"] = summarize(cold)
+        results[f"{name}_warm"] = summarize(warm)
+
+    database.dispose_engines()
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous: dict[str, Any], current: dict[str, Any]):
+    """Print the p50 change of every benchmark present in both runs"""
+    print(f"\nChange in p50 since {previous['commit']} ({previous['created_at']}):")
+    if previous["parameters"] != current["parameters"]:
+        print("  (warning: the runs used different parameters)")
+    for backend, results in current["backends"].items():
+        baseline = previous["backends"].get(backend, {})
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]["p50_ms"], result["p50_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            print(
+                f"  {backend:<10} {name:<34} {before:>10.3f} → {after:>10.3f} ms "
+                f"({change:+.1f}%)"
+            )
+
+
+def print_results(report: dict[str, Any]):
+    for backend, results in report["backends"].items():
+        print(f"\n{backend}")
+        for name, result in results.items():
+            print(
+                f"  {name:<34} p50 {result['p50_ms']:>10.3f} ms  "
+                f"p95 {result['p95_ms']:>10.3f} ms  n={result['iterations']}"
+            )
+
+
+def make_dataset(args) -> Dataset:
+    return Dataset(
+        users=args.users,
+        subjects=args.subjects,
+        reviews_per_item=args.reviews_per_item,
+        seed=args.seed,
+    )
+
+
+async def run_backend(url: str, args) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Run the suite on a fresh dataset, served in memory or over HTTP.
+
+    Returns the results and a description of the WaniKani API used.
+    """
+    dataset = make_dataset(args)
+    if args.api == "memory":
+        DatasetClient.dataset = dataset
+        sync_service_module.WaniKaniClient = DatasetClient
+        return await run_suite(url, dataset, args), {"mode": "memory"}
+
+    # End to end through the real client, its limiter and the fake API
+    sync_service_module.WaniKaniClient = WaniKaniClient
+    WaniKaniClient._rate_limiter = RateLimiter(args.api_rate_limit, 60.0)
+    options = FakeApiOptions(
+        latency_ms=args.api_latency_ms,
+        jitter_ms=args.api_jitter_ms,
+        page_size=args.api_page_size,
+        rate_limit=args.api_rate_limit,
+        error_rate=args.api_error_rate,
+        seed=args.seed,
+    )
+    with FakeApiServer(dataset, options) as api:
+        settings.wanikani_api_base_url = api.base_url
+        results = await run_suite(url, dataset, args)
+        api_info = {
+            "mode": "http",
+            **vars(options),
+            "requests": api.app.state.requests,
+            "throttled": api.app.state.throttled,
+        }
+    return results, api_info
+
+
+async def main_async(args) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "users": args.users,
+            "subjects": args.subjects,
+            "reviews_per_item": args.reviews_per_item,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "upsert_rows": args.upsert_rows,
+            "touch_fraction": args.touch_fraction,
+            "api": args.api,
+        },
+        "backends": {},
+        "api": {},
+    }
+
+    backends = {}
+    with tempfile.TemporaryDirectory() as directory:
+        backends["sqlite"] = f"sqlite:///{directory}/benchmark.db"
+        if args.postgres_url:
+            backends["postgresql"] = args.postgres_url
+        for backend, url in backends.items():
+            try:
+                results, api_info = await run_backend(url, args)
+            except OperationalError as e:
+                print(f"Skipping {backend}: {e}")
+                continue
+            report["backends"][backend] = results
+            report["api"][backend] = api_info
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--subjects", type=int, default=9000)
+    parser.add_argument("--reviews-per-item", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--iterations", type=int, default=20, help="Calls per user for read paths"
+    )
+    parser.add_argument(
+        "--upsert-rows", type=int, default=300, help="Rows timed per upsert type"
+    )
+    parser.add_argument(
+        "--touch-fraction",
+        type=float,
+        default=0.02,
+        help="Share of items changed before the incremental sync",
+    )
+    parser.add_argument(
+        "--postgres-url",
+        default=os.environ.get("BENCHMARK_POSTGRES_URL"),
+        help="Scratch PostgreSQL database to also benchmark; its tables are dropped",
+    )
+    parser.add_argument(
+        "--api",
+        choices=["memory", "http"],
+        default="memory",
+        help="Serve WaniKani data in memory, or over HTTP from the fake API",
+    )
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--api-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--api-page-size", type=int)
+    parser.add_argument(
+        "--api-rate-limit",
+        type=int,
+        default=600,
+        help="Requests per minute allowed by the fake API and the client",
+    )
+    parser.add_argument(
+        "--api-error-rate",
+        type=float,
+        default=0.0,
+        help="Share of fake API requests answered with 429",
+    )
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    parser.add_argument(
+        "--compare", type=Path, help="Earlier results file to compare against"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(main_async(args))
+    print_results(report)
+
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(UTC):%Y%m%dT%H%M%SZ}-{report['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Time how long a freshly spawned stdio server takes to answer its client.
+
+Desktop MCP clients start the server for every session, so this is latency
+users see. Each iteration spawns `python -m wanikani_mcp.server` against a
+seeded SQLite database and records the time from spawn to the initialize
+response, to the tools list, and to the first `get_leeches` result:
+
+    python -m benchmarks.startup --iterations 10
+    python -m benchmarks.startup --unstamped   # force the create_all path
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from sqlalchemy import create_engine
+
+from wanikani_mcp.database import alembic_version
+
+from .loadgen import seed_database
+from .run import RESULTS_DIR, git_commit, make_dataset, summarize
+
+
+async def time_session(parameters: StdioServerParameters, mcp_api_key: str):
+    """Spawn one server and time its first responses, in seconds from spawn"""
+    start = time.perf_counter()
+    async with (
+        stdio_client(parameters) as (read_stream, write_stream),
+        ClientSession(read_stream, write_stream) as session,
+    ):
+        await session.initialize()
+        initialize = time.perf_counter() - start
+        await session.list_tools()
+        list_tools = time.perf_counter() - start
+        result = await session.call_tool("get_leeches", {"mcp_api_key": mcp_api_key})
+        first_call = time.perf_counter() - start
+        if result.isError:
+            raise RuntimeError(f"get_leeches failed: {result.content}")
+    return initialize, list_tools, first_call
+
+
+async def run_startup(args) -> dict[str, Any]:
+    dataset = make_dataset(args)
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{directory}/startup.db"
+        mcp_api_keys = await seed_database(database_url, dataset)
+        if args.unstamped:
+            engine = create_engine(database_url)
+            with engine.begin() as connection:
+                alembic_version.drop(connection)
+            engine.dispose()
+
+        parameters = StdioServerParameters(
+            command=sys.executable,
+            args=["-m", "wanikani_mcp.server", "--mode", "stdio"],
+            env=os.environ
+            | {
+                "DATABASE_URL": database_url,
+                "SYNC_ENABLED": "true" if args.sync else "false",
+            },
+            cwd=directory,
+        )
+        samples: dict[str, list[float]] = {
+            "initialize": [],
+            "list_tools": [],
+            "first_tool_call": [],
+        }
+        for _ in range(args.iterations):
+            timings = await time_session(parameters, mcp_api_keys[0])
+            for name, seconds in zip(samples, timings, strict=True):
+                samples[name].append(seconds)
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "iterations": args.iterations,
+            "subjects": args.subjects,
+            "sync": args.sync,
+            "unstamped": args.unstamped,
+        },
+        "results": {name: summarize(values) for name, values in samples.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--subjects", type=int, default=9000)
+    parser.add_argument(
+        "--sync",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Start the background sync scheduler, as a default install does",
+    )
+    parser.add_argument(
+        "--unstamped",
+        action="store_true",
+        help="Drop the Alembic revision so startup runs create_all",
+    )
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    args = parser.parse_args()
+    # One user is enough: startup cost does not depend on how many there are
+    args.users, args.reviews_per_item, args.seed = 1, 3, 42
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_startup(args))
+
+    print(f"\nstdio startup, {args.iterations} spawns (ms from spawn)")
+    for name, result in report["results"].items():
+        print(
+            f"  {name:<16} p50 {result['p50_ms']:>9.1f} ms  "
+            f"p95 {result['p95_ms']:>9.1f} ms"
+        )
+
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(UTC):%Y%m%dT%H%M%SZ}-{report['commit']}-startup.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {output}")
+
+
+if __name__ == "__main__":
+    main()
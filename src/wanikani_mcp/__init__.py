@@ -1,2 +1,4 @@
 def main() -> None:
-    print("Hello from wanikani-mcp!")
+    from .server import main as server_main
+
+    server_main()
@@ -0,0 +1,94 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+from .config import settings
+
+
+class ResponseCache:
+    """In-memory cache for read-only tool and resource responses.
+
+    Entries are keyed by (name, normalized arguments, user sync generation),
+    so a completed sync makes every earlier entry for that user unreachable
+    without any explicit invalidation. Entries may also carry an expiry for
+    responses that depend on the wall clock (e.g. items becoming available).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(
+        user_id: int, generation: int, name: str, arguments: dict[str, Any]
+    ) -> tuple:
+        normalized = json.dumps(arguments, sort_keys=True, default=str)
+        return (user_id, generation, name, normalized)
+
+    def get(
+        self,
+        user_id: int,
+        generation: int,
+        name: str,
+        arguments: dict[str, Any] | None = None,
+    ) -> Any | None:
+        """Return a cached response, or None on a miss or expired entry"""
+        key = self._key(user_id, generation, name, arguments or {})
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        user_id: int,
+        generation: int,
+        name: str,
+        arguments: dict[str, Any] | None,
+        value: Any,
+        expires_in: float | None = None,
+    ) -> None:
+        """Store a response, expiring after at most the configured TTL"""
+        if self.max_entries <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if expires_in is not None:
+            ttl = min(ttl, max(expires_in, 0.0))
+
+        key = self._key(user_id, generation, name, arguments or {})
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached response for a user"""
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    settings.response_cache_max_entries, settings.response_cache_ttl_seconds
+)
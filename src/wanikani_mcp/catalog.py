@@ -0,0 +1,238 @@
+import logging
+import sys
+import time
+import unicodedata
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, col, select
+
+from .config import settings
+from .database import get_engine
+from .models import Subject
+
+logger = logging.getLogger(__name__)
+
+
+def primary_meaning(meanings: list[dict[str, Any]] | None) -> str | None:
+    """Return the primary meaning from a WaniKani meanings list"""
+    return next((m["meaning"] for m in meanings or [] if m.get("primary")), None)
+
+
+def primary_reading(readings: list[dict[str, Any]] | None) -> str | None:
+    """Return the primary reading from a WaniKani readings list"""
+    return next((r["reading"] for r in readings or [] if r.get("primary")), None)
+
+
+def normalize_search_text(text: str) -> str:
+    """Normalize text for matching against Subject.search_key"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def subject_search_key(
+    characters: str | None,
+    slug: str,
+    meanings: list[dict[str, Any]] | None,
+    readings: list[dict[str, Any]] | None,
+) -> str:
+    """Build the normalized search key for a subject.
+
+    Contains the characters, slug and every meaning and reading, separated by
+    "|" so a substring match cannot span two terms.
+    """
+    terms = [characters, slug]
+    terms += [m.get("meaning") for m in meanings or []]
+    terms += [r.get("reading") for r in readings or []]
+    normalized = dict.fromkeys(normalize_search_text(term) for term in terms if term)
+    return "|".join(normalized)
+
+
+class CatalogSubject:
+    """Compact read-only view of a subject used to enrich responses"""
+
+    __slots__ = (
+        "id",
+        "object_type",
+        "level",
+        "slug",
+        "characters",
+        "primary_meaning",
+        "primary_reading",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        object_type: str,
+        level: int,
+        slug: str,
+        characters: str | None,
+        primary_meaning: str | None,
+        primary_reading: str | None,
+    ):
+        self.id = id
+        # Only a handful of distinct values, so share one string per type
+        self.object_type = sys.intern(object_type)
+        self.level = level
+        self.slug = slug
+        self.characters = characters
+        self.primary_meaning = primary_meaning
+        self.primary_reading = primary_reading
+
+    @property
+    def display(self) -> str:
+        return self.characters or self.slug
+
+    @classmethod
+    def from_row(cls, row: Any) -> "CatalogSubject":
+        """Build a record from a row projected with CATALOG_COLUMNS"""
+        return cls(
+            id=row.id,
+            object_type=str(row.object_type.value),
+            level=row.level,
+            slug=row.slug,
+            characters=row.characters,
+            primary_meaning=row.primary_meaning,
+            primary_reading=row.primary_reading,
+        )
+
+
+# Columns the catalog reads; the JSON columns are never loaded
+CATALOG_COLUMNS = (
+    Subject.id,
+    Subject.object_type,
+    Subject.level,
+    Subject.slug,
+    Subject.characters,
+    Subject.primary_meaning,
+    Subject.primary_reading,
+    Subject.data_updated_at,
+)
+
+
+class SubjectCatalog:
+    """In-process catalog of all subjects, keyed by subject id.
+
+    Subjects are shared across users and change rarely, so read handlers look
+    them up here instead of joining against the subject table and decoding its
+    JSON columns on every request. The catalog is loaded at startup, updated
+    in place after subject syncs, and periodically picks up rows written by
+    other processes.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._subjects: dict[int, CatalogSubject] = {}
+        # Ids a lookup found no row for, skipped until the next refresh
+        self._absent: set[int] = set()
+        self._watermark: datetime | None = None
+        self._checked_at: float | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._checked_at is not None
+
+    def load(self) -> None:
+        """(Re)build the catalog from the subject table"""
+        started = time.perf_counter()
+        with Session(get_engine()) as session:
+            rows = session.exec(select(*CATALOG_COLUMNS)).all()
+            self._subjects = {}
+            self._absent = set()
+            self._store(rows)
+        self._checked_at = time.monotonic()
+        logger.info(
+            f"Loaded {len(self._subjects)} subjects into catalog in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms "
+            f"(~{self.memory_footprint() / 1024:.0f} KiB)"
+        )
+
+    def refresh(self, subject_ids: Iterable[int] | None = None) -> None:
+        """Reload the given subjects, or those updated since the last load"""
+        if not self.is_loaded:
+            self.load()
+            return
+
+        with Session(get_engine()) as session:
+            statement = select(*CATALOG_COLUMNS)
+            if subject_ids is not None:
+                ids = list(subject_ids)
+                if not ids:
+                    return
+                statement = statement.where(col(Subject.id).in_(ids))
+            else:
+                self._absent = set()
+                if self._watermark is not None:
+                    statement = statement.where(
+                        col(Subject.data_updated_at) > self._watermark
+                    )
+            rows = session.exec(statement).all()
+            self._store(rows)
+        if subject_ids is not None:
+            self._absent.update(
+                subject_id for subject_id in ids if subject_id not in self._subjects
+            )
+        self._checked_at = time.monotonic()
+
+    def ensure_fresh(self) -> None:
+        """Load the catalog, or pick up newer rows once it is old enough"""
+        if not self.is_loaded:
+            self.load()
+        elif time.monotonic() - (self._checked_at or 0) >= self.refresh_seconds:
+            self.refresh()
+
+    def get(self, subject_id: int) -> CatalogSubject | None:
+        return self._subjects.get(subject_id)
+
+    def get_many(self, subject_ids: Iterable[int]) -> dict[int, CatalogSubject]:
+        """Look up subjects by id, loading any the catalog has not seen yet"""
+        self.ensure_fresh()
+        ids = set(subject_ids)
+        missing = [
+            subject_id
+            for subject_id in ids
+            if subject_id not in self._subjects and subject_id not in self._absent
+        ]
+        if missing:
+            self.refresh(missing)
+        return {
+            subject_id: self._subjects[subject_id]
+            for subject_id in ids
+            if subject_id in self._subjects
+        }
+
+    def _store(self, rows: Iterable[Any]) -> None:
+        changed = False
+        for row in rows:
+            self._subjects[row.id] = CatalogSubject.from_row(row)
+            self._absent.discard(row.id)
+            changed = True
+            if row.data_updated_at and (
+                self._watermark is None or row.data_updated_at > self._watermark
+            ):
+                self._watermark = row.data_updated_at
+        if changed:
+            self.version += 1
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the catalog (records, strings and index)"""
+        total = sys.getsizeof(self._subjects)
+        seen: set[int] = set()
+        for record in self._subjects.values():
+            total += sys.getsizeof(record)
+            for name in CatalogSubject.__slots__:
+                value = getattr(record, name)
+                if value is None or id(value) in seen:
+                    continue
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+        return total
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+
+# Global subject catalog instance
+subject_catalog = SubjectCatalog(settings.subject_catalog_refresh_seconds)
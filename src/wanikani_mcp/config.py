@@ -7,6 +7,27 @@ class Settings(BaseSettings):
 
     # Database Configuration
     database_url: str = "sqlite:///./wanikani_mcp.db"
+    # Connection pool, per engine and per process
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout_seconds: float = 30
+    # Server databases only: replace connections older than this, and test
+    # each connection before use
+    database_pool_recycle_seconds: int = 1800
+    database_pool_pre_ping: bool = True
+    # SQLite only; applied to every connection
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 16384
+    sqlite_mmap_size_mb: int = 256
+    # How long a sync write waits for the single writer connection
+    sqlite_writer_timeout_seconds: float = 30
+    # Optional read replica for query-only handlers (empty = primary only)
+    read_database_url: str = ""
+    # Seconds between replica lag checks, and the lag beyond which it is skipped
+    read_replica_lag_check_seconds: float = 5
+    read_replica_max_lag_seconds: float = 30
 
     # WaniKani API Configuration
     wanikani_api_base_url: str = "https://api.wanikani.com/v2"
@@ -15,17 +36,59 @@ class Settings(BaseSettings):
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    http_workers: int = 1
 
     # Application Configuration
     debug: bool = False
     log_level: str = "INFO"
 
     # Background Sync Configuration
+    sync_enabled: bool = True
     sync_interval_minutes: int = 30
     max_concurrent_syncs: int = 3
+    manual_sync_cooldown_seconds: int = 300
+    # A running sync renews its lease every third of this, so a dead
+    # process's lease frees up within it
+    sync_lease_seconds: int = 90
+    # How long sync_data waits for a sync running in another process
+    manual_sync_max_wait_seconds: int = 60
+
+    # Reviews written per INSERT while ingesting review history
+    review_batch_size: int = 1000
+
+    # How long stored SRS systems are trusted before sync asks WaniKani
+    # (conditionally) whether they changed
+    srs_systems_ttl_hours: int = 168
+
+    # Response Cache Configuration
+    response_cache_max_entries: int = 1024
+    response_cache_ttl_seconds: int = 300
+
+    # Subject Catalog Configuration
+    subject_catalog_refresh_seconds: int = 600
+
+    # Leech Detection Configuration
+    leech_score_threshold: float = 1.0
+    leech_change_retention_days: int = 90
+
+    # Admin tools (get_sync_stats, ...) are disabled while this is empty
+    admin_api_key: str = ""
+
+    # Profiling Configuration (mode: off, cprofile or tracemalloc)
+    profiling_mode: str = "off"
+    profiling_sample_rate: float = 1.0
+    # Comma-separated tool names, resource types or "sync"; empty means all
+    profiling_targets: str = ""
+    # Comma-separated user ids; empty means all users
+    profiling_user_ids: str = ""
+    profiling_dir: str = "profiles"
+    profiling_max_files: int = 50
 
     # Optional: Monitoring
     sentry_dsn: str = ""
+    # Port for /metrics and /health in stdio mode and the sync worker (0 = off)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
 
 
 settings = Settings()
@@ -1,20 +1,360 @@
+import logging
+import threading
+import time
 from collections.abc import Generator
+from datetime import UTC, datetime
 
+from sqlalchemy import (
+    Column,
+    Engine,
+    MetaData,
+    String,
+    Table,
+    event,
+    inspect,
+    make_url,
+    select,
+    text,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import settings
+from .metrics import (
+    DB_POOL_CAPACITY,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_TIMEOUTS,
+    READ_ROUTES,
+)
 
-engine = create_engine(settings.database_url, echo=settings.debug)
+logger = logging.getLogger(__name__)
 
+# Alembic revision the models match. A database stamped with it needs no
+# schema work at startup; tests/test_database.py keeps it at the head.
+SCHEMA_REVISION = "8c5d3e1a7f40"
 
-def get_engine():
+# Alembic's bookkeeping table, as `alembic stamp` creates it
+alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+
+# Created on first use, so importing this module does not connect or load a
+# database driver
+engine: Engine | None = None
+# SQLite only: the one connection sync writes go through
+writer_engine: Engine | None = None
+# The replica at READ_DATABASE_URL, when one is configured
+read_engine: Engine | None = None
+
+# Seconds the replica is behind the primary. It is 0 when the replica has
+# replayed everything it received, since an idle primary sends nothing new.
+REPLICA_LAG_QUERIES = {
+    "postgresql": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery()
+                OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END
+    """,
+}
+
+
+def is_sqlite_file(url) -> bool:
+    """Whether the URL names an on-disk SQLite database"""
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        # Negative sizes are in KiB rather than pages
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "mmap_size": settings.sqlite_mmap_size_mb * 1024 * 1024,
+        "temp_store": "memory",
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine):
+    """Set the performance pragmas on every connection the engine opens"""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout waits and how many connections are in use.
+
+    Series are labelled with the pool's logging name, which survives the
+    pool being recreated when the engine is disposed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        capacity = self.size() + self._max_overflow
+        DB_POOL_CAPACITY.set(
+            capacity if self._max_overflow >= 0 else float("inf"), engine=self.label
+        )
+        DB_POOL_CHECKED_OUT.set(0, engine=self.label)
+
+    @property
+    def label(self) -> str:
+        return self._orig_logging_name or "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc(engine=self.label)
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(
+                time.perf_counter() - start, engine=self.label
+            )
+        DB_POOL_CHECKED_OUT.set(self.checkedout(), engine=self.label)
+        return record
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        DB_POOL_CHECKED_OUT.set(self.checkedout(), engine=self.label)
+
+
+def pool_options(url, name: str) -> dict:
+    """Pool settings for an engine, empty for in-memory SQLite"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and not is_sqlite_file(url):
+        # Single-connection pools; there is nothing to size
+        return {}
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout_seconds,
+    }
+    if not is_sqlite_file(url):
+        # Server connections can be dropped while idle, by the server or a
+        # proxy in between
+        options["pool_pre_ping"] = settings.database_pool_pre_ping
+        options["pool_recycle"] = settings.database_pool_recycle_seconds
+    return options
+
+
+def make_engine(url, name: str = "primary", **kwargs) -> Engine:
+    """Create an engine with the configured pool, labelled `name` in metrics.
+
+    SQLite files also get the performance pragmas. Keyword arguments
+    override the pool settings.
+    """
+    new_engine = create_engine(
+        url, echo=settings.debug, **(pool_options(url, name) | kwargs)
+    )
+    if is_sqlite_file(new_engine.url):
+        apply_sqlite_pragmas(new_engine)
+    return new_engine
+
+
+def get_engine() -> Engine:
+    global engine
+    if engine is None:
+        engine = make_engine(settings.database_url)
     return engine
 
 
+def get_writer_engine() -> Engine:
+    """Return the engine sync writes go through.
+
+    SQLite allows one writer at a time, and concurrent writers that start
+    as readers can fail to upgrade their lock. On an SQLite file this is a
+    separate engine with a single pooled connection whose transactions
+    start with BEGIN IMMEDIATE, so writers in this process queue for it
+    while readers on `get_engine()` keep running under WAL. Other
+    databases use the shared engine.
+    """
+    global writer_engine
+    reader = get_engine()
+    if not is_sqlite_file(reader.url):
+        return reader
+    if writer_engine is None or writer_engine.url != reader.url:
+        if writer_engine is not None:
+            writer_engine.dispose()
+        writer_engine = make_engine(
+            reader.url,
+            "writer",
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.sqlite_writer_timeout_seconds,
+        )
+
+        @event.listens_for(writer_engine, "connect")
+        def disable_implicit_begin(dbapi_connection, connection_record):
+            # Let the begin hook below open transactions instead of pysqlite
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(writer_engine, "begin")
+        def begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+def get_read_engine() -> Engine:
+    """Return the read replica's engine, or the primary's without one"""
+    global read_engine
+    if not settings.read_database_url:
+        return get_engine()
+    if read_engine is None:
+        read_engine = make_engine(settings.read_database_url, "replica")
+    return read_engine
+
+
+def dispose_engines():
+    """Close every engine's connections and forget them"""
+    global engine, writer_engine, read_engine
+    for current in (read_engine, writer_engine, engine):
+        if current is not None:
+            current.dispose()
+    engine = writer_engine = read_engine = None
+
+
+class ReplicaRouter:
+    """Route query-only handlers to the read replica when it is fresh enough.
+
+    The replica's lag is measured at most every `check_seconds`. A read goes
+    to the replica only if the lag is known, within `max_lag_seconds`, and
+    shorter than the time since the user's last sync committed, plus the
+    check interval as margin. Otherwise the replica may not have that sync
+    yet, and the read goes to the primary.
+    """
+
+    def __init__(self, check_seconds: float, max_lag_seconds: float):
+        self.check_seconds = check_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._lock = threading.Lock()
+        self._checked_at = -float("inf")
+        self._lag: float | None = None
+
+    def lag(self) -> float | None:
+        """The replica's last measured lag in seconds, None if unknown"""
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_seconds:
+                self._lag = self._measure_lag()
+                self._checked_at = time.monotonic()
+            return self._lag
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = -float("inf")
+
+    @staticmethod
+    def _measure_lag() -> float | None:
+        replica = get_read_engine()
+        query = REPLICA_LAG_QUERIES.get(replica.dialect.name)
+        if query is None:
+            # Nothing to measure; treat the database as current
+            return 0.0
+        try:
+            with replica.connect() as connection:
+                lag = connection.execute(text(query)).scalar()
+        except Exception as e:
+            logger.warning(f"Could not measure read replica lag: {e}")
+            return None
+        return None if lag is None else max(float(lag), 0.0)
+
+    def use_replica(self, synced_at: datetime | None) -> bool:
+        if not settings.read_database_url:
+            return False
+        lag = self.lag()
+        if lag is None or lag > self.max_lag_seconds:
+            return False
+        if synced_at is None:
+            return True
+        if synced_at.tzinfo is None:
+            # SQLite returns naive datetimes for the UTC values we store
+            synced_at = synced_at.replace(tzinfo=UTC)
+        since_sync = (datetime.now(UTC) - synced_at).total_seconds()
+        return since_sync > lag + self.check_seconds
+
+    def session(self, synced_at: datetime | None) -> Session:
+        if self.use_replica(synced_at):
+            READ_ROUTES.inc(target="replica")
+            return Session(get_read_engine())
+        READ_ROUTES.inc(target="primary")
+        return Session(get_engine())
+
+
+replica_router = ReplicaRouter(
+    settings.read_replica_lag_check_seconds, settings.read_replica_max_lag_seconds
+)
+
+
+def read_session(synced_at: datetime | None = None) -> Session:
+    """Open a session for a query-only handler.
+
+    Pass the user's `synced_at`. The session is on the read replica when
+    one is configured and has caught up with that sync, and on the primary
+    otherwise. Writes always use `get_engine()` or `get_writer_engine()`.
+    """
+    return replica_router.session(synced_at)
+
+
 def create_tables():
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
+
+
+def schema_revision(engine: Engine) -> str | None:
+    """Return the Alembic revision the database is stamped with, if any"""
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(alembic_version.name):
+            return None
+        return connection.execute(select(alembic_version.c.version_num)).scalar()
+
+
+def ensure_schema():
+    """Make sure the tables exist, skipping the work for a current database.
+
+    A database at SCHEMA_REVISION costs one query. Any other database gets
+    `create_all` as before, which reflects every table. A database that had
+    no tables is stamped afterwards, so it takes the fast path next time.
+    One at an older revision is left for `alembic upgrade head`.
+    """
+    engine = get_engine()
+    revision = schema_revision(engine)
+    if revision == SCHEMA_REVISION:
+        return
+
+    if revision is not None:
+        logger.warning(
+            f"Database schema is at revision {revision}, expected "
+            f"{SCHEMA_REVISION}; run `alembic upgrade head`"
+        )
+    fresh = revision is None and not inspect(engine).get_table_names()
+    create_tables()
+    if fresh:
+        with engine.begin() as connection:
+            alembic_version.create(connection)
+            connection.execute(
+                alembic_version.insert().values(version_num=SCHEMA_REVISION)
+            )
+        logger.info(f"Created schema at revision {SCHEMA_REVISION}")
 
 
 def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
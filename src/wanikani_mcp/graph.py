@@ -0,0 +1,553 @@
+import logging
+import math
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlmodel import Session, col, func, select
+
+from .config import settings
+from .database import get_engine
+from .models import Assignment, Subject, SubjectType
+from .srs import (
+    DEFAULT_SYSTEM_ID,
+    LEVEL_UP_KANJI_SHARE,
+    SrsSchedule,
+    item_guru_eta,
+    schedule_for,
+)
+
+logger = logging.getLogger(__name__)
+
+# Subject types as small integers, in unlock order: radicals unlock kanji,
+# kanji unlock vocabulary
+SUBJECT_TYPES = tuple(SubjectType)
+TYPE_CODES = {subject_type: code for code, subject_type in enumerate(SUBJECT_TYPES)}
+
+# Columns the graph is built from; the JSON amalgamation lists are never read,
+# since they are the same edges seen from the other end
+GRAPH_COLUMNS = (
+    Subject.id,
+    Subject.object_type,
+    Subject.level,
+    Subject.spaced_repetition_system_id,
+    Subject.hidden_at,
+    Subject.component_subject_ids,
+)
+
+
+def _lookup(ids: np.ndarray, subject_ids: np.ndarray) -> np.ndarray:
+    """Positions of `subject_ids` in the sorted `ids`, -1 where absent"""
+    if not len(ids):
+        return np.full(len(subject_ids), -1, dtype=np.int64)
+    position = np.minimum(np.searchsorted(ids, subject_ids), len(ids) - 1)
+    return np.where(ids[position] == subject_ids, position, -1)
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, size: int):
+    """Offsets and targets of edges grouped by source, sources 0..size-1"""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+    return offsets, targets[order]
+
+
+@dataclass(frozen=True)
+class SubjectGraph:
+    """Subjects and their component edges as compact integer arrays.
+
+    A subject is addressed by its index in `ids`, which is sorted. Edges are
+    held both ways in CSR form: the subjects built from subject `i` are
+    `unlocks[unlock_offsets[i]:unlock_offsets[i + 1]]`, and its components
+    are `components[component_offsets[i]:component_offsets[i + 1]]`.
+    """
+
+    ids: np.ndarray
+    levels: np.ndarray
+    # Codes into SUBJECT_TYPES
+    types: np.ndarray
+    systems: np.ndarray
+    hidden: np.ndarray
+    unlock_offsets: np.ndarray
+    unlocks: np.ndarray
+    component_offsets: np.ndarray
+    components: np.ndarray
+
+    @classmethod
+    def build(cls, rows: Iterable[Any]) -> "SubjectGraph":
+        """Build from rows projected with GRAPH_COLUMNS"""
+        rows = sorted(rows, key=lambda row: row.id)
+        ids = np.array([row.id for row in rows], dtype=np.int64)
+        edge_lists = [row.component_subject_ids or [] for row in rows]
+        amalgamations = np.repeat(
+            np.arange(len(rows)), [len(edges) for edges in edge_lists]
+        )
+        component_ids = np.array(
+            [subject_id for edges in edge_lists for subject_id in edges],
+            dtype=np.int64,
+        )
+        # Components missing from the subject table are dropped
+        component_index = _lookup(ids, component_ids)
+        known = component_index >= 0
+        sources, targets = component_index[known], amalgamations[known]
+
+        unlock_offsets, unlocks = _csr(sources, targets, len(ids))
+        component_offsets, components = _csr(targets, sources, len(ids))
+        return cls(
+            ids=ids,
+            levels=np.array([row.level for row in rows], dtype=np.int16),
+            types=np.array(
+                [TYPE_CODES[SubjectType(row.object_type)] for row in rows],
+                dtype=np.int8,
+            ),
+            systems=np.array(
+                [row.spaced_repetition_system_id or DEFAULT_SYSTEM_ID for row in rows],
+                dtype=np.int64,
+            ),
+            hidden=np.array([row.hidden_at is not None for row in rows], dtype=bool),
+            unlock_offsets=unlock_offsets,
+            unlocks=unlocks,
+            component_offsets=component_offsets,
+            components=components,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            getattr(self, name).nbytes
+            for name in self.__dataclass_fields__
+            if isinstance(getattr(self, name), np.ndarray)
+        )
+
+    def index(self, subject_ids: Iterable[int]) -> np.ndarray:
+        """Indices of the given subject ids, -1 for unknown ones"""
+        return _lookup(self.ids, np.fromiter(subject_ids, dtype=np.int64))
+
+    def unlock_edges(self, index: int) -> slice:
+        """Positions in `unlocks` of the edges from subject `index`"""
+        return slice(self.unlock_offsets[index], self.unlock_offsets[index + 1])
+
+    def unlocked_by(self, index: int) -> np.ndarray:
+        return self.unlocks[self.unlock_edges(index)]
+
+    def components_of(self, index: int) -> np.ndarray:
+        return self.components[
+            self.component_offsets[index] : self.component_offsets[index + 1]
+        ]
+
+    def edge_sources(self) -> np.ndarray:
+        """The component end of each edge in `unlocks`"""
+        return np.repeat(np.arange(len(self.ids)), np.diff(self.unlock_offsets))
+
+    def downstream(self, index: int) -> np.ndarray:
+        """Every subject `index` leads to, directly or through others"""
+        seen = np.zeros(len(self.ids), dtype=bool)
+        frontier = self.unlocked_by(index)
+        while len(frontier):
+            seen[frontier] = True
+            frontier = np.concatenate([self.unlocked_by(i) for i in frontier])
+            frontier = np.unique(frontier[~seen[frontier]])
+        return np.flatnonzero(seen)
+
+
+class SubjectGraphIndex:
+    """In-process component graph of all subjects.
+
+    Built from the subject table at startup and after subject syncs; other
+    processes' subject writes are picked up every
+    SUBJECT_CATALOG_REFRESH_SECONDS. Rebuilds swap in a new graph, so callers
+    holding the old one keep a consistent view.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._graph = SubjectGraph.build([])
+        self._signature: tuple | None = None
+        self._checked_at: float | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._checked_at is not None
+
+    def _current_signature(self, session: Session) -> tuple:
+        return tuple(
+            session.exec(select(func.count(), func.max(Subject.data_updated_at))).one()
+        )
+
+    def load(self) -> None:
+        """(Re)build the graph from the subject table"""
+        started = time.perf_counter()
+        with Session(get_engine()) as session:
+            signature = self._current_signature(session)
+            graph = SubjectGraph.build(session.exec(select(*GRAPH_COLUMNS)).all())
+        self._graph = graph
+        self._signature = signature
+        self._checked_at = time.monotonic()
+        self.version += 1
+        logger.info(
+            f"Built subject graph of {len(graph)} subjects and "
+            f"{len(graph.unlocks)} edges in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms "
+            f"(~{graph.nbytes / 1024:.0f} KiB)"
+        )
+
+    def ensure_fresh(self) -> None:
+        """Build the graph, or rebuild it if subjects changed meanwhile"""
+        if not self.is_loaded:
+            self.load()
+        elif time.monotonic() - (self._checked_at or 0) >= self.refresh_seconds:
+            with Session(get_engine()) as session:
+                changed = self._current_signature(session) != self._signature
+            if changed:
+                self.load()
+            else:
+                self._checked_at = time.monotonic()
+
+    def get(self) -> SubjectGraph:
+        self.ensure_fresh()
+        return self._graph
+
+
+# Global subject graph instance
+subject_graph = SubjectGraphIndex(settings.subject_catalog_refresh_seconds)
+
+
+@dataclass
+class Progress:
+    """A user's assignments, aligned with a graph's subject indices"""
+
+    unlocked: np.ndarray
+    passed: np.ndarray
+    srs_stage: np.ndarray
+
+
+def load_progress(
+    session: Session, user_id: int | None, graph: SubjectGraph
+) -> Progress:
+    """Read the user's assignment states into arrays over the graph.
+
+    One index range scan on user_id; subjects without an assignment are
+    locked.
+    """
+    rows = session.exec(
+        select(
+            Assignment.subject_id,
+            Assignment.srs_stage,
+            Assignment.unlocked_at,
+            Assignment.passed_at,
+        ).where(
+            Assignment.user_id == user_id,
+            Assignment.hidden == False,  # noqa: E712
+        )
+    ).all()
+    index = graph.index(row.subject_id for row in rows)
+    known = [row for row, position in zip(rows, index, strict=True) if position >= 0]
+    index = index[index >= 0]
+
+    unlocked = np.zeros(len(graph), dtype=bool)
+    passed = np.zeros(len(graph), dtype=bool)
+    srs_stage = np.full(len(graph), -1, dtype=np.int64)
+    unlocked[index] = [row.unlocked_at is not None for row in known]
+    passed[index] = [row.passed_at is not None for row in known]
+    srs_stage[index] = [row.srs_stage for row in known]
+    return Progress(unlocked=unlocked, passed=passed, srs_stage=srs_stage)
+
+
+def _subject(graph: SubjectGraph, index: int, progress: Progress) -> dict[str, Any]:
+    if progress.passed[index]:
+        status = "passed"
+    elif progress.unlocked[index]:
+        status = "unlocked"
+    else:
+        status = "locked"
+    return {
+        "subject_id": int(graph.ids[index]),
+        "subject_type": SUBJECT_TYPES[graph.types[index]].value,
+        "level": int(graph.levels[index]),
+        "status": status,
+        "srs_stage": int(progress.srs_stage[index])
+        if progress.srs_stage[index] >= 0
+        else None,
+    }
+
+
+@dataclass
+class UnlockEdges:
+    """Which component edges hold a locked subject back, for one user"""
+
+    sources: np.ndarray
+    targets: np.ndarray
+    locked: np.ndarray
+    # The edge's component is unpassed and its subject locked
+    held: np.ndarray
+    # ...and the component is the last one its subject waits for
+    last: np.ndarray
+
+    @classmethod
+    def of(cls, graph: SubjectGraph, progress: Progress) -> "UnlockEdges":
+        sources, targets = graph.edge_sources(), graph.unlocks
+        locked = ~progress.unlocked & ~graph.hidden
+        # Unpassed components of every subject
+        waiting_on = np.bincount(
+            targets, weights=~progress.passed[sources], minlength=len(graph)
+        )
+        held = locked[targets] & ~progress.passed[sources]
+        last = held & (waiting_on[targets] == 1)
+        return cls(sources, targets, locked, held, last)
+
+    def counts(self) -> tuple[np.ndarray, np.ndarray]:
+        """Per subject: locked subjects passing it unlocks, and it holds back"""
+        size = len(self.locked)
+        return (
+            np.bincount(self.sources[self.last], minlength=size),
+            np.bincount(self.sources[self.held], minlength=size),
+        )
+
+
+def unlock_impact(
+    graph: SubjectGraph,
+    progress: Progress,
+    subject_id: int | None = None,
+    limit: int = 10,
+) -> dict[str, Any]:
+    """What passing items unlocks.
+
+    For one subject: the subjects built from it, and which of them passing
+    it would unlock right away because their other components are passed.
+    Without one: the user's unlocked, unpassed items ranked by how many
+    locked subjects they would unlock on passing, then by how many they
+    hold back. Counts for every item come from a few passes over the edge
+    arrays.
+    """
+    edges = UnlockEdges.of(graph, progress)
+    targets, locked, last = edges.targets, edges.locked, edges.last
+
+    if subject_id is not None:
+        [index] = graph.index([subject_id])
+        if index < 0:
+            raise ValueError(f"Unknown subject {subject_id}")
+        own = graph.unlock_edges(index)
+        unlocks = []
+        for target, unlocks_now in zip(targets[own], last[own], strict=True):
+            item = _subject(graph, target, progress)
+            item["unlocks_on_pass"] = bool(unlocks_now)
+            unlocks.append(item)
+        return {
+            **_subject(graph, index, progress),
+            "unlocks_on_pass": int(last[own].sum()),
+            "downstream_locked": int(locked[graph.downstream(index)].sum()),
+            "unlocks": unlocks,
+        }
+
+    unlocks_now, holding = edges.counts()
+    candidates = np.flatnonzero(
+        progress.unlocked & ~progress.passed & ~graph.hidden & (holding > 0)
+    )
+    # Most unlocked on passing first, then most held back, then lowest level
+    order = np.lexsort(
+        (
+            graph.levels[candidates],
+            -holding[candidates],
+            -unlocks_now[candidates],
+        )
+    )
+    items = []
+    for index in candidates[order][:limit]:
+        item = _subject(graph, index, progress)
+        item["unlocks_on_pass"] = int(unlocks_now[index])
+        item["holds_back"] = int(holding[index])
+        own = graph.unlock_edges(index)
+        item["unlocks"] = graph.ids[targets[own][last[own]]].tolist()
+        items.append(item)
+    return {
+        "items_blocking": len(candidates),
+        "locked_subjects": int(locked.sum()),
+        "items": items,
+    }
+
+
+@dataclass
+class LevelPlan:
+    """The earliest level-up and the items it waits on"""
+
+    level: int
+    kanji: int
+    kanji_required: int
+    kanji_passed: int
+    # None once passed, or when locked components cannot be estimated
+    level_up_at: datetime | None
+    # Required kanji and the unpassed components holding them back, by
+    # subject index, with their slack
+    items: dict[int, dict[str, Any]]
+
+
+def level_plan(
+    session: Session,
+    user_id: int | None,
+    level: int,
+    now: datetime,
+    graph: SubjectGraph,
+    systems: Mapping[int, SrsSchedule],
+) -> LevelPlan:
+    """The items that decide how soon the level can be passed.
+
+    Every kanji of the level gets the earliest time it can reach Guru,
+    assuming every answer is right. A locked kanji unlocks when its last
+    component reaches Guru, then climbs from a lesson. Passing the level
+    needs 90% of its kanji at Guru, so it can happen when the required
+    kanji with the latest estimate gets there. Each kanji counted towards
+    that, and each unpassed component holding one back, gets its slack:
+    how long it can be delayed without delaying the level. Items with no
+    slack are the critical path.
+    """
+    level_kanji = np.flatnonzero(
+        (graph.levels == level)
+        & (graph.types == TYPE_CODES[SubjectType.KANJI])
+        & ~graph.hidden
+    )
+    component_index = np.unique(
+        np.concatenate(
+            [graph.components_of(index) for index in level_kanji]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+    )
+    involved = np.union1d(level_kanji, component_index)
+    rows = {
+        row.subject_id: row
+        for row in session.exec(
+            select(
+                Assignment.subject_id,
+                Assignment.srs_stage,
+                Assignment.unlocked_at,
+                Assignment.available_at,
+                Assignment.passed_at,
+            ).where(
+                Assignment.user_id == user_id,
+                Assignment.hidden == False,  # noqa: E712
+                col(Assignment.subject_id).in_(graph.ids[involved].tolist()),
+            )
+        ).all()
+    }
+
+    def estimate(index: int) -> tuple[str, datetime | None]:
+        row = rows.get(int(graph.ids[index]))
+        return item_guru_eta(
+            schedule_for(systems, int(graph.systems[index])),
+            row.srs_stage if row else None,
+            row.unlocked_at if row else None,
+            row.available_at if row else None,
+            row.passed_at if row else None,
+            now,
+        )
+
+    components = {int(index): estimate(index) for index in component_index}
+    kanji = []
+    for index in level_kanji:
+        status, guru_at = estimate(index)
+        unlock_at = None
+        if status == "locked":
+            # Unlocks once every component is passed
+            waits = [
+                components[int(component)]
+                for component in graph.components_of(index)
+                if components[int(component)][0] != "passed"
+            ]
+            if all(eta is not None for _, eta in waits):
+                unlock_at = max([eta for _, eta in waits], default=now)
+                schedule = schedule_for(systems, int(graph.systems[index]))
+                guru_at = schedule.earliest_at(
+                    schedule.unlocking_position, unlock_at, schedule.passing_position
+                )
+        kanji.append((int(index), status, guru_at, unlock_at))
+
+    passed = sum(status == "passed" for _, status, _, _ in kanji)
+    required = math.ceil(len(kanji) * LEVEL_UP_KANJI_SHARE)
+    still_needed = max(required - passed, 0)
+    pending = sorted(
+        (entry for entry in kanji if entry[1] != "passed" and entry[2] is not None),
+        key=lambda entry: entry[2],
+    )
+    level_up_at = None
+    if 0 < still_needed <= len(pending):
+        level_up_at = pending[still_needed - 1][2]
+
+    def hours(delta: timedelta) -> float:
+        return round(delta.total_seconds() / 3600, 1)
+
+    items: dict[int, dict[str, Any]] = {}
+    if level_up_at is not None:
+        for index, status, guru_at, unlock_at in pending[:still_needed]:
+            slack = level_up_at - guru_at
+            items[index] = {
+                "subject_id": int(graph.ids[index]),
+                "subject_type": SubjectType.KANJI.value,
+                "status": status,
+                "guru_at": guru_at.isoformat(),
+                "slack_hours": hours(slack),
+                "holds_back": [],
+            }
+            if unlock_at is None:
+                continue
+            for component in graph.components_of(index):
+                component_status, component_at = components[int(component)]
+                if component_status == "passed":
+                    continue
+                # Delaying a component delays the kanji only past its unlock
+                component_slack = slack + (unlock_at - component_at)
+                item = items.get(int(component))
+                if item is None or component_slack < timedelta(
+                    hours=item["slack_hours"]
+                ):
+                    holds_back = item["holds_back"] if item else []
+                    item = {
+                        "subject_id": int(graph.ids[component]),
+                        "subject_type": SUBJECT_TYPES[graph.types[component]].value,
+                        "status": component_status,
+                        "guru_at": component_at.isoformat(),
+                        "slack_hours": hours(component_slack),
+                        "holds_back": holds_back,
+                    }
+                    items[int(component)] = item
+                item["holds_back"].append(int(graph.ids[index]))
+
+    return LevelPlan(
+        level=level,
+        kanji=len(kanji),
+        kanji_required=required,
+        kanji_passed=passed,
+        level_up_at=level_up_at,
+        items=items,
+    )
+
+
+def critical_path(
+    session: Session,
+    user_id: int | None,
+    level: int,
+    now: datetime,
+    graph: SubjectGraph,
+    systems: Mapping[int, SrsSchedule],
+    limit: int = 20,
+) -> dict[str, Any]:
+    """The level's plan, most urgent items first"""
+    plan = level_plan(session, user_id, level, now, graph, systems)
+    ordered = sorted(
+        plan.items.values(), key=lambda item: (item["slack_hours"], item["guru_at"])
+    )
+    return {
+        "level": level,
+        "as_of": now.isoformat(),
+        "kanji": plan.kanji,
+        "kanji_required": plan.kanji_required,
+        "kanji_passed": plan.kanji_passed,
+        "level_up_at": plan.level_up_at.isoformat() if plan.level_up_at else None,
+        "critical": sum(item["slack_hours"] == 0 for item in ordered),
+        "items": ordered[:limit],
+    }
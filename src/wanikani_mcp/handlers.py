@@ -0,0 +1,790 @@
+"""Tool and resource implementations behind the MCP server.
+
+Imported on the first call rather than at startup: these pull in SQLModel,
+the sync service and its scheduler, which a client spawning the stdio server
+would otherwise wait for before the initialize handshake is answered.
+"""
+
+import json
+import secrets
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from urllib.parse import parse_qsl
+
+from mcp import types
+from mcp.types import AnyUrl
+from sqlmodel import Session, col, func, select
+
+from .auth import create_user_with_api_keys, verify_mcp_api_key
+from .cache import response_cache
+from .catalog import normalize_search_text, subject_catalog
+from .config import settings
+from .database import get_engine, read_session
+from .graph import critical_path, load_progress, subject_graph, unlock_impact
+from .leeches import recent_leech_changes, top_leeches
+from .lessons import MAX_LESSON_ORDER, lesson_order
+from .models import (
+    Assignment,
+    Subject,
+    SubjectType,
+    User,
+)
+from .profiling import profiler
+from .projection import (
+    MAX_PROJECTION_DAYS,
+    load_workload,
+    project_workload,
+)
+from .rollups import MAX_TREND_DAYS, activity_trend
+from .srs import guru_eta, srs_systems
+from .sync_service import sync_service
+from .sync_stats import sync_summary
+from .wanikani_client import WaniKaniClient
+
+
+async def get_user_from_mcp_key(mcp_api_key: str) -> User:
+    # Always the primary: a replica may not have new users or the latest
+    # sync generation yet
+    engine = get_engine()
+    with Session(engine) as session:
+        user = await verify_mcp_api_key(mcp_api_key, session)
+        if not user:
+            raise ValueError("Invalid MCP API key")
+        return user
+
+
+def _add_subject_names(items: list[dict[str, Any]]):
+    """Fill in each item's characters and primary meaning from the catalog"""
+    subjects = subject_catalog.get_many(item["subject_id"] for item in items)
+    for item in items:
+        subject = subjects.get(item["subject_id"])
+        item["characters"] = subject.display if subject else None
+        item["meaning"] = subject.primary_meaning if subject else None
+
+
+def _require_admin(arguments: dict[str, Any]):
+    """Reject the call unless it carries the configured admin API key"""
+    admin_api_key = arguments.get("admin_api_key", "")
+    if not settings.admin_api_key or not secrets.compare_digest(
+        admin_api_key.encode(), settings.admin_api_key.encode()
+    ):
+        raise ValueError("Invalid admin API key")
+
+
+def _seconds_until_next_availability(
+    session: Session, user_id: int | None, now: datetime
+) -> float | None:
+    """Seconds until the user's next assignment becomes available, if any"""
+    next_available_at = session.exec(
+        select(func.min(Assignment.available_at)).where(
+            Assignment.user_id == user_id,
+            Assignment.available_at > now,
+        )
+    ).first()
+    if next_available_at is None:
+        return None
+    if next_available_at.tzinfo is None:
+        next_available_at = next_available_at.replace(tzinfo=UTC)
+    return (next_available_at - now).total_seconds()
+
+
+async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.TextContent]:
+    if name == "register_user":
+        wanikani_api_key = arguments["wanikani_api_key"]
+
+        # Test the API key first
+        client = WaniKaniClient(wanikani_api_key)
+        try:
+            user_data = await client.get_user()
+            username = user_data["data"]["username"]
+            level = user_data["data"]["level"]
+        except Exception as e:
+            await client.close()
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"Invalid WaniKani API key: {str(e)}",
+                )
+            ]
+        finally:
+            await client.close()
+
+        # Create user
+        engine = get_engine()
+        with Session(engine) as session:
+            # Check if user already exists
+            existing_user = session.exec(
+                select(User).where(User.wanikani_api_key == wanikani_api_key)
+            ).first()
+
+            if existing_user:
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=f"User already registered. Your MCP API key is: "
+                        f"{existing_user.mcp_api_key}",
+                    )
+                ]
+
+            user, mcp_api_key = await create_user_with_api_keys(
+                wanikani_api_key, username, level, session
+            )
+
+            return [
+                types.TextContent(
+                    type="text",
+                    text=(
+                        f"Registration successful! Your MCP API key is: "
+                        f"{mcp_api_key}\n\n"
+                        f"Save this key securely - you'll need it for all "
+                        f"operations."
+                    ),
+                )
+            ]
+
+    elif name == "get_status":
+        mcp_api_key = arguments["mcp_api_key"]
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        # Use WaniKani summary endpoint for accurate counts
+        client = WaniKaniClient(user.wanikani_api_key)
+        try:
+            summary_data = await client.get_summary()
+            summary = summary_data.get("data", {})
+
+            # Count current lessons (items available now)
+            lessons = summary.get("lessons", [])
+            lessons_count = 0
+            if lessons:
+                # Get the first lesson batch (current time)
+                current_lessons = lessons[0] if lessons else {}
+                lessons_count = len(current_lessons.get("subject_ids", []))
+
+            # Count current reviews (items available now)
+            reviews = summary.get("reviews", [])
+            reviews_count = 0
+            if reviews:
+                # Get the first review batch (current time)
+                current_reviews = reviews[0] if reviews else {}
+                reviews_count = len(current_reviews.get("subject_ids", []))
+
+            # Get next review time
+            next_reviews_at = summary.get("next_reviews_at")
+            next_review_text = (
+                "No upcoming reviews"
+                if not next_reviews_at
+                else f"Next review at {next_reviews_at}"
+            )
+
+            return [
+                types.TextContent(
+                    type="text",
+                    text=(
+                        f"WaniKani Status for {user.username}:\n"
+                        f"Level: {user.level}\n"
+                        f"Lessons available: {lessons_count}\n"
+                        f"Reviews available: {reviews_count}\n"
+                        f"{next_review_text}"
+                    ),
+                )
+            ]
+        finally:
+            await client.close()
+
+    elif name == "get_leeches":
+        mcp_api_key = arguments["mcp_api_key"]
+        limit = min(max(int(arguments.get("limit", 10)), 1), 100)
+        min_score = float(arguments.get("min_score", settings.leech_score_threshold))
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        subject_catalog.ensure_fresh()
+        cache_args = {
+            "limit": limit,
+            "min_score": min_score,
+            "catalog_version": subject_catalog.version,
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            # Highest scoring leeches, straight off the leech score index.
+            # Leeches on subjects missing from the catalog are skipped, so
+            # read further down the index until `limit` remain
+            fetch = limit
+            while True:
+                rows = top_leeches(session, user.id, min_score, fetch)
+                subjects = subject_catalog.get_many(stat.subject_id for stat in rows)
+                leeches = [stat for stat in rows if stat.subject_id in subjects]
+                if len(leeches) >= limit or len(rows) < fetch:
+                    break
+                fetch *= 2
+        leeches = leeches[:limit]
+
+        if not leeches:
+            leech_text = "No leeches found! You're doing great!"
+        else:
+            leech_text = f"Top {len(leeches)} leeches (items needing practice):\n\n"
+        for stat in leeches:
+            subject = subjects[stat.subject_id]
+            accuracy = stat.percentage_correct
+            total_errors = stat.meaning_incorrect + stat.reading_incorrect
+            meaning_text = subject.primary_meaning or "Unknown"
+
+            leech_text += (
+                f"• {subject.display} ({meaning_text}) - "
+                f"{accuracy}% accuracy, {total_errors} errors, "
+                f"score {stat.leech_score:.1f}\n"
+            )
+
+        response_cache.set(user.id, user.sync_generation, name, cache_args, leech_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=leech_text,
+            )
+        ]
+
+    elif name == "get_leech_changes":
+        mcp_api_key = arguments["mcp_api_key"]
+        limit = arguments.get("limit", 20)
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        if arguments.get("since"):
+            since = datetime.fromisoformat(arguments["since"].replace("Z", "+00:00"))
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=UTC)
+        else:
+            since = datetime.now(UTC) - timedelta(days=arguments.get("days", 7))
+
+        with read_session(user.synced_at) as session:
+            changes = recent_leech_changes(session, user.id, since, limit)
+
+        if not changes:
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"No leech changes since {since.isoformat()}.",
+                )
+            ]
+
+        subjects = subject_catalog.get_many(change.subject_id for change in changes)
+        sections = {True: [], False: []}
+        for change in changes:
+            subject = subjects.get(change.subject_id)
+            label = (
+                f"{subject.display} ({subject.primary_meaning or 'Unknown'})"
+                if subject
+                else f"Subject {change.subject_id}"
+            )
+            sections[change.became_leech].append(
+                f"• {label} - score {change.previous_score:.1f} → "
+                f"{change.leech_score:.1f}"
+            )
+
+        changes_text = f"Leech changes since {since.isoformat()}:\n"
+        if sections[True]:
+            changes_text += "\nNew leeches:\n" + "\n".join(sections[True]) + "\n"
+        if sections[False]:
+            changes_text += "\nNo longer leeches:\n" + "\n".join(sections[False]) + "\n"
+
+        return [
+            types.TextContent(
+                type="text",
+                text=changes_text,
+            )
+        ]
+
+    elif name == "get_activity_trend":
+        mcp_api_key = arguments["mcp_api_key"]
+        days = min(max(int(arguments.get("days", 30)), 1), MAX_TREND_DAYS)
+        subject_type = (
+            SubjectType(arguments["subject_type"])
+            if arguments.get("subject_type")
+            else None
+        )
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        # Days are UTC, as the rollups are
+        today = datetime.now(UTC).date()
+        cache_args = {
+            "days": days,
+            "subject_type": subject_type.value if subject_type else None,
+            "today": today.isoformat(),
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            trend = activity_trend(session, user.id, days, today, subject_type)
+
+        trend_text = json.dumps(trend, indent=2)
+        response_cache.set(user.id, user.sync_generation, name, cache_args, trend_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=trend_text,
+            )
+        ]
+
+    elif name == "project_workload":
+        mcp_api_key = arguments["mcp_api_key"]
+        days = min(max(int(arguments.get("days", 28)), 1), MAX_PROJECTION_DAYS)
+        lessons_per_day = max(int(arguments.get("lessons_per_day", 0)), 0)
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        # Projections start from the current hour
+        now = datetime.now(UTC)
+        cache_args = {
+            "days": days,
+            "lessons_per_day": lessons_per_day,
+            "hour": now.strftime("%Y-%m-%dT%H"),
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            workload = load_workload(session, user.id, now)
+
+        projection = project_workload(
+            workload, srs_systems.all(), now, days, lessons_per_day
+        )
+        projection_text = json.dumps(projection, indent=2)
+        response_cache.set(
+            user.id, user.sync_generation, name, cache_args, projection_text
+        )
+
+        return [
+            types.TextContent(
+                type="text",
+                text=projection_text,
+            )
+        ]
+
+    elif name == "get_guru_eta":
+        mcp_api_key = arguments["mcp_api_key"]
+        user = await get_user_from_mcp_key(mcp_api_key)
+        level = int(arguments.get("level") or user.level)
+        subject_type = (
+            SubjectType(arguments["subject_type"])
+            if arguments.get("subject_type")
+            else None
+        )
+
+        # Estimates are whole hours, like WaniKani's review times
+        now = datetime.now(UTC)
+        subject_catalog.ensure_fresh()
+        cache_args = {
+            "level": level,
+            "subject_type": subject_type.value if subject_type else None,
+            "hour": now.strftime("%Y-%m-%dT%H"),
+            "catalog_version": subject_catalog.version,
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            eta = guru_eta(session, user.id, level, now, subject_type)
+
+        _add_subject_names(eta["items"])
+        eta_text = json.dumps(eta, indent=2)
+        response_cache.set(user.id, user.sync_generation, name, cache_args, eta_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=eta_text,
+            )
+        ]
+
+    elif name == "get_unlock_impact":
+        mcp_api_key = arguments["mcp_api_key"]
+        subject_id = arguments.get("subject_id")
+        limit = min(max(int(arguments.get("limit", 10)), 1), 100)
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        graph = subject_graph.get()
+        subject_catalog.ensure_fresh()
+        cache_args = {
+            "subject_id": subject_id,
+            "limit": limit,
+            "graph_version": subject_graph.version,
+            "catalog_version": subject_catalog.version,
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            progress = load_progress(session, user.id, graph)
+
+        impact = unlock_impact(
+            graph, progress, int(subject_id) if subject_id else None, limit
+        )
+        if subject_id:
+            _add_subject_names([impact, *impact["unlocks"]])
+        else:
+            _add_subject_names(impact["items"])
+        impact_text = json.dumps(impact, indent=2)
+        response_cache.set(user.id, user.sync_generation, name, cache_args, impact_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=impact_text,
+            )
+        ]
+
+    elif name == "get_critical_path":
+        mcp_api_key = arguments["mcp_api_key"]
+        limit = min(max(int(arguments.get("limit", 20)), 1), 100)
+        user = await get_user_from_mcp_key(mcp_api_key)
+        level = int(arguments.get("level") or user.level)
+
+        now = datetime.now(UTC)
+        graph = subject_graph.get()
+        subject_catalog.ensure_fresh()
+        cache_args = {
+            "level": level,
+            "limit": limit,
+            "hour": now.strftime("%Y-%m-%dT%H"),
+            "graph_version": subject_graph.version,
+            "catalog_version": subject_catalog.version,
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            path = critical_path(
+                session, user.id, level, now, graph, srs_systems.all(), limit
+            )
+
+        _add_subject_names(path["items"])
+        path_text = json.dumps(path, indent=2)
+        response_cache.set(user.id, user.sync_generation, name, cache_args, path_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=path_text,
+            )
+        ]
+
+    elif name == "get_lesson_order":
+        mcp_api_key = arguments["mcp_api_key"]
+        limit = min(max(int(arguments.get("limit", 20)), 1), MAX_LESSON_ORDER)
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        graph = subject_graph.get()
+        subject_catalog.ensure_fresh()
+        cache_args = {
+            "level": user.level,
+            "limit": limit,
+            "graph_version": subject_graph.version,
+            "catalog_version": subject_catalog.version,
+        }
+        cached = response_cache.get(user.id, user.sync_generation, name, cache_args)
+        if cached is not None:
+            return [types.TextContent(type="text", text=cached)]
+
+        with read_session(user.synced_at) as session:
+            order = lesson_order(
+                session,
+                user.id,
+                user.level,
+                datetime.now(UTC),
+                graph,
+                srs_systems.all(),
+                limit,
+            )
+
+        _add_subject_names(order["lessons"])
+        order_text = json.dumps(order, indent=2)
+        response_cache.set(user.id, user.sync_generation, name, cache_args, order_text)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=order_text,
+            )
+        ]
+
+    elif name == "get_sync_stats":
+        _require_admin(arguments)
+        since = datetime.now(UTC) - timedelta(hours=arguments.get("hours", 24))
+
+        # A few seconds of replica lag are fine for operator statistics
+        with read_session() as session:
+            summary = sync_summary(session, since)
+
+        return [
+            types.TextContent(
+                type="text",
+                text=json.dumps(summary, indent=2),
+            )
+        ]
+
+    elif name == "configure_profiling":
+        _require_admin(arguments)
+        profiler.configure(
+            mode=arguments.get("mode"),
+            sample_rate=arguments.get("sample_rate"),
+            targets=arguments.get("targets"),
+            user_ids=arguments.get("user_ids"),
+        )
+
+        return [
+            types.TextContent(
+                type="text",
+                text=json.dumps(profiler.config(), indent=2),
+            )
+        ]
+
+    elif name == "sync_data":
+        mcp_api_key = arguments["mcp_api_key"]
+        user = await get_user_from_mcp_key(mcp_api_key)
+
+        # Joins a sync already running for this user, and reuses one that
+        # finished within the cooldown, instead of fetching everything again
+        result = await sync_service.sync_user(
+            user,
+            cooldown_seconds=settings.manual_sync_cooldown_seconds,
+            max_wait_seconds=settings.manual_sync_max_wait_seconds,
+        )
+
+        if result.shared:
+            completed_at = (
+                result.completed_at.isoformat() if result.completed_at else "just now"
+            )
+            sync_text = (
+                f"Data is up to date: a sync completed at {completed_at} and "
+                f"updated {result.records_updated} records."
+            )
+        else:
+            sync_text = (
+                f"Data sync completed! Updated {result.records_updated} records "
+                f"including subjects, assignments, and review statistics."
+            )
+
+        return [
+            types.TextContent(
+                type="text",
+                text=sync_text,
+            )
+        ]
+
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+
+
+async def read_resource(uri: AnyUrl | str) -> str:
+    try:
+        # Parse the URI to extract the resource type and MCP API key
+        # Expected format: wanikani://resource_type?mcp_api_key=key
+        # (the MCP transports pass an AnyUrl rather than a plain string)
+        uri = str(uri)
+        if not uri.startswith("wanikani://"):
+            raise ValueError("Invalid resource URI")
+
+        parts = uri.replace("wanikani://", "").split("?")
+        resource_type = parts[0]
+
+        # Extract MCP API key from query parameters
+        query_params: dict[str, str] = {}
+        if len(parts) > 1:
+            query_params = dict(parse_qsl(parts[1]))
+        mcp_api_key = query_params.get("mcp_api_key")
+
+        if not mcp_api_key:
+            return '{"error": "MCP API key required in query parameters"}'
+
+        # Validate user
+        try:
+            user = await get_user_from_mcp_key(mcp_api_key)
+        except ValueError:
+            return '{"error": "Invalid MCP API key"}'
+
+        search = normalize_search_text(query_params.get("search", ""))
+
+        subject_catalog.ensure_fresh()
+        cache_args = {"catalog_version": subject_catalog.version, "search": search}
+        cached = response_cache.get(
+            user.id, user.sync_generation, resource_type, cache_args
+        )
+        if cached is not None:
+            return cached
+
+        if resource_type == "user_progress":
+            with read_session(user.synced_at) as session:
+                now = datetime.now(UTC)
+
+                # Get current lesson and review counts
+                lessons_count = len(
+                    session.exec(
+                        select(Assignment).where(
+                            Assignment.user_id == user.id,
+                            Assignment.srs_stage == 0,
+                            Assignment.available_at <= now,
+                        )
+                    ).all()
+                )
+
+                reviews_count = len(
+                    session.exec(
+                        select(Assignment).where(
+                            Assignment.user_id == user.id,
+                            Assignment.srs_stage > 0,
+                            Assignment.available_at <= now,
+                        )
+                    ).all()
+                )
+
+                next_review = session.exec(
+                    select(Assignment)
+                    .where(
+                        Assignment.user_id == user.id,
+                        Assignment.srs_stage > 0,
+                        Assignment.available_at > now,
+                    )
+                    .order_by(Assignment.available_at)
+                ).first()
+
+                response = json.dumps(
+                    {
+                        "user_id": user.id,
+                        "username": user.username,
+                        "level": user.level,
+                        "lessons_available": lessons_count,
+                        "reviews_available": reviews_count,
+                        "next_review_time": next_review.available_at.isoformat()
+                        if next_review and next_review.available_at
+                        else None,
+                        "last_sync": user.last_sync.isoformat()
+                        if user.last_sync
+                        else None,
+                        "subscription_active": user.subscription_active,
+                    }
+                )
+
+                # Counts change as soon as the next assignment becomes available
+                response_cache.set(
+                    user.id,
+                    user.sync_generation,
+                    resource_type,
+                    cache_args,
+                    response,
+                    expires_in=_seconds_until_next_availability(session, user.id, now),
+                )
+                return response
+
+        elif resource_type == "review_forecast":
+            with read_session(user.synced_at) as session:
+                now = datetime.now(UTC)
+
+                # Get upcoming reviews grouped by hour
+                upcoming_assignments = session.exec(
+                    select(Assignment)
+                    .where(
+                        Assignment.user_id == user.id,
+                        Assignment.srs_stage > 0,
+                        Assignment.available_at > now,
+                    )
+                    .order_by(Assignment.available_at)
+                ).all()
+
+                # Group by hour
+                forecast: dict[str, int] = {}
+                for assignment in upcoming_assignments:
+                    if assignment.available_at:
+                        hour_key = assignment.available_at.replace(
+                            minute=0, second=0, microsecond=0
+                        )
+                        hour_str = hour_key.isoformat()
+                        forecast[hour_str] = forecast.get(hour_str, 0) + 1
+
+                forecast_list = [
+                    {"time": time, "count": count}
+                    for time, count in sorted(forecast.items())
+                ]
+
+                response = json.dumps(
+                    {
+                        "user_id": user.id,
+                        "forecast": forecast_list[:24],  # Next 24 hours
+                    }
+                )
+
+                response_cache.set(
+                    user.id,
+                    user.sync_generation,
+                    resource_type,
+                    cache_args,
+                    response,
+                    expires_in=_seconds_until_next_availability(session, user.id, now),
+                )
+                return response
+
+        elif resource_type == "item_database":
+            with read_session(user.synced_at) as session:
+                # Get user's assignments, enriched with subjects from the catalog
+                statement = select(Assignment).where(Assignment.user_id == user.id)
+                if search:
+                    # Escaped, so "%" and "_" in the query match themselves
+                    statement = statement.join(Subject).where(
+                        col(Subject.search_key).contains(search, autoescape=True)
+                    )
+                assignments = session.exec(statement).all()
+
+            subjects = subject_catalog.get_many(
+                assignment.subject_id for assignment in assignments
+            )
+            subjects_with_assignments = sorted(
+                (
+                    (subjects[assignment.subject_id], assignment)
+                    for assignment in assignments
+                    if assignment.subject_id in subjects
+                ),
+                key=lambda pair: (pair[0].level, pair[0].id),
+            )
+
+            items = []
+            for subject, assignment in subjects_with_assignments:
+                items.append(
+                    {
+                        "id": subject.id,
+                        "characters": subject.characters,
+                        "slug": subject.slug,
+                        "meaning": subject.primary_meaning or "Unknown",
+                        "level": subject.level,
+                        "type": subject.object_type,
+                        "srs_stage": assignment.srs_stage,
+                        "available_at": assignment.available_at.isoformat()
+                        if assignment.available_at
+                        else None,
+                    }
+                )
+
+            response = json.dumps(
+                {
+                    "user_id": user.id,
+                    "total_items": len(items),
+                    "items": items,
+                }
+            )
+
+            response_cache.set(
+                user.id, user.sync_generation, resource_type, cache_args, response
+            )
+            return response
+
+        else:
+            return '{"error": "Unknown resource type"}'
+
+    except Exception as e:
+        return json.dumps({"error": f"Resource error: {str(e)}"})
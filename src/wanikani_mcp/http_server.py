@@ -0,0 +1,79 @@
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.types import Receive, Scope, Send
+
+from .catalog import subject_catalog
+from .config import settings
+from .database import ensure_schema
+from .graph import subject_graph
+from .mcp_server import server
+from .metrics import CONTENT_TYPE, registry
+from .sync_service import sync_service
+
+logger = logging.getLogger(__name__)
+
+
+class MCPEndpoint:
+    """ASGI endpoint handing requests to the streamable HTTP session manager"""
+
+    def __init__(self, session_manager: StreamableHTTPSessionManager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+def add_monitoring_routes(app: FastAPI):
+    """Serve /health and the Prometheus /metrics endpoint"""
+
+    @app.get("/health")
+    async def health() -> dict[str, str | bool]:
+        return {"status": "ok", "sync_running": sync_service.is_running}
+
+    @app.get("/metrics")
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+def create_metrics_app() -> FastAPI:
+    """Create the monitoring-only app for processes that serve no HTTP MCP"""
+    app = FastAPI(title="WaniKani MCP Metrics")
+    add_monitoring_routes(app)
+    return app
+
+
+def create_app() -> FastAPI:
+    """Create the HTTP app serving MCP over streamable HTTP at /mcp.
+
+    Sessions are stateless: every request carries everything needed to
+    answer it, so any worker process can serve any client. The background
+    sync only runs here when SYNC_ENABLED is true; multi-worker deployments
+    disable it in the workers and run it in a single separate process.
+    """
+    session_manager = StreamableHTTPSessionManager(app=server, stateless=True)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        ensure_schema()
+        subject_catalog.load()
+        subject_graph.load()
+        if settings.sync_enabled:
+            await sync_service.start()
+        try:
+            async with session_manager.run():
+                logger.info("HTTP MCP server ready")
+                yield
+        finally:
+            await sync_service.stop()
+
+    app = FastAPI(title="WaniKani MCP Server", lifespan=lifespan)
+    add_monitoring_routes(app)
+    app.add_route(
+        "/mcp", MCPEndpoint(session_manager), methods=["GET", "POST", "DELETE"]
+    )
+
+    return app
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from sqlmodel import Session, col, select
+
+from .models import LeechChange, ReviewStatistic
+
+# Exponent applied to the current streak; a long streak means the item has
+# recovered, so its past mistakes count for much less
+STREAK_EXPONENT = 1.5
+
+
+def leech_score(
+    meaning_incorrect: int,
+    reading_incorrect: int,
+    meaning_current_streak: int,
+    reading_current_streak: int,
+) -> float:
+    """Score how much of a leech an item is: incorrect / streak ** 1.5.
+
+    The streak is the weaker of the meaning and reading streaks. Radicals have
+    no reading, and WaniKani reports their reading streak as 1, so the meaning
+    streak decides for them.
+    """
+    incorrect = meaning_incorrect + reading_incorrect
+    if incorrect == 0:
+        return 0.0
+    streak = max(min(meaning_current_streak, reading_current_streak), 1)
+    return round(incorrect / streak**STREAK_EXPONENT, 4)
+
+
+def top_leeches(
+    session: Session, user_id: int | None, min_score: float, limit: int
+) -> list[ReviewStatistic]:
+    """Return the user's highest scoring leeches.
+
+    Served by the (user_id, leech_score) index as a range scan that stops
+    after `limit` rows.
+    """
+    return list(
+        session.exec(
+            select(ReviewStatistic)
+            .where(
+                ReviewStatistic.user_id == user_id,
+                ReviewStatistic.leech_score >= min_score,
+            )
+            .order_by(col(ReviewStatistic.leech_score).desc())
+            .limit(limit)
+        ).all()
+    )
+
+
+def leech_change(
+    user_id: int,
+    subject_id: int,
+    previous_score: float,
+    score: float,
+    threshold: float,
+    sync_log_id: int | None = None,
+) -> LeechChange | None:
+    """Build a change record if the score crossed the leech threshold"""
+    was_leech = previous_score >= threshold
+    is_leech = score >= threshold
+    if was_leech == is_leech:
+        return None
+    return LeechChange(
+        user_id=user_id,
+        subject_id=subject_id,
+        sync_log_id=sync_log_id,
+        became_leech=is_leech,
+        previous_score=previous_score,
+        leech_score=score,
+    )
+
+
+def recent_leech_changes(
+    session: Session, user_id: int | None, since: datetime, limit: int
+) -> list[LeechChange]:
+    """Return the net change per subject since the given time, newest first.
+
+    Reads only the user's change rows in the window through the
+    (user_id, created_at) index, so the cost follows the size of the change
+    set rather than the user's statistics. Subjects that crossed the threshold
+    and then returned to where they started are left out.
+    """
+    changes = session.exec(
+        select(LeechChange)
+        .where(LeechChange.user_id == user_id, LeechChange.created_at >= since)
+        .order_by(col(LeechChange.created_at).desc(), col(LeechChange.id).desc())
+    ).all()
+
+    latest: dict[int, LeechChange] = {}
+    earliest: dict[int, LeechChange] = {}
+    for change in changes:
+        latest.setdefault(change.subject_id, change)
+        earliest[change.subject_id] = change
+
+    net_changes = [
+        change
+        for subject_id, change in latest.items()
+        if change.became_leech != (not earliest[subject_id].became_leech)
+    ]
+    return net_changes[:limit]
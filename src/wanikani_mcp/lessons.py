@@ -0,0 +1,94 @@
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from sqlmodel import Session
+
+from .graph import (
+    SUBJECT_TYPES,
+    SubjectGraph,
+    UnlockEdges,
+    level_plan,
+    load_progress,
+)
+from .srs import SrsSchedule
+
+MAX_LESSON_ORDER = 100
+
+
+def lesson_order(
+    session: Session,
+    user_id: int | None,
+    level: int,
+    now: datetime,
+    graph: SubjectGraph,
+    systems: Mapping[int, SrsSchedule],
+    limit: int = 20,
+) -> dict[str, Any]:
+    """Order the user's available lessons to pass `level` soonest.
+
+    Lessons the level-up waits on come first, least slack first: radicals
+    holding back the level's kanji, and the kanji themselves. Then lessons
+    that unlock the most locked subjects on passing, then those holding the
+    most back, then the rest by level and type as WaniKani offers them.
+    Scoring is a few passes over the graph's arrays plus the level's plan,
+    so its cost is bounded by the subject count rather than the level.
+    """
+    progress = load_progress(session, user_id, graph)
+    lessons = np.flatnonzero(
+        progress.unlocked & (progress.srs_stage == 0) & ~progress.passed & ~graph.hidden
+    )
+    plan = level_plan(session, user_id, level, now, graph, systems)
+    unlocks_now, holding = UnlockEdges.of(graph, progress).counts()
+
+    slack = np.array(
+        [
+            plan.items[index]["slack_hours"] if index in plan.items else np.inf
+            for index in lessons
+        ]
+    )
+    order = lessons[
+        np.lexsort(
+            (
+                graph.ids[lessons],
+                graph.types[lessons],
+                graph.levels[lessons],
+                -holding[lessons],
+                -unlocks_now[lessons],
+                slack,
+            )
+        )
+    ]
+
+    items = []
+    for index in order[:limit]:
+        if index in plan.items:
+            reason = "level_up"
+        elif holding[index]:
+            reason = "unlocks"
+        else:
+            reason = "other"
+        items.append(
+            {
+                "subject_id": int(graph.ids[index]),
+                "subject_type": SUBJECT_TYPES[graph.types[index]].value,
+                "level": int(graph.levels[index]),
+                "reason": reason,
+                "slack_hours": plan.items[index]["slack_hours"]
+                if index in plan.items
+                else None,
+                "unlocks_on_pass": int(unlocks_now[index]),
+                "holds_back": int(holding[index]),
+            }
+        )
+    return {
+        "level": level,
+        "as_of": now.isoformat(),
+        "lessons_available": len(lessons),
+        "kanji_required": plan.kanji_required,
+        "kanji_passed": plan.kanji_passed,
+        # With the level_up lessons done now and every answer right
+        "level_up_at": plan.level_up_at.isoformat() if plan.level_up_at else None,
+        "lessons": items,
+    }
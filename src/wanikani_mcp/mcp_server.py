@@ -1,550 +1,505 @@
 import asyncio
-import json
-from datetime import UTC, datetime
+import logging
+from collections.abc import Awaitable, Callable
 from typing import Any
+from urllib.parse import parse_qsl
 
 from mcp import types
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import AnyUrl
-from sqlmodel import Session, select
-
-from .auth import create_user_with_api_keys, verify_mcp_api_key
-from .database import get_engine
-from .models import (
-    Assignment,
-    ReviewStatistic,
-    Subject,
-    SyncLog,
-    SyncStatus,
-    SyncType,
-    User,
+
+from .config import settings
+from .metrics import (
+    RESOURCE_DURATION,
+    RESOURCE_ERRORS,
+    RESOURCE_READS,
+    TOOL_CALLS,
+    TOOL_DURATION,
+    TOOL_ERRORS,
 )
-from .sync_service import sync_service
-from .wanikani_client import WaniKaniClient
+from .profiling import PROFILING_MODES, profiler
+
+logger = logging.getLogger(__name__)
 
 # Create MCP server
 server = Server("wanikani-mcp")
 
 
-@server.list_tools()
-async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="register_user",
-            description=(
-                "Register a new user with their WaniKani API key to get MCP key"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "wanikani_api_key": {
-                        "type": "string",
-                        "description": "Your WaniKani API key (get it from https://www.wanikani.com/settings/personal_access_tokens)",
-                    }
+class DeferredStartup:
+    """Setup the stdio server runs after the initialize handshake.
+
+    Clients spawn the stdio server per session and wait for the handshake,
+    so schema checks, the catalog and the sync scheduler start once the
+    client is initialized. Tool calls and resource reads wait for them.
+    """
+
+    def __init__(self):
+        self.work: Callable[[], Awaitable[None]] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def begin(self):
+        if self.work is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(self.work))
+
+    async def wait(self):
+        # Also covers a call that arrives before the initialized notification
+        self.begin()
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    @staticmethod
+    async def _run(work: Callable[[], Awaitable[None]]):
+        try:
+            await work()
+        except Exception:
+            # Calls go ahead and report their own errors
+            logger.exception("Deferred startup failed")
+
+
+startup = DeferredStartup()
+
+
+TOOLS = [
+    types.Tool(
+        name="register_user",
+        description="Register a new user with their WaniKani API key to get MCP key",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "wanikani_api_key": {
+                    "type": "string",
+                    "description": "Your WaniKani API key (get it from https://www.wanikani.com/settings/personal_access_tokens)",
+                }
+            },
+            "required": ["wanikani_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_status",
+        description="Get current WaniKani status including lessons, reviews, level",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                }
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_leeches",
+        description="Get problematic items that need extra practice",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of leeches to return",
+                    "default": 10,
+                },
+                "min_score": {
+                    "type": "number",
+                    "description": (
+                        "Minimum leech score (incorrect answers divided by "
+                        "current streak^1.5)"
+                    ),
+                    "default": settings.leech_score_threshold,
+                },
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_leech_changes",
+        description=(
+            "Get items that became leeches or stopped being leeches in recent syncs"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "since": {
+                    "type": "string",
+                    "description": (
+                        "ISO 8601 timestamp to report changes after (overrides days)"
+                    ),
+                },
+                "days": {
+                    "type": "integer",
+                    "description": "Number of days of changes to report",
+                    "default": 7,
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of changes to return",
+                    "default": 20,
                 },
-                "required": ["wanikani_api_key"],
             },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_activity_trend",
+        description=(
+            "Get daily review counts, accuracy, and items passed and burned "
+            "over recent days (UTC), as JSON"
         ),
-        types.Tool(
-            name="get_status",
-            description="Get current WaniKani status including lessons, reviews, level",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "mcp_api_key": {
-                        "type": "string",
-                        "description": "Your MCP API key from registration",
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "days": {
+                    "type": "integer",
+                    "description": "Number of days to report, up to 365",
+                    "default": 30,
+                },
+                "subject_type": {
+                    "type": "string",
+                    "enum": ["radical", "kanji", "vocabulary", "kana_vocabulary"],
+                    "description": "Only count this type of subject",
                 },
-                "required": ["mcp_api_key"],
             },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="project_workload",
+        description=(
+            "Project expected daily reviews over the coming days, given "
+            "a number of lessons per day and each item's accuracy, as JSON"
         ),
-        types.Tool(
-            name="get_leeches",
-            description="Get problematic items that need extra practice",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "mcp_api_key": {
-                        "type": "string",
-                        "description": "Your MCP API key from registration",
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Maximum number of leeches to return",
-                        "default": 10,
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "lessons_per_day": {
+                    "type": "integer",
+                    "description": "New lessons to do each day",
+                    "default": 0,
+                },
+                "days": {
+                    "type": "integer",
+                    "description": "Number of days to project, up to 90",
+                    "default": 28,
                 },
-                "required": ["mcp_api_key"],
             },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_guru_eta",
+        description=(
+            "Estimate the earliest time each item of a level can reach "
+            "Guru, and when the level can be passed, as JSON"
         ),
-        types.Tool(
-            name="sync_data",
-            description="Manually trigger synchronization with WaniKani API",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "mcp_api_key": {
-                        "type": "string",
-                        "description": "Your MCP API key from registration",
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "level": {
+                    "type": "integer",
+                    "description": "Level to estimate (defaults to yours)",
+                },
+                "subject_type": {
+                    "type": "string",
+                    "enum": ["radical", "kanji", "vocabulary", "kana_vocabulary"],
+                    "description": "Only include this type of subject",
                 },
-                "required": ["mcp_api_key"],
             },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_unlock_impact",
+        description=(
+            "Get what passing an item unlocks, or rank your unpassed items "
+            "by how many locked subjects they would unlock, as JSON"
         ),
-    ]
-
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "subject_id": {
+                    "type": "integer",
+                    "description": "Subject to analyse (omit to rank your items)",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of items to rank",
+                    "default": 10,
+                },
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_critical_path",
+        description=(
+            "Get the kanji and components that decide how soon a level "
+            "can be passed, with how long each can slip, as JSON"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "level": {
+                    "type": "integer",
+                    "description": "Level to analyse (defaults to yours)",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of items to return",
+                    "default": 20,
+                },
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_lesson_order",
+        description=(
+            "Get your available lessons in the order that passes your "
+            "current level soonest, with why each is placed there, as JSON"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of lessons to return, up to 100",
+                    "default": 20,
+                },
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+    types.Tool(
+        name="get_sync_stats",
+        description=(
+            "Admin: p50/p95 sync duration, throughput and per-collection "
+            "phase timings across all users"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "admin_api_key": {
+                    "type": "string",
+                    "description": "The server's ADMIN_API_KEY",
+                },
+                "hours": {
+                    "type": "integer",
+                    "description": "Number of hours of syncs to summarise",
+                    "default": 24,
+                },
+            },
+            "required": ["admin_api_key"],
+        },
+    ),
+    types.Tool(
+        name="configure_profiling",
+        description=(
+            "Admin: turn cProfile or tracemalloc capture on or off for tool "
+            "calls, resource reads and syncs in this server process"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "admin_api_key": {
+                    "type": "string",
+                    "description": "The server's ADMIN_API_KEY",
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": list(PROFILING_MODES),
+                    "description": "Profiler to use, or off",
+                },
+                "sample_rate": {
+                    "type": "number",
+                    "description": "Fraction of matching calls to profile",
+                },
+                "targets": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": (
+                        "Tool names, resource types or 'sync' to profile "
+                        "(empty for all)"
+                    ),
+                },
+                "user_ids": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "Users to profile (empty for all)",
+                },
+            },
+            "required": ["admin_api_key"],
+        },
+    ),
+    types.Tool(
+        name="sync_data",
+        description="Manually trigger synchronization with WaniKani API",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "mcp_api_key": {
+                    "type": "string",
+                    "description": "Your MCP API key from registration",
+                }
+            },
+            "required": ["mcp_api_key"],
+        },
+    ),
+]
+# Metric labels: unknown names share one label so clients cannot grow the
+# metric series
+TOOL_NAMES = frozenset(tool.name for tool in TOOLS)
 
-async def _get_user_from_mcp_key(mcp_api_key: str) -> User:
-    engine = get_engine()
-    with Session(engine) as session:
-        user = await verify_mcp_api_key(mcp_api_key, session)
-        if not user:
-            raise ValueError("Invalid MCP API key")
-        return user
 
+@server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    return list(TOOLS)
 
-async def _sync_user_data(user: User) -> int:
-    """Sync data for a user and return number of records updated"""
-    engine = get_engine()
 
-    # Create sync log
-    with Session(engine) as session:
-        sync_log = SyncLog(
-            user_id=user.id,
-            sync_type=SyncType.MANUAL,
-            status=SyncStatus.IN_PROGRESS,
-            started_at=datetime.now(UTC),
-        )
-        session.add(sync_log)
-        session.commit()
-        session.refresh(sync_log)
+async def _profiled_user_id(arguments: dict[str, Any]) -> int | None:
+    """Resolve the caller's user id, but only when profiling filters by user"""
+    mcp_api_key = arguments.get("mcp_api_key")
+    if not (profiler.enabled and profiler.user_ids and mcp_api_key):
+        return None
+    from .handlers import get_user_from_mcp_key
 
     try:
-        client = WaniKaniClient(user.wanikani_api_key)
-        records_updated = 0
-
-        # Get user info and update profile
-        user_data = await client.get_user()
-        with Session(engine) as session:
-            db_user = session.get(User, user.id)
-            if db_user:
-                db_user.username = user_data["data"]["username"]
-                db_user.level = user_data["data"]["level"]
-                db_user.last_sync = datetime.now(UTC)
-                session.add(db_user)
-                session.commit()
-                records_updated += 1
-
-        # For now, just update user info
-        # TODO: Implement full sync of subjects, assignments, reviews, etc.
-
-        await client.close()
-
-        # Update sync log
-        with Session(engine) as session:
-            db_sync_log = session.get(SyncLog, sync_log.id)
-            if db_sync_log:
-                db_sync_log.status = SyncStatus.SUCCESS
-                db_sync_log.records_updated = records_updated
-                db_sync_log.completed_at = datetime.now(UTC)
-                session.add(db_sync_log)
-                session.commit()
-
-        return records_updated
-
-    except Exception as e:
-        # Update sync log with error
-        with Session(engine) as session:
-            db_sync_log = session.get(SyncLog, sync_log.id)
-            if db_sync_log:
-                db_sync_log.status = SyncStatus.ERROR
-                db_sync_log.error_message = str(e)
-                db_sync_log.completed_at = datetime.now(UTC)
-                session.add(db_sync_log)
-                session.commit()
-        raise
+        user = await get_user_from_mcp_key(mcp_api_key)
+    except ValueError:
+        return None
+    return user.id
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.TextContent]:
-    try:
-        if name == "register_user":
-            wanikani_api_key = arguments["wanikani_api_key"]
-
-            # Test the API key first
-            client = WaniKaniClient(wanikani_api_key)
-            try:
-                user_data = await client.get_user()
-                username = user_data["data"]["username"]
-                level = user_data["data"]["level"]
-            except Exception as e:
-                await client.close()
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=f"Invalid WaniKani API key: {str(e)}",
-                    )
-                ]
-            finally:
-                await client.close()
-
-            # Create user
-            engine = get_engine()
-            with Session(engine) as session:
-                # Check if user already exists
-                existing_user = session.exec(
-                    select(User).where(User.wanikani_api_key == wanikani_api_key)
-                ).first()
-
-                if existing_user:
-                    return [
-                        types.TextContent(
-                            type="text",
-                            text=f"User already registered. Your MCP API key is: "
-                            f"{existing_user.mcp_api_key}",
-                        )
-                    ]
-
-                user, mcp_api_key = await create_user_with_api_keys(
-                    wanikani_api_key, username, level, session
-                )
+    tool = name if name in TOOL_NAMES else "unknown"
+    TOOL_CALLS.inc(tool=tool)
+    user_id = await _profiled_user_id(arguments)
+    with (
+        TOOL_DURATION.time(tool=tool),
+        profiler.profile("tool", tool, user_id),
+    ):
+        try:
+            await startup.wait()
+            from . import handlers
 
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=(
-                            f"Registration successful! Your MCP API key is: "
-                            f"{mcp_api_key}\n\n"
-                            f"Save this key securely - you'll need it for all "
-                            f"operations."
-                        ),
-                    )
-                ]
-
-        elif name == "get_status":
-            mcp_api_key = arguments["mcp_api_key"]
-            user = await _get_user_from_mcp_key(mcp_api_key)
-
-            # Use WaniKani summary endpoint for accurate counts
-            client = WaniKaniClient(user.wanikani_api_key)
-            try:
-                summary_data = await client.get_summary()
-                summary = summary_data.get("data", {})
-
-                # Count current lessons (items available now)
-                lessons = summary.get("lessons", [])
-                lessons_count = 0
-                if lessons:
-                    # Get the first lesson batch (current time)
-                    current_lessons = lessons[0] if lessons else {}
-                    lessons_count = len(current_lessons.get("subject_ids", []))
-
-                # Count current reviews (items available now)
-                reviews = summary.get("reviews", [])
-                reviews_count = 0
-                if reviews:
-                    # Get the first review batch (current time)
-                    current_reviews = reviews[0] if reviews else {}
-                    reviews_count = len(current_reviews.get("subject_ids", []))
-
-                # Get next review time
-                next_reviews_at = summary.get("next_reviews_at")
-                next_review_text = (
-                    "No upcoming reviews"
-                    if not next_reviews_at
-                    else f"Next review at {next_reviews_at}"
+            return await handlers.call_tool(name, arguments)
+        except ValueError as e:
+            TOOL_ERRORS.inc(tool=tool)
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"Error: {str(e)}",
                 )
-
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=(
-                            f"WaniKani Status for {user.username}:\n"
-                            f"Level: {user.level}\n"
-                            f"Lessons available: {lessons_count}\n"
-                            f"Reviews available: {reviews_count}\n"
-                            f"{next_review_text}"
-                        ),
-                    )
-                ]
-            finally:
-                await client.close()
-
-        elif name == "get_leeches":
-            mcp_api_key = arguments["mcp_api_key"]
-            limit = arguments.get("limit", 10)
-            user = await _get_user_from_mcp_key(mcp_api_key)
-
-            engine = get_engine()
-            with Session(engine) as session:
-                # Find items with low accuracy rates (leeches)
-                leeches = session.exec(
-                    select(ReviewStatistic, Subject)
-                    .join(Subject)
-                    .where(
-                        ReviewStatistic.user_id == user.id,
-                        ReviewStatistic.percentage_correct < 70,
-                        ReviewStatistic.meaning_incorrect
-                        + ReviewStatistic.reading_incorrect
-                        > 3,
-                    )
-                    .order_by(ReviewStatistic.percentage_correct)
-                    .limit(limit)
-                ).all()
-
-                if not leeches:
-                    return [
-                        types.TextContent(
-                            type="text",
-                            text="No leeches found! You're doing great!",
-                        )
-                    ]
-
-                leech_text = f"Top {len(leeches)} leeches (items needing practice):\n\n"
-                for stat, subject in leeches:
-                    accuracy = stat.percentage_correct
-                    total_errors = stat.meaning_incorrect + stat.reading_incorrect
-                    meanings = [
-                        m["meaning"] for m in subject.meanings if m.get("primary")
-                    ]
-                    meaning_text = meanings[0] if meanings else "Unknown"
-
-                    leech_text += (
-                        f"• {subject.characters or subject.slug} ({meaning_text}) - "
-                        f"{accuracy}% accuracy, {total_errors} errors\n"
-                    )
-
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=leech_text,
-                    )
-                ]
-
-        elif name == "sync_data":
-            mcp_api_key = arguments["mcp_api_key"]
-            user = await _get_user_from_mcp_key(mcp_api_key)
-
-            # Use the enhanced sync service
-            records_updated = await sync_service._sync_user_data(user)
-
+            ]
+        except Exception as e:
+            TOOL_ERRORS.inc(tool=tool)
             return [
                 types.TextContent(
                     type="text",
-                    text=(
-                        f"Data sync completed! Updated {records_updated} records "
-                        f"including subjects, assignments, and review statistics."
-                    ),
+                    text=f"Unexpected error: {str(e)}",
                 )
             ]
 
-        else:
-            raise ValueError(f"Unknown tool: {name}")
-
-    except ValueError as e:
-        return [
-            types.TextContent(
-                type="text",
-                text=f"Error: {str(e)}",
-            )
-        ]
-    except Exception as e:
-        return [
-            types.TextContent(
-                type="text",
-                text=f"Unexpected error: {str(e)}",
-            )
-        ]
+
+RESOURCES = [
+    types.Resource(
+        uri=AnyUrl("wanikani://user_progress"),
+        name="User Progress",
+        description="Current user progress and statistics",
+        mimeType="application/json",
+    ),
+    types.Resource(
+        uri=AnyUrl("wanikani://review_forecast"),
+        name="Review Forecast",
+        description="Timeline of upcoming reviews",
+        mimeType="application/json",
+    ),
+    types.Resource(
+        uri=AnyUrl("wanikani://item_database"),
+        name="Item Database",
+        description=(
+            "Searchable collection of user's WaniKani items "
+            "(filter with a search query parameter)"
+        ),
+        mimeType="application/json",
+    ),
+]
+# Metric labels, as for tools
+RESOURCE_TYPES = frozenset(
+    str(resource.uri).removeprefix("wanikani://") for resource in RESOURCES
+)
 
 
 @server.list_resources()
 async def list_resources() -> list[types.Resource]:
-    return [
-        types.Resource(
-            uri=AnyUrl("wanikani://user_progress"),
-            name="User Progress",
-            description="Current user progress and statistics",
-            mimeType="application/json",
-        ),
-        types.Resource(
-            uri=AnyUrl("wanikani://review_forecast"),
-            name="Review Forecast",
-            description="Timeline of upcoming reviews",
-            mimeType="application/json",
-        ),
-        types.Resource(
-            uri=AnyUrl("wanikani://item_database"),
-            name="Item Database",
-            description="Searchable collection of user's WaniKani items",
-            mimeType="application/json",
-        ),
-    ]
+    return list(RESOURCES)
 
 
 @server.read_resource()
-async def read_resource(uri: str) -> str:
-    try:
-        # Parse the URI to extract the resource type and MCP API key
-        # Expected format: wanikani://resource_type?mcp_api_key=key
-        if not uri.startswith("wanikani://"):
-            raise ValueError("Invalid resource URI")
-
-        parts = uri.replace("wanikani://", "").split("?")
-        resource_type = parts[0]
-
-        # Extract MCP API key from query parameters
-        mcp_api_key = None
-        if len(parts) > 1:
-            query_params = dict(
-                param.split("=") for param in parts[1].split("&") if "=" in param
-            )
-            mcp_api_key = query_params.get("mcp_api_key")
-
-        if not mcp_api_key:
-            return '{"error": "MCP API key required in query parameters"}'
-
-        # Validate user
-        try:
-            user = await _get_user_from_mcp_key(mcp_api_key)
-        except ValueError:
-            return '{"error": "Invalid MCP API key"}'
-
-        engine = get_engine()
-
-        if resource_type == "user_progress":
-            with Session(engine) as session:
-                # Get current lesson and review counts
-                lessons_count = len(
-                    session.exec(
-                        select(Assignment).where(
-                            Assignment.user_id == user.id,
-                            Assignment.srs_stage == 0,
-                            Assignment.available_at <= datetime.now(UTC),
-                        )
-                    ).all()
-                )
-
-                reviews_count = len(
-                    session.exec(
-                        select(Assignment).where(
-                            Assignment.user_id == user.id,
-                            Assignment.srs_stage > 0,
-                            Assignment.available_at <= datetime.now(UTC),
-                        )
-                    ).all()
-                )
-
-                next_review = session.exec(
-                    select(Assignment)
-                    .where(
-                        Assignment.user_id == user.id,
-                        Assignment.srs_stage > 0,
-                        Assignment.available_at > datetime.now(UTC),
-                    )
-                    .order_by(Assignment.available_at)
-                ).first()
-
-                return json.dumps(
-                    {
-                        "user_id": user.id,
-                        "username": user.username,
-                        "level": user.level,
-                        "lessons_available": lessons_count,
-                        "reviews_available": reviews_count,
-                        "next_review_time": next_review.available_at.isoformat()
-                        if next_review and next_review.available_at
-                        else None,
-                        "last_sync": user.last_sync.isoformat()
-                        if user.last_sync
-                        else None,
-                        "subscription_active": user.subscription_active,
-                    }
-                )
-
-        elif resource_type == "review_forecast":
-            with Session(engine) as session:
-                # Get upcoming reviews grouped by hour
-                upcoming_assignments = session.exec(
-                    select(Assignment)
-                    .where(
-                        Assignment.user_id == user.id,
-                        Assignment.srs_stage > 0,
-                        Assignment.available_at > datetime.now(UTC),
-                    )
-                    .order_by(Assignment.available_at)
-                ).all()
-
-                # Group by hour
-                forecast: dict[str, int] = {}
-                for assignment in upcoming_assignments:
-                    if assignment.available_at:
-                        hour_key = assignment.available_at.replace(
-                            minute=0, second=0, microsecond=0
-                        )
-                        hour_str = hour_key.isoformat()
-                        forecast[hour_str] = forecast.get(hour_str, 0) + 1
-
-                forecast_list = [
-                    {"time": time, "count": count}
-                    for time, count in sorted(forecast.items())
-                ]
-
-                return json.dumps(
-                    {
-                        "user_id": user.id,
-                        "forecast": forecast_list[:24],  # Next 24 hours
-                    }
-                )
-
-        elif resource_type == "item_database":
-            with Session(engine) as session:
-                # Get user's subjects with assignment info
-                subjects_with_assignments = session.exec(
-                    select(Subject, Assignment)
-                    .join(Assignment)
-                    .where(Assignment.user_id == user.id)
-                    .order_by(Subject.level, Subject.id)
-                ).all()
-
-                items = []
-                for subject, assignment in subjects_with_assignments:
-                    primary_meaning = next(
-                        (m["meaning"] for m in subject.meanings if m.get("primary")),
-                        "Unknown",
-                    )
-                    items.append(
-                        {
-                            "id": subject.id,
-                            "characters": subject.characters,
-                            "slug": subject.slug,
-                            "meaning": primary_meaning,
-                            "level": subject.level,
-                            "type": subject.object_type,
-                            "srs_stage": assignment.srs_stage,
-                            "available_at": assignment.available_at.isoformat()
-                            if assignment.available_at
-                            else None,
-                        }
-                    )
-
-                return json.dumps(
-                    {
-                        "user_id": user.id,
-                        "total_items": len(items),
-                        "items": items,
-                    }
-                )
-
-        else:
-            return '{"error": "Unknown resource type"}'
-
-    except Exception as e:
-        return json.dumps({"error": f"Resource error: {str(e)}"})
-
+async def read_resource(uri: AnyUrl | str) -> str:
+    resource_type = str(uri).removeprefix("wanikani://").split("?")[0]
+    if resource_type not in RESOURCE_TYPES:
+        resource_type = "unknown"
+    RESOURCE_READS.inc(resource=resource_type)
+    query = str(uri).partition("?")[2]
+    user_id = await _profiled_user_id(dict(parse_qsl(query)))
+    with (
+        RESOURCE_DURATION.time(resource=resource_type),
+        profiler.profile("resource", resource_type, user_id),
+    ):
+        await startup.wait()
+        from . import handlers
+
+        response = await handlers.read_resource(uri)
+    # Every failure is answered with a JSON error object
+    if response.startswith('{"error"'):
+        RESOURCE_ERRORS.inc(resource=resource_type)
+    return response
+
+
+async def main(on_initialized: Callable[[], Awaitable[None]] | None = None):
+    """Serve MCP over stdio, running `on_initialized` after the handshake"""
+    if on_initialized is not None:
+        startup.work = on_initialized
+
+        async def initialized(notification: types.InitializedNotification):
+            startup.begin()
+
+        server.notification_handlers[types.InitializedNotification] = initialized
 
-async def main():
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream, write_stream, server.create_initialization_options()
@@ -0,0 +1,364 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# Prometheus text exposition format served at /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+ROWS_PER_SECOND_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+# Waiting for a pooled connection should be rare and short
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key, strict=True))
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        """Yield each series as (sample name, labels, value)"""
+
+
+class Counter(Metric):
+    """Monotonically increasing count, one series per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels: object):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Metric):
+    """Current value that can go up and down, one series per label combination"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: object):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: object):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the time spent in the block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def sum(self, **labels: object) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            series = [
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            ]
+        for key, counts, total in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                bucket_labels = labels | {"le": _format_value(bound)}
+                yield f"{self.name}_bucket", bucket_labels, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total
+
+
+class MetricsRegistry:
+    """The metrics of this process, rendered on demand for /metrics.
+
+    Each process keeps its own values. Behind several HTTP workers a scrape
+    reaches one of them, and the sync process serves its own endpoint on
+    METRICS_PORT.
+    """
+
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class SyncStepStats:
+    """Timing and volume of one sync step, i.e. one WaniKani collection.
+
+    Items are parsed and written one at a time, so the step adds up many
+    short intervals per phase. The totals go to the metrics once the step
+    finishes, and to the sync log through `as_dict`.
+    """
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.durations: dict[str, float] = defaultdict(float)
+        self.pages = 0
+        self.bytes = 0
+        self.rate_limit_wait = 0.0
+        self.rows_written = 0
+        self.rows_skipped = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - start
+
+    def record(self):
+        for phase, seconds in self.durations.items():
+            SYNC_PHASE_DURATION.observe(
+                seconds, collection=self.collection, phase=phase
+            )
+        SYNC_ROWS.inc(self.rows_written, collection=self.collection)
+        elapsed = sum(self.durations.values())
+        if self.rows_written and elapsed > 0:
+            SYNC_ROWS_PER_SECOND.observe(
+                self.rows_written / elapsed, collection=self.collection
+            )
+
+    def as_dict(self) -> dict[str, int]:
+        """Summarise the step for SyncLog.phase_stats, with times in ms.
+
+        fetch_ms excludes the time spent waiting on the rate limiter, which
+        is reported separately as rate_limit_wait_ms.
+        """
+        fetch = self.durations.get("fetch", 0.0) - self.rate_limit_wait
+        return {
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "rows_written": self.rows_written,
+            "rows_skipped": self.rows_skipped,
+            "fetch_ms": round(max(fetch, 0.0) * 1000),
+            "rate_limit_wait_ms": round(self.rate_limit_wait * 1000),
+            "parse_ms": round(self.durations.get("parse", 0.0) * 1000),
+            "write_ms": round(self.durations.get("write", 0.0) * 1000),
+        }
+
+
+registry = MetricsRegistry()
+
+TOOL_CALLS = registry.counter(
+    "wanikani_mcp_tool_calls_total", "MCP tool calls", ("tool",)
+)
+TOOL_ERRORS = registry.counter(
+    "wanikani_mcp_tool_errors_total", "MCP tool calls that returned an error", ("tool",)
+)
+TOOL_DURATION = registry.histogram(
+    "wanikani_mcp_tool_duration_seconds", "MCP tool call latency", ("tool",)
+)
+RESOURCE_READS = registry.counter(
+    "wanikani_mcp_resource_reads_total", "MCP resource reads", ("resource",)
+)
+RESOURCE_ERRORS = registry.counter(
+    "wanikani_mcp_resource_errors_total",
+    "MCP resource reads that returned an error",
+    ("resource",),
+)
+RESOURCE_DURATION = registry.histogram(
+    "wanikani_mcp_resource_duration_seconds", "MCP resource read latency", ("resource",)
+)
+WANIKANI_REQUESTS = registry.counter(
+    "wanikani_mcp_wanikani_requests_total",
+    "WaniKani API requests by endpoint and HTTP status",
+    ("endpoint", "status"),
+)
+WANIKANI_REQUEST_DURATION = registry.histogram(
+    "wanikani_mcp_wanikani_request_duration_seconds",
+    "WaniKani API request latency, excluding rate limiter waits",
+    ("endpoint",),
+)
+WANIKANI_RATE_LIMIT_WAIT = registry.histogram(
+    "wanikani_mcp_wanikani_rate_limit_wait_seconds",
+    "Time spent waiting on the WaniKani rate limiter before a request",
+)
+SYNCS = registry.counter(
+    "wanikani_mcp_syncs_total", "Completed user syncs by outcome", ("status",)
+)
+SYNC_PHASE_DURATION = registry.histogram(
+    "wanikani_mcp_sync_phase_duration_seconds",
+    "Time a sync step spent in each phase (fetch, parse, write)",
+    ("collection", "phase"),
+)
+SYNC_ROWS = registry.counter(
+    "wanikani_mcp_sync_rows_total", "Rows written by sync", ("collection",)
+)
+SYNC_ROWS_PER_SECOND = registry.histogram(
+    "wanikani_mcp_sync_rows_per_second",
+    "Sync throughput per step",
+    ("collection",),
+    buckets=ROWS_PER_SECOND_BUCKETS,
+)
+READ_ROUTES = registry.counter(
+    "wanikani_mcp_read_routes_total",
+    "Handler reads by the database they were routed to",
+    ("target",),
+)
+DB_POOL_CHECKED_OUT = registry.gauge(
+    "wanikani_mcp_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    ("engine",),
+)
+DB_POOL_CAPACITY = registry.gauge(
+    "wanikani_mcp_db_pool_capacity",
+    "Most connections the pool will open (pool size plus overflow)",
+    ("engine",),
+)
+DB_POOL_CHECKOUT_WAIT = registry.histogram(
+    "wanikani_mcp_db_pool_checkout_wait_seconds",
+    "Time taken to get a connection from the pool, including opening one",
+    ("engine",),
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_TIMEOUTS = registry.counter(
+    "wanikani_mcp_db_pool_timeouts_total",
+    "Checkouts that gave up after the pool timeout",
+    ("engine",),
+)
@@ -1,8 +1,8 @@
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime
 from enum import Enum
 from typing import Any
 
-from sqlmodel import JSON, Column, Field, Relationship, SQLModel
+from sqlmodel import JSON, Column, Field, Index, Relationship, SQLModel
 
 
 class SubjectType(str, Enum):
@@ -38,6 +38,12 @@ class User(SQLModel, table=True):
     subscription_period_ends_at: datetime | None = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     last_sync: datetime | None = None
+    sync_generation: int = Field(default=0)
+    # When a sync last committed, so reads know whether a replica has it
+    synced_at: datetime | None = None
+    # Newest data_updated_at among the user's ingested reviews; the next sync
+    # asks WaniKani only for reviews updated after it
+    reviews_updated_at: datetime | None = None
 
     assignments: list["Assignment"] = Relationship(back_populates="user")
     reviews: list["Review"] = Relationship(back_populates="user")
@@ -45,6 +51,7 @@ class User(SQLModel, table=True):
     level_progressions: list["LevelProgression"] = Relationship(back_populates="user")
     study_materials: list["StudyMaterial"] = Relationship(back_populates="user")
     sync_logs: list["SyncLog"] = Relationship(back_populates="user")
+    leech_changes: list["LeechChange"] = Relationship(back_populates="user")
 
 
 class Subject(SQLModel, table=True):
@@ -55,6 +62,10 @@ class Subject(SQLModel, table=True):
     characters: str | None = None
     meanings: list[dict[str, Any]] = Field(sa_column=Column(JSON))
     readings: list[dict[str, Any]] | None = Field(default=None, sa_column=Column(JSON))
+    # Derived from meanings/readings at upsert time so reads can skip the JSON
+    primary_meaning: str | None = None
+    primary_reading: str | None = None
+    search_key: str | None = None
     component_subject_ids: list[int] | None = Field(
         default=None, sa_column=Column(JSON)
     )
@@ -62,6 +73,7 @@ class Subject(SQLModel, table=True):
         default=None, sa_column=Column(JSON)
     )
     document_url: str
+    spaced_repetition_system_id: int | None = None
     hidden_at: datetime | None = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     data_updated_at: datetime | None = None
@@ -73,6 +85,12 @@ class Subject(SQLModel, table=True):
 
 
 class Assignment(SQLModel, table=True):
+    # Availability queries filter on a user's assignments and order them by
+    # available_at; this index serves both without sorting
+    __table_args__ = (
+        Index("ix_assignment_user_id_available_at", "user_id", "available_at"),
+    )
+
     id: int = Field(primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     subject_id: int = Field(foreign_key="subject.id", index=True)
@@ -93,6 +111,15 @@ class Assignment(SQLModel, table=True):
 
 
 class Review(SQLModel, table=True):
+    # On PostgreSQL the table is range-partitioned by month of created_at
+    # (see reviews.py), and a partitioned table's primary key must include
+    # the partition column. Reviews are still identified by id alone.
+    __table_args__ = (
+        Index("ix_review_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
     id: int = Field(primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     assignment_id: int = Field(index=True)
@@ -101,7 +128,9 @@ class Review(SQLModel, table=True):
     ending_srs_stage: int
     incorrect_meaning_answers: int = Field(default=0)
     incorrect_reading_answers: int = Field(default=0)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC), primary_key=True
+    )
     data_updated_at: datetime | None = None
 
     user: User = Relationship(back_populates="reviews")
@@ -109,6 +138,10 @@ class Review(SQLModel, table=True):
 
 
 class ReviewStatistic(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_reviewstatistic_user_id_leech_score", "user_id", "leech_score"),
+    )
+
     id: int = Field(primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     subject_id: int = Field(foreign_key="subject.id", index=True)
@@ -122,6 +155,8 @@ class ReviewStatistic(SQLModel, table=True):
     reading_max_streak: int = Field(default=0)
     reading_current_streak: int = Field(default=0)
     percentage_correct: int = Field(default=0)
+    # Maintained at upsert time, see leeches.leech_score
+    leech_score: float = Field(default=0.0)
     hidden: bool = Field(default=False)
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     data_updated_at: datetime | None = None
@@ -130,15 +165,33 @@ class ReviewStatistic(SQLModel, table=True):
     subject: Subject = Relationship(back_populates="review_stats")
 
 
-class SrsStage(SQLModel, table=True):
+class SrsSystem(SQLModel, table=True):
+    """A WaniKani spaced repetition system; subjects name the one they use"""
+
     id: int = Field(primary_key=True)
-    position: int = Field(unique=True, index=True)
-    meaning_correct: int
-    meaning_incorrect: int
-    reading_correct: int
-    reading_incorrect: int
-    interval: int
-    interval_unit: str  # milliseconds, seconds, minutes, hours, days, weeks
+    name: str
+    description: str | None = None
+    unlocking_stage_position: int
+    starting_stage_position: int
+    passing_stage_position: int
+    burning_stage_position: int
+    data_updated_at: datetime | None = None
+    # The collection's ETag and when it was last fetched or confirmed
+    # unchanged; the same on every row
+    etag: str | None = None
+    synced_at: datetime | None = None
+
+    stages: list["SrsStage"] = Relationship(back_populates="system")
+
+
+class SrsStage(SQLModel, table=True):
+    system_id: int = Field(foreign_key="srssystem.id", primary_key=True)
+    position: int = Field(primary_key=True)
+    # None for the unlocking and burning stages, which have no next review
+    interval: int | None = None
+    interval_unit: str | None = None  # milliseconds, seconds, ..., weeks
+
+    system: SrsSystem = Relationship(back_populates="stages")
 
 
 class LevelProgression(SQLModel, table=True):
@@ -186,7 +239,59 @@ class SyncLog(SQLModel, table=True):
     status: SyncStatus
     records_updated: int = 0
     error_message: str | None = None
-    started_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    started_at: datetime = Field(default_factory=lambda: datetime.now(UTC), index=True)
     completed_at: datetime | None = None
+    # Per collection: pages, bytes, rows written/skipped and phase timings in ms
+    phase_stats: dict[str, dict[str, int]] | None = Field(
+        default=None, sa_column=Column(JSON)
+    )
 
     user: User = Relationship(back_populates="sync_logs")
+
+
+class LeechChange(SQLModel, table=True):
+    """A subject crossing into or out of leech status during a sync"""
+
+    __table_args__ = (
+        Index("ix_leechchange_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    subject_id: int = Field(foreign_key="subject.id")
+    sync_log_id: int | None = Field(default=None, foreign_key="synclog.id")
+    became_leech: bool
+    previous_score: float
+    leech_score: float
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+    user: User = Relationship(back_populates="leech_changes")
+
+
+class DailyRollup(SQLModel, table=True):
+    """A user's review activity and progress on one UTC day, per subject type.
+
+    Maintained by sync as reviews and assignments arrive, so trend queries
+    read one row per day and type instead of the raw history.
+    """
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    subject_type: SubjectType = Field(primary_key=True)
+    reviews: int = Field(default=0)
+    # Reviews answered without any mistake, and with at least one
+    reviews_correct: int = Field(default=0)
+    reviews_incorrect: int = Field(default=0)
+    meaning_incorrect: int = Field(default=0)
+    reading_incorrect: int = Field(default=0)
+    items_passed: int = Field(default=0)
+    items_burned: int = Field(default=0)
+
+
+class SyncLease(SQLModel, table=True):
+    """Cross-process lock held while a user's sync is running"""
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    holder: str
+    acquired_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    expires_at: datetime
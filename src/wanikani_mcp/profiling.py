@@ -0,0 +1,201 @@
+import cProfile
+import logging
+import random
+import re
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILING_MODES = ("off", "cprofile", "tracemalloc")
+# Allocation sites listed in a tracemalloc report
+TRACEMALLOC_TOP_LINES = 50
+
+
+def _parse_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class Profiler:
+    """Opt-in cProfile or tracemalloc capture around tool calls, resource
+    reads and syncs.
+
+    Targets are tool names, resource types or "sync"; with no targets every
+    call is eligible. A user filter limits captures to those users, and the
+    sample rate to a fraction of eligible calls. Both profilers are global
+    to the interpreter, so one capture runs at a time and calls that overlap
+    it are skipped. A cProfile capture also sees the other tasks the event
+    loop runs while the profiled call awaits.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        sample_rate: float,
+        targets: list[str],
+        user_ids: list[int],
+        directory: str,
+        max_files: int,
+    ):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._active = False
+        self.configure(mode, sample_rate, targets, user_ids)
+
+    def configure(
+        self,
+        mode: str | None = None,
+        sample_rate: float | None = None,
+        targets: list[str] | None = None,
+        user_ids: list[int] | None = None,
+    ):
+        if mode is not None:
+            if mode not in PROFILING_MODES:
+                raise ValueError(f"Unknown profiling mode: {mode}")
+            self.mode = mode
+        if sample_rate is not None:
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("Sample rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if targets is not None:
+            self.targets = set(targets)
+        if user_ids is not None:
+            self.user_ids = set(user_ids)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off" and self.sample_rate > 0
+
+    def config(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "targets": sorted(self.targets),
+            "user_ids": sorted(self.user_ids),
+            "directory": str(self.directory),
+            "max_files": self.max_files,
+        }
+
+    def wants(self, target: str, user_id: int | None = None) -> bool:
+        """Decide whether to profile a call to `target` made for a user"""
+        if not self.enabled:
+            return False
+        if self.targets and target not in self.targets:
+            return False
+        if self.user_ids and user_id not in self.user_ids:
+            return False
+        return random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, kind: str, target: str, user_id: int | None = None):
+        """Profile the block if the configuration selects it"""
+        if not self.wants(target, user_id) or not self._claim():
+            yield
+            return
+
+        try:
+            if self.mode == "cprofile":
+                with self._cprofile(kind, target, user_id):
+                    yield
+            else:
+                with self._tracemalloc(kind, target, user_id):
+                    yield
+        finally:
+            self._active = False
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self._active:
+                return False
+            self._active = True
+            return True
+
+    @contextmanager
+    def _cprofile(self, kind: str, target: str, user_id: int | None) -> Iterator[None]:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            path = self._output_path(kind, target, user_id, ".prof")
+            profile.dump_stats(path)
+            self._finish(path)
+
+    @contextmanager
+    def _tracemalloc(
+        self, kind: str, target: str, user_id: int | None
+    ) -> Iterator[None]:
+        if tracemalloc.is_tracing():
+            # Someone else is tracing; leave their session alone
+            yield
+            return
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [
+                f"{kind} {target} user={user_id}",
+                f"current={current} bytes peak={peak} bytes",
+                "",
+            ]
+            lines += [
+                str(stat)
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP_LINES]
+            ]
+            path = self._output_path(kind, target, user_id, ".txt")
+            path.write_text("\n".join(lines) + "\n")
+            self._finish(path)
+
+    def _output_path(
+        self, kind: str, target: str, user_id: int | None, suffix: str
+    ) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+        safe_target = re.sub(r"[^A-Za-z0-9_-]", "_", target)
+        user = f"-user{user_id}" if user_id is not None else ""
+        return self.directory / f"{timestamp}-{kind}-{safe_target}{user}{suffix}"
+
+    def _finish(self, path: Path):
+        logger.info(f"Wrote profile {path}")
+        self._prune()
+
+    def _prune(self):
+        """Keep only the newest max_files profiles"""
+        profiles = sorted(
+            (
+                path
+                for path in self.directory.iterdir()
+                if path.suffix in (".prof", ".txt")
+            ),
+            key=lambda path: path.name,
+            reverse=True,
+        )
+        for path in profiles[self.max_files :]:
+            path.unlink(missing_ok=True)
+
+
+profiler = Profiler(
+    mode=settings.profiling_mode,
+    sample_rate=settings.profiling_sample_rate,
+    targets=_parse_list(settings.profiling_targets),
+    user_ids=[int(user_id) for user_id in _parse_list(settings.profiling_user_ids)],
+    directory=settings.profiling_dir,
+    max_files=settings.profiling_max_files,
+)
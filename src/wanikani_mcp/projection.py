@@ -0,0 +1,306 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlmodel import Session, col, func, select
+
+from .models import Assignment, ReviewStatistic, Subject
+from .srs import DEFAULT_SYSTEM_ID, SrsSchedule, schedule_for
+
+GURU_STAGE = 5
+BURNED_STAGE = 9
+MAX_PROJECTION_DAYS = 90
+# Accuracy assumed for items without review statistics when the user has none
+DEFAULT_ACCURACY = 0.85
+# Items are grouped into this many accuracy bands while simulating
+ACCURACY_BANDS = 20
+
+
+@dataclass
+class Workload:
+    """A user's items in review, as parallel arrays"""
+
+    stages: np.ndarray
+    # Hours from now until each item is next reviewed; 0 if already due
+    due_hours: np.ndarray
+    # Chance of answering each item's next review without a mistake
+    accuracy: np.ndarray
+    # Accuracy assumed for new items: the user's mean
+    lesson_accuracy: float
+    lessons_available: int
+    # SRS system of each item, and the one most unlocked lessons follow
+    systems: np.ndarray | None = None
+    lesson_system: int = DEFAULT_SYSTEM_ID
+
+    def select(self, keep: np.ndarray) -> "Workload":
+        """The items where `keep` is set"""
+        return Workload(
+            stages=self.stages[keep],
+            due_hours=self.due_hours[keep],
+            accuracy=self.accuracy[keep],
+            lesson_accuracy=self.lesson_accuracy,
+            lessons_available=self.lessons_available,
+            systems=None if self.systems is None else self.systems[keep],
+            lesson_system=self.lesson_system,
+        )
+
+
+def interval_hours(schedule: SrsSchedule) -> np.ndarray:
+    """Hours until the next review after reaching each stage, by position"""
+    intervals = np.zeros(BURNED_STAGE + 1, dtype=np.int64)
+    for position in range(1, BURNED_STAGE):
+        interval = schedule.interval(position)
+        if interval is not None:
+            intervals[position] = max(round(interval.total_seconds() / 3600), 1)
+    return intervals
+
+
+def drop_stages(stages: np.ndarray) -> np.ndarray:
+    """Stage after a review with a mistake: down one, or two from Guru up"""
+    return np.maximum(stages - np.where(stages >= GURU_STAGE, 2, 1), 1)
+
+
+def _answer_accuracy(correct: np.ndarray, incorrect: np.ndarray) -> np.ndarray:
+    # A side that has never been asked, like a radical's reading, never fails
+    answered = correct + incorrect
+    return np.divide(correct, answered, out=np.ones(len(answered)), where=answered > 0)
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # SQLite hands back naive UTC, PostgreSQL aware datetimes
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    return moment
+
+
+def _columns(rows, count: int) -> list[tuple]:
+    # Column tuples convert to arrays far faster than a list of rows
+    return list(zip(*rows, strict=True)) or [()] * count
+
+
+def load_workload(session: Session, user_id: int | None, now: datetime) -> Workload:
+    """Read the user's assignments and review statistics into arrays.
+
+    Index range scans on user_id, joined to subjects by primary key for their
+    SRS system; statistics are matched to assignments by subject id with a
+    sorted search rather than a join.
+    """
+    visible = (
+        Assignment.user_id == user_id,
+        Assignment.hidden == False,  # noqa: E712
+    )
+    lesson_systems = session.exec(
+        select(Subject.spaced_repetition_system_id, func.count())
+        .select_from(Assignment)
+        .join(Subject, col(Subject.id) == Assignment.subject_id, isouter=True)
+        .where(
+            *visible,
+            Assignment.srs_stage == 0,
+            col(Assignment.unlocked_at).is_not(None),
+        )
+        .group_by(Subject.spaced_repetition_system_id)
+    ).all()
+    lessons_available = sum(count for _, count in lesson_systems)
+    lesson_system = max(
+        lesson_systems, key=lambda row: row[1], default=(DEFAULT_SYSTEM_ID, 0)
+    )[0]
+    subject_ids, stages, available_at, systems = _columns(
+        session.exec(
+            select(
+                Assignment.subject_id,
+                Assignment.srs_stage,
+                Assignment.available_at,
+                Subject.spaced_repetition_system_id,
+            )
+            .join(Subject, col(Subject.id) == Assignment.subject_id, isouter=True)
+            .where(
+                *visible,
+                Assignment.srs_stage > 0,
+                Assignment.srs_stage < BURNED_STAGE,
+                col(Assignment.available_at).is_not(None),
+            )
+        ).all(),
+        4,
+    )
+    statistics = np.array(
+        _columns(
+            session.exec(
+                select(
+                    ReviewStatistic.subject_id,
+                    ReviewStatistic.meaning_correct,
+                    ReviewStatistic.meaning_incorrect,
+                    ReviewStatistic.reading_correct,
+                    ReviewStatistic.reading_incorrect,
+                ).where(ReviewStatistic.user_id == user_id)
+            ).all(),
+            5,
+        ),
+        dtype=np.int64,
+    ).reshape(5, -1)
+
+    waits = np.array(
+        [_naive_utc(moment) for moment in available_at], dtype="datetime64[us]"
+    ) - np.datetime64(_naive_utc(now), "us")
+    due_hours = np.maximum(np.ceil(waits / np.timedelta64(1, "h")), 0).astype(np.int64)
+
+    order = np.argsort(statistics[0])
+    stat_ids, statistics = statistics[0][order], statistics[1:, order]
+    item_accuracy = _answer_accuracy(statistics[0], statistics[1]) * (
+        _answer_accuracy(statistics[2], statistics[3])
+    )
+    mean_accuracy = (
+        float(item_accuracy.mean()) if len(item_accuracy) else DEFAULT_ACCURACY
+    )
+    subject_ids = np.array(subject_ids, dtype=np.int64)
+    accuracy = np.full(len(subject_ids), mean_accuracy)
+    if len(stat_ids):
+        position = np.minimum(np.searchsorted(stat_ids, subject_ids), len(stat_ids) - 1)
+        matched = stat_ids[position] == subject_ids
+        accuracy[matched] = item_accuracy[position[matched]]
+
+    return Workload(
+        stages=np.array(stages, dtype=np.int64),
+        due_hours=due_hours,
+        accuracy=accuracy,
+        lesson_accuracy=mean_accuracy,
+        lessons_available=lessons_available,
+        systems=np.array(
+            [DEFAULT_SYSTEM_ID if system is None else system for system in systems],
+            dtype=np.int64,
+        ),
+        lesson_system=DEFAULT_SYSTEM_ID if lesson_system is None else lesson_system,
+    )
+
+
+def simulate_reviews(
+    workload: Workload,
+    intervals: np.ndarray,
+    hours: int,
+    lesson_hours: np.ndarray,
+) -> tuple[np.ndarray, float]:
+    """Expected reviews in each of the next `hours` hours, and expected burns.
+
+    Every review splits an item's probability mass: the share answered
+    correctly moves up a stage, the rest drops back, and each lands on the
+    hour its new interval ends. Items are binned by stage, accuracy band and
+    due hour into one array, so each simulated hour updates every item with a
+    handful of array operations. `lesson_hours` holds the hour of each
+    lesson, which puts a new item in stage 1. New items get a band of their
+    own after the accuracy bands.
+    """
+    bands = ACCURACY_BANDS
+    lesson_band = bands
+    mass = np.zeros((bands + 1, BURNED_STAGE + 1, hours))
+
+    item_bands = np.minimum((workload.accuracy * bands).astype(np.int64), bands - 1)
+    # Each band is simulated at the mean accuracy of its items
+    band_accuracy = (np.arange(bands + 1) + 0.5) / bands
+    counts = np.bincount(item_bands, minlength=bands + 1)
+    totals = np.bincount(item_bands, weights=workload.accuracy, minlength=bands + 1)
+    band_accuracy = np.divide(totals, counts, out=band_accuracy, where=counts > 0)
+    band_accuracy[lesson_band] = workload.lesson_accuracy
+
+    due = workload.due_hours < hours
+    np.add.at(
+        mass, (item_bands[due], workload.stages[due], workload.due_hours[due]), 1.0
+    )
+    lesson_due = lesson_hours + intervals[1]
+    lesson_due = lesson_due[lesson_due < hours]
+    np.add.at(mass[lesson_band, 1], lesson_due, 1.0)
+
+    # Stage transitions as matrices from stages 1-8 to stages 0-9, so every
+    # band's moves are one matrix product and land on distinct cells
+    stages = np.arange(1, BURNED_STAGE)
+    promote = np.zeros((len(stages), BURNED_STAGE + 1))
+    promote[stages - 1, stages + 1] = 1
+    demote = np.zeros((len(stages), BURNED_STAGE + 1))
+    demote[stages - 1, drop_stages(stages)] = 1
+
+    reviews = np.zeros(hours)
+    burns = 0.0
+    for hour in range(hours):
+        reviewing = mass[:, 1:BURNED_STAGE, hour]
+        total = reviewing.sum()
+        if total == 0:
+            continue
+        reviews[hour] = total
+        correct = reviewing * band_accuracy[:, None]
+        moved = correct @ promote + (reviewing - correct) @ demote
+        burns += moved[:, BURNED_STAGE].sum()
+
+        next_hours = hour + intervals[stages]
+        keep = next_hours < hours
+        mass[:, stages[keep], next_hours[keep]] += moved[:, stages[keep]]
+    return reviews, burns
+
+
+def project_workload(
+    workload: Workload,
+    schedules: Mapping[int, SrsSchedule],
+    now: datetime,
+    days: int,
+    lessons_per_day: int,
+) -> dict[str, Any]:
+    """Expected daily reviews over the next `days` days.
+
+    Days are 24-hour windows starting now. Lessons are done at the start of
+    each day until the currently unlocked ones run out. Items on each SRS
+    system are simulated with that system's intervals.
+    """
+    hours = days * 24
+    lessons = np.minimum(
+        np.full(days, lessons_per_day),
+        np.maximum(workload.lessons_available - lessons_per_day * np.arange(days), 0),
+    )
+    lesson_hours = np.repeat(np.arange(days) * 24, lessons)
+
+    systems = (
+        workload.systems
+        if workload.systems is not None
+        else np.full(len(workload.stages), workload.lesson_system, dtype=np.int64)
+    )
+    # Unknown systems follow the standard one
+    system_ids, system_index = np.unique(systems, return_inverse=True)
+    schedule_ids = np.array(
+        [schedule_for(schedules, int(system)).id for system in system_ids],
+        dtype=np.int64,
+    )[system_index]
+    lesson_schedule = schedule_for(schedules, workload.lesson_system)
+    reviews = np.zeros(hours)
+    burns = 0.0
+    for schedule_id in np.union1d(schedule_ids, [lesson_schedule.id]):
+        on_schedule = schedule_ids == schedule_id
+        has_lessons = schedule_id == lesson_schedule.id
+        system_reviews, system_burns = simulate_reviews(
+            workload.select(on_schedule),
+            interval_hours(schedule_for(schedules, int(schedule_id))),
+            hours,
+            lesson_hours if has_lessons else lesson_hours[:0],
+        )
+        reviews += system_reviews
+        burns += system_burns
+    daily_reviews = reviews.reshape(days, 24).sum(axis=1)
+
+    start = now.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+    daily = [
+        {
+            "from": (start + timedelta(days=day)).isoformat(),
+            "expected_reviews": round(float(daily_reviews[day]), 1),
+            "lessons": int(lessons[day]),
+        }
+        for day in range(days)
+    ]
+    peak = int(daily_reviews.argmax())
+    return {
+        "days": days,
+        "lessons_per_day": lessons_per_day,
+        "lessons_available": workload.lessons_available,
+        "items_in_review": len(workload.stages),
+        "expected_reviews": round(float(daily_reviews.sum()), 1),
+        "average_per_day": round(float(daily_reviews.mean()), 1),
+        "peak_day": daily[peak],
+        "expected_burns": round(burns, 1),
+        "daily": daily,
+    }
@@ -0,0 +1,90 @@
+from collections.abc import Iterable
+from datetime import UTC, date, datetime
+from typing import Any
+
+from sqlalchemy import Connection
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import Review
+
+# INSERT ... ON CONFLICT DO NOTHING, per dialect
+INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a WaniKani timestamp as naive UTC, the way the columns store it"""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    return moment
+
+
+def review_row(user_id: int, item: dict[str, Any]) -> dict[str, Any]:
+    """Turn a review resource from the API into a row for the review table"""
+    data = item["data"]
+    return {
+        "id": item["id"],
+        "user_id": user_id,
+        "assignment_id": data["assignment_id"],
+        "subject_id": data["subject_id"],
+        "starting_srs_stage": data["starting_srs_stage"],
+        "ending_srs_stage": data["ending_srs_stage"],
+        "incorrect_meaning_answers": data.get("incorrect_meaning_answers", 0),
+        "incorrect_reading_answers": data.get("incorrect_reading_answers", 0),
+        "created_at": parse_timestamp(data["created_at"]),
+        "data_updated_at": parse_timestamp(item["data_updated_at"])
+        if item.get("data_updated_at")
+        else None,
+    }
+
+
+def month_of(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"review_{month:%Y_%m}"
+
+
+def ensure_review_partitions(connection: Connection, months: Iterable[date]):
+    """Create the monthly review partitions that rows are about to land in.
+
+    PostgreSQL only; on other databases review is an ordinary table. There
+    is no default partition, so a month can later be detached and archived
+    without rows for it ending up anywhere else.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for month in sorted(set(months)):
+        connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+            f"PARTITION OF review FOR VALUES "
+            f"FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+
+
+def insert_reviews(connection: Connection, rows: list[dict[str, Any]]) -> set[int]:
+    """Insert a batch of reviews, skipping any that are already stored.
+
+    Reviews never change once made, so a row that is already there is the
+    same review fetched again, e.g. after an interrupted sync. The batch is
+    sent as one executemany, which SQLAlchemy turns into multi-row INSERTs
+    without compiling a statement per batch. RETURNING reports only the
+    rows actually inserted, on both dialects. Returns their ids.
+    """
+    if not rows:
+        return set()
+    ensure_review_partitions(connection, (month_of(row["created_at"]) for row in rows))
+    review = Review.__table__
+    insert = INSERTS[connection.dialect.name]
+    result = connection.execute(
+        insert(review).on_conflict_do_nothing().returning(review.c.id), rows
+    )
+    return set(result.scalars().all())
@@ -0,0 +1,223 @@
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Mapping
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Connection, Date, case, cast, delete, func
+from sqlmodel import Session, col, select
+
+from .models import Assignment, DailyRollup, Review, Subject, SubjectType
+from .reviews import INSERTS
+
+ROLLUP_COUNTS = (
+    "reviews",
+    "reviews_correct",
+    "reviews_incorrect",
+    "meaning_incorrect",
+    "reading_incorrect",
+    "items_passed",
+    "items_burned",
+)
+MAX_TREND_DAYS = 365
+
+# Counts to add to a user's rollups, by UTC day and subject type
+RollupDeltas = dict[tuple[date, SubjectType], Mapping[str, int]]
+
+
+def add_rollups(connection: Connection, user_id: int, deltas: RollupDeltas):
+    """Add counts to the user's rollup rows, creating the rows as needed"""
+    if not deltas:
+        return
+    rollup = DailyRollup.__table__
+    statement = INSERTS[connection.dialect.name](rollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "day", "subject_type"],
+        set_={
+            name: rollup.c[name] + statement.excluded[name] for name in ROLLUP_COUNTS
+        },
+    )
+    connection.execute(
+        statement,
+        [
+            {"user_id": user_id, "day": day, "subject_type": subject_type}
+            | {name: counts.get(name, 0) for name in ROLLUP_COUNTS}
+            for (day, subject_type), counts in deltas.items()
+        ],
+    )
+
+
+def subject_types(
+    connection: Connection, subject_ids: Iterable[int]
+) -> dict[int, SubjectType]:
+    rows = connection.execute(
+        select(Subject.id, Subject.object_type).where(
+            col(Subject.id).in_(set(subject_ids))
+        )
+    )
+    return dict(rows.tuples().all())
+
+
+def add_review_rollups(
+    connection: Connection, user_id: int, rows: list[dict[str, Any]]
+):
+    """Count newly stored review rows (as built by review_row) into the rollups.
+
+    Reviews of subjects that have not been synced yet have no known type
+    and are left out.
+    """
+    types = subject_types(connection, (row["subject_id"] for row in rows))
+    deltas: RollupDeltas = defaultdict(Counter)
+    for row in rows:
+        subject_type = types.get(row["subject_id"])
+        if subject_type is None:
+            continue
+        counts = deltas[row["created_at"].date(), subject_type]
+        mistakes = row["incorrect_meaning_answers"] + row["incorrect_reading_answers"]
+        counts["reviews"] += 1
+        counts["reviews_correct" if mistakes == 0 else "reviews_incorrect"] += 1
+        counts["meaning_incorrect"] += row["incorrect_meaning_answers"]
+        counts["reading_incorrect"] += row["incorrect_reading_answers"]
+    add_rollups(connection, user_id, deltas)
+
+
+def utc_day(moment: datetime) -> date:
+    """The UTC day of a timestamp; naive timestamps are already UTC"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return moment.date()
+
+
+def progress_deltas(
+    subject_type: SubjectType,
+    passed_before: datetime | None,
+    passed_at: datetime | None,
+    burned_before: datetime | None,
+    burned_at: datetime | None,
+) -> RollupDeltas:
+    """Count an assignment's first pass and burn, on the day they happened"""
+    deltas: RollupDeltas = defaultdict(Counter)
+    if passed_before is None and passed_at is not None:
+        deltas[utc_day(passed_at), subject_type]["items_passed"] += 1
+    if burned_before is None and burned_at is not None:
+        deltas[utc_day(burned_at), subject_type]["items_burned"] += 1
+    return deltas
+
+
+def has_rollups(connection: Connection, user_id: int) -> bool:
+    return (
+        connection.execute(
+            select(DailyRollup.user_id).where(DailyRollup.user_id == user_id).limit(1)
+        ).first()
+        is not None
+    )
+
+
+def _day(connection: Connection, column):
+    """SQL for the UTC day of a naive UTC timestamp column"""
+    if connection.dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _as_date(value: date | str) -> date:
+    # SQLite's date() returns text
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def rebuild_rollups(connection: Connection, user_id: int):
+    """Recompute the user's rollups from their stored reviews and assignments"""
+    deltas: RollupDeltas = defaultdict(Counter)
+
+    day = _day(connection, Review.created_at).label("day")
+    mistakes = Review.incorrect_meaning_answers + Review.incorrect_reading_answers
+    reviews = connection.execute(
+        select(
+            day,
+            Subject.object_type,
+            func.count(),
+            func.sum(case((mistakes == 0, 1), else_=0)),
+            func.sum(Review.incorrect_meaning_answers),
+            func.sum(Review.incorrect_reading_answers),
+        )
+        .join(Subject, col(Subject.id) == Review.subject_id)
+        .where(Review.user_id == user_id)
+        .group_by(day, Subject.object_type)
+    )
+    for row_day, subject_type, count, correct, meaning, reading in reviews:
+        counts = deltas[_as_date(row_day), subject_type]
+        counts["reviews"] += count
+        counts["reviews_correct"] += correct
+        counts["reviews_incorrect"] += count - correct
+        counts["meaning_incorrect"] += meaning
+        counts["reading_incorrect"] += reading
+
+    for name, column in (
+        ("items_passed", Assignment.passed_at),
+        ("items_burned", Assignment.burned_at),
+    ):
+        day = _day(connection, column).label("day")
+        rows = connection.execute(
+            select(day, Assignment.subject_type, func.count())
+            .where(Assignment.user_id == user_id, col(column).is_not(None))
+            .group_by(day, Assignment.subject_type)
+        )
+        for row_day, subject_type, count in rows:
+            deltas[_as_date(row_day), subject_type][name] += count
+
+    connection.execute(delete(DailyRollup).where(col(DailyRollup.user_id) == user_id))
+    add_rollups(connection, user_id, deltas)
+
+
+def activity_trend(
+    session: Session,
+    user_id: int | None,
+    days: int,
+    today: date,
+    subject_type: SubjectType | None = None,
+) -> dict[str, Any]:
+    """Per-day activity for the last `days` days up to `today`, from the rollups.
+
+    Reads at most one row per day and subject type, off the primary key.
+    Days without activity are reported as zeros.
+    """
+    start = today - timedelta(days=days - 1)
+    statement = select(DailyRollup).where(
+        DailyRollup.user_id == user_id,
+        DailyRollup.day >= start,
+        DailyRollup.day <= today,
+    )
+    if subject_type is not None:
+        statement = statement.where(DailyRollup.subject_type == subject_type)
+
+    by_day: dict[date, Counter] = defaultdict(Counter)
+    for rollup in session.exec(statement):
+        counts = by_day[rollup.day]
+        for name in ROLLUP_COUNTS:
+            counts[name] += getattr(rollup, name)
+
+    def summary(counts: Counter) -> dict[str, Any]:
+        reviews = counts["reviews"]
+        return {name: counts[name] for name in ROLLUP_COUNTS} | {
+            "accuracy": round(100 * counts["reviews_correct"] / reviews, 1)
+            if reviews
+            else None
+        }
+
+    daily = [
+        {"day": (start + timedelta(days=offset)).isoformat()}
+        | summary(by_day[start + timedelta(days=offset)])
+        for offset in range(days)
+    ]
+    totals = summary(sum(by_day.values(), Counter()))
+    active_days = sum(1 for counts in by_day.values() if counts["reviews"])
+    return {
+        "from": start.isoformat(),
+        "to": today.isoformat(),
+        "subject_type": subject_type.value if subject_type else "all",
+        "totals": totals
+        | {
+            "active_days": active_days,
+            "reviews_per_day": round(totals["reviews"] / days, 1),
+        },
+        "daily": daily,
+    }
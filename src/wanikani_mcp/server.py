@@ -1,13 +1,13 @@
 import asyncio
 import logging
+import multiprocessing
+import os
+import signal
 import sys
+import threading
+import time
 
 from .config import settings
-from .database import create_tables
-
-# from .http_server import create_app
-from .mcp_server import main as run_mcp_stdio
-from .sync_service import sync_service
 
 
 # Configure logging
@@ -20,8 +20,6 @@ def setup_logging():
     )
 
     # File handler for stdio mode (avoid console output)
-    import os
-
     log_file = os.path.join(os.getcwd(), "server.log")
     file_handler = logging.FileHandler(log_file)
     file_handler.setFormatter(formatter)
@@ -46,13 +44,70 @@ class ServerManager:
         self.shutdown_event = asyncio.Event()
 
     async def start_sync_service(self):
-        """Start the background sync service"""
-        create_tables()
+        """Start the background sync service, unless sync is disabled"""
+        if not settings.sync_enabled:
+            logger.info("Background sync disabled for this process")
+            return
+        from .sync_service import sync_service
+
         await sync_service.start()
         logger.info("Background sync service started")
 
+    def start_metrics_server(self):
+        """Serve /metrics and /health on METRICS_PORT, if one is configured.
+
+        Used by processes without the HTTP MCP server. It runs on its own
+        thread and event loop, where uvicorn leaves the signal handlers of
+        the main process alone.
+        """
+        if not settings.metrics_port:
+            return
+
+        import uvicorn
+
+        from .http_server import create_metrics_app
+
+        config = uvicorn.Config(
+            create_metrics_app(),
+            host=settings.metrics_host,
+            port=settings.metrics_port,
+            log_config=None,
+        )
+        threading.Thread(
+            target=uvicorn.Server(config).run, name="metrics-server", daemon=True
+        ).start()
+        logger.info(
+            f"Serving metrics on {settings.metrics_host}:{settings.metrics_port}"
+        )
+
+    def prepare_database(self):
+        """Check the schema and build the in-memory subject catalog and graph"""
+        from .catalog import subject_catalog
+        from .database import ensure_schema
+        from .graph import subject_graph
+
+        ensure_schema()
+        subject_catalog.load()
+        subject_graph.load()
+        # Load the tool handlers too, so the first call does not import them
+        from . import handlers  # noqa: F401
+
+    async def start_deferred_services(self):
+        """Prepare the database and start sync after the stdio handshake"""
+        started = time.perf_counter()
+        # Imports and database work block; on a thread the event loop keeps
+        # answering the client meanwhile
+        await asyncio.to_thread(self.prepare_database)
+        await self.start_sync_service()
+        logger.info(
+            f"Deferred startup finished in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
     async def stop_sync_service(self):
         """Stop the background sync service"""
+        from .sync_service import sync_service
+
         await sync_service.stop()
         logger.info("Background sync service stopped")
 
@@ -62,24 +117,94 @@ class ServerManager:
         self.shutdown_event.set()
 
     async def run_http_server(self, host: str | None = None, port: int | None = None):
-        """Run the HTTP MCP server"""
-        logger.error("HTTP server mode not available - http_server.py was removed")
-        raise NotImplementedError("HTTP server mode is not implemented")
+        """Run the HTTP MCP server in this process"""
+        import uvicorn
+
+        from .http_server import create_app
+
+        host = host or settings.host
+        port = port or settings.port
+        logger.info(f"Starting HTTP MCP server on {host}:{port}")
+        config = uvicorn.Config(create_app(), host=host, port=port, log_config=None)
+        await uvicorn.Server(config).serve()
+
+    async def run_sync_worker(self):
+        """Run only the background sync scheduler until a shutdown signal"""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.signal_handler, signum, None)
+
+        from .database import ensure_schema
+        from .sync_service import sync_service
+
+        logger.info("Starting sync worker")
+        self.start_metrics_server()
+        ensure_schema()
+        await sync_service.start()
+        try:
+            await self.shutdown_event.wait()
+        finally:
+            await self.stop_sync_service()
 
     async def run_stdio_server(self):
-        """Run the stdio MCP server"""
+        """Run the stdio MCP server.
+
+        Only the MCP SDK is loaded before the client's initialize request is
+        answered; the database, catalog and sync start once it completes.
+        """
+        from .mcp_server import main as run_mcp_stdio
+
         logger.info("Starting stdio MCP server")
-        await self.start_sync_service()
+        self.start_metrics_server()
 
         try:
             # Run the stdio MCP server
-            await run_mcp_stdio()
+            await run_mcp_stdio(on_initialized=self.start_deferred_services)
         except Exception as e:
             logger.error(f"Stdio server error: {e}")
         finally:
             await self.stop_sync_service()
 
 
+def _run_sync_process():
+    """Entry point for the dedicated sync process of a multi-worker server"""
+    asyncio.run(ServerManager().run_sync_worker())
+
+
+def run_http_workers(host: str | None, port: int | None, workers: int):
+    """Run the HTTP MCP server across several worker processes.
+
+    The workers only serve requests. When sync is enabled it runs in one
+    separate process, so each user is synced once per interval rather than
+    once per worker.
+    """
+    import uvicorn
+
+    sync_process = None
+    if settings.sync_enabled:
+        sync_process = multiprocessing.Process(
+            target=_run_sync_process, name="wanikani-mcp-sync", daemon=True
+        )
+        sync_process.start()
+
+    # Workers load their settings afresh, so switch sync off via the environment
+    os.environ["SYNC_ENABLED"] = "false"
+    logger.info(f"Starting HTTP MCP server with {workers} workers")
+    try:
+        uvicorn.run(
+            "wanikani_mcp.http_server:create_app",
+            factory=True,
+            host=host or settings.host,
+            port=port or settings.port,
+            workers=workers,
+            log_config=None,
+        )
+    finally:
+        if sync_process:
+            sync_process.terminate()
+            sync_process.join(timeout=30)
+
+
 async def run_server(
     mode: str = "stdio", host: str | None = None, port: int | None = None
 ):
@@ -103,17 +228,49 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="WaniKani MCP Server")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["serve", "sync-worker"],
+        default="serve",
+        help=(
+            "serve: run the MCP server (default); "
+            "sync-worker: run only the background sync scheduler"
+        ),
+    )
     parser.add_argument(
         "--mode",
-        choices=["stdio"],
+        choices=["stdio", "http"],
         default="stdio",
-        help="Server mode (only stdio supported)",
+        help="Server mode: stdio for a single local client, http for many",
+    )
+    parser.add_argument("--host", help="HTTP bind address (default from settings)")
+    parser.add_argument("--port", type=int, help="HTTP port (default from settings)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.http_workers,
+        help="Number of HTTP worker processes",
+    )
+    parser.add_argument(
+        "--no-sync",
+        action="store_true",
+        help="Serve requests without running background sync in this server "
+        "(use with a separate sync-worker)",
     )
 
     args = parser.parse_args()
 
+    if args.no_sync:
+        settings.sync_enabled = False
+
     try:
-        asyncio.run(run_server(args.mode))
+        if args.command == "sync-worker":
+            asyncio.run(ServerManager().run_sync_worker())
+        elif args.mode == "http" and args.workers > 1:
+            run_http_workers(args.host, args.port, args.workers)
+        else:
+            asyncio.run(run_server(args.mode, args.host, args.port))
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -0,0 +1,330 @@
+import logging
+import math
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from types import MappingProxyType
+from typing import Any
+
+from sqlalchemy import and_
+from sqlmodel import Session, col, select
+
+from .config import settings
+from .database import get_engine
+from .models import Assignment, SrsStage, SrsSystem, Subject, SubjectType
+from .reviews import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_UNIT_SECONDS = {
+    "milliseconds": 0.001,
+    "seconds": 1,
+    "minutes": 60,
+    "hours": 3600,
+    "days": 86400,
+    "weeks": 604800,
+}
+
+# Subjects without a known system follow WaniKani's standard one
+DEFAULT_SYSTEM_ID = 2
+# Share of a level's kanji that must be passed to level up
+LEVEL_UP_KANJI_SHARE = 0.9
+
+
+@dataclass(frozen=True)
+class SrsSchedule:
+    """One SRS system's stages, as an immutable value"""
+
+    id: int
+    name: str
+    unlocking_position: int
+    starting_position: int
+    passing_position: int
+    burning_position: int
+    # Seconds until the next review after reaching each position, by position
+    intervals: tuple[int | None, ...]
+
+    @classmethod
+    def from_stages(cls, system: SrsSystem, stages: list[SrsStage]) -> "SrsSchedule":
+        intervals: list[int | None] = [None] * (system.burning_stage_position + 1)
+        for stage in stages:
+            unit = INTERVAL_UNIT_SECONDS.get(stage.interval_unit or "")
+            if stage.interval is not None and unit and stage.position < len(intervals):
+                intervals[stage.position] = round(stage.interval * unit)
+        return cls(
+            id=system.id,
+            name=system.name,
+            unlocking_position=system.unlocking_stage_position,
+            starting_position=system.starting_stage_position,
+            passing_position=system.passing_stage_position,
+            burning_position=system.burning_stage_position,
+            intervals=tuple(intervals),
+        )
+
+    def interval(self, position: int) -> timedelta | None:
+        if not 0 <= position < len(self.intervals):
+            return None
+        seconds = self.intervals[position]
+        return timedelta(seconds=seconds) if seconds is not None else None
+
+    def next_review_at(self, position: int, reached_at: datetime) -> datetime | None:
+        """When an item that reached `position` at `reached_at` is next up.
+
+        WaniKani rounds the time down to the hour.
+        """
+        interval = self.interval(position)
+        if interval is None:
+            return None
+        return (reached_at + interval).replace(minute=0, second=0, microsecond=0)
+
+    def earliest_at(
+        self, position: int, available_at: datetime, target: int
+    ) -> datetime | None:
+        """Earliest time an item can reach `target` if every answer is right.
+
+        The item is at `position` and next up at `available_at`; a lesson is
+        at the unlocking position and up whenever it is started.
+        """
+        if position >= target:
+            return None
+        moment: datetime | None = available_at
+        for reached in range(position + 1, target):
+            moment = self.next_review_at(reached, moment)
+            if moment is None:
+                return None
+        return moment
+
+
+def schedule_for(
+    systems: Mapping[int, SrsSchedule], system_id: int | None
+) -> SrsSchedule:
+    """The system's schedule, or the standard one if it is unknown"""
+    if system_id in systems:
+        return systems[system_id]
+    return systems.get(DEFAULT_SYSTEM_ID) or next(iter(systems.values()))
+
+
+def srs_system_rows(item: dict[str, Any]) -> tuple[SrsSystem, list[SrsStage]]:
+    """Turn a spaced_repetition_system resource into rows"""
+    data = item["data"]
+    system = SrsSystem(
+        id=item["id"],
+        name=data["name"],
+        description=data.get("description"),
+        unlocking_stage_position=data["unlocking_stage_position"],
+        starting_stage_position=data["starting_stage_position"],
+        passing_stage_position=data["passing_stage_position"],
+        burning_stage_position=data["burning_stage_position"],
+        data_updated_at=parse_timestamp(item["data_updated_at"])
+        if item.get("data_updated_at")
+        else None,
+    )
+    stages = [
+        SrsStage(
+            system_id=item["id"],
+            position=stage["position"],
+            interval=stage.get("interval"),
+            interval_unit=stage.get("interval_unit"),
+        )
+        for stage in data["stages"]
+    ]
+    return system, stages
+
+
+def _builtin(system_id: int, name: str, hours: list[int]) -> SrsSchedule:
+    return SrsSchedule(
+        id=system_id,
+        name=name,
+        unlocking_position=0,
+        starting_position=1,
+        passing_position=5,
+        burning_position=9,
+        intervals=(None, *(hour * 3600 for hour in hours), None),
+    )
+
+
+# WaniKani's two systems, used until the first sync has stored them
+BUILTIN_SYSTEMS = {
+    1: _builtin(1, "Wanikani Accelerated", [2, 4, 8, 23, 167, 335, 719, 2879]),
+    2: _builtin(2, "Wanikani", [4, 8, 23, 47, 167, 335, 719, 2879]),
+}
+
+
+class SrsSystems:
+    """In-process lookup of the SRS systems, keyed by system id.
+
+    The table holds a couple of rows that WaniKani almost never changes, so
+    schedules are read once into frozen values and swapped in whole when
+    reloaded; readers never see a half-updated mapping. Until a sync has
+    stored them, WaniKani's published systems are used.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._systems: Mapping[int, SrsSchedule] = MappingProxyType(BUILTIN_SYSTEMS)
+        self._loaded_at: float | None = None
+
+    def load(self) -> None:
+        with Session(get_engine()) as session:
+            systems = session.exec(select(SrsSystem)).all()
+            stages = session.exec(select(SrsStage)).all()
+        by_system: dict[int, list[SrsStage]] = {}
+        for stage in stages:
+            by_system.setdefault(stage.system_id, []).append(stage)
+        if systems:
+            self._systems = MappingProxyType(
+                {
+                    system.id: SrsSchedule.from_stages(
+                        system, by_system.get(system.id, [])
+                    )
+                    for system in systems
+                }
+            )
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Loaded {len(systems)} SRS systems")
+
+    def ensure_fresh(self) -> None:
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.refresh_seconds
+        ):
+            self.load()
+
+    def all(self) -> Mapping[int, SrsSchedule]:
+        self.ensure_fresh()
+        return self._systems
+
+    def get(self, system_id: int | None) -> SrsSchedule:
+        """The system's schedule, or the standard one if it is unknown"""
+        return schedule_for(self.all(), system_id)
+
+
+# Global SRS system lookup
+srs_systems = SrsSystems(settings.subject_catalog_refresh_seconds)
+
+
+def _aware(moment: datetime) -> datetime:
+    # Naive on SQLite
+    return moment.replace(tzinfo=moment.tzinfo or UTC)
+
+
+def item_guru_eta(
+    schedule: SrsSchedule,
+    srs_stage: int | None,
+    unlocked_at: datetime | None,
+    available_at: datetime | None,
+    passed_at: datetime | None,
+    now: datetime,
+) -> tuple[str, datetime | None]:
+    """An item's status, and the earliest time it can reach Guru.
+
+    The status is locked, lesson, in_review or passed; only lessons and
+    items in review have a time.
+    """
+    if unlocked_at is None or srs_stage is None:
+        return "locked", None
+    if passed_at is not None or srs_stage >= schedule.passing_position:
+        return "passed", None
+    if srs_stage <= schedule.unlocking_position:
+        return "lesson", schedule.earliest_at(
+            schedule.unlocking_position, now, schedule.passing_position
+        )
+    available_at = max(_aware(available_at or now), now)
+    return "in_review", schedule.earliest_at(
+        srs_stage, available_at, schedule.passing_position
+    )
+
+
+def guru_eta(
+    session: Session,
+    user_id: int | None,
+    level: int,
+    now: datetime,
+    subject_type: SubjectType | None = None,
+    systems: Mapping[int, SrsSchedule] | None = None,
+) -> dict[str, Any]:
+    """Earliest time each of a level's subjects can reach Guru.
+
+    Assumes every remaining review is answered correctly as soon as it is
+    available, and lessons are done now. Locked subjects have no estimate.
+    With kanji included, also estimates when the level can be passed.
+    """
+    systems = systems if systems is not None else srs_systems.all()
+    query = (
+        select(
+            Subject.id,
+            Subject.object_type,
+            Subject.spaced_repetition_system_id,
+            Assignment.srs_stage,
+            Assignment.unlocked_at,
+            Assignment.available_at,
+            Assignment.passed_at,
+        )
+        .outerjoin(
+            Assignment,
+            and_(
+                col(Assignment.subject_id) == Subject.id,
+                Assignment.user_id == user_id,
+                Assignment.hidden == False,  # noqa: E712
+            ),
+        )
+        .where(Subject.level == level, col(Subject.hidden_at).is_(None))
+    )
+    if subject_type is not None:
+        query = query.where(Subject.object_type == subject_type)
+
+    items = []
+    kanji_passed = 0
+    kanji_etas: list[datetime | None] = []
+    for row in session.exec(query).all():
+        schedule = schedule_for(systems, row.spaced_repetition_system_id)
+        status, guru_at = item_guru_eta(
+            schedule,
+            row.srs_stage,
+            row.unlocked_at,
+            row.available_at,
+            row.passed_at,
+            now,
+        )
+
+        if row.object_type == SubjectType.KANJI:
+            if status == "passed":
+                kanji_passed += 1
+            else:
+                kanji_etas.append(guru_at)
+        items.append(
+            {
+                "subject_id": row.id,
+                "subject_type": row.object_type.value,
+                "srs_stage": row.srs_stage,
+                "status": status,
+                "guru_at": guru_at.isoformat() if guru_at else None,
+            }
+        )
+    # Soonest first, then the passed and locked ones
+    items.sort(key=lambda item: (item["guru_at"] is None, item["guru_at"] or ""))
+
+    result: dict[str, Any] = {
+        "level": level,
+        "subject_type": subject_type.value if subject_type else None,
+        "as_of": now.isoformat(),
+        "items": items,
+    }
+    kanji = kanji_passed + len(kanji_etas)
+    if kanji:
+        required = math.ceil(kanji * LEVEL_UP_KANJI_SHARE)
+        still_needed = max(required - kanji_passed, 0)
+        reachable = sorted(eta for eta in kanji_etas if eta is not None)
+        level_up_at = None
+        if 0 < still_needed <= len(reachable):
+            level_up_at = reachable[still_needed - 1].isoformat()
+        result["level_up"] = {
+            "kanji": kanji,
+            "kanji_required": required,
+            "kanji_passed": kanji_passed,
+            "locked_kanji": len(kanji_etas) - len(reachable),
+            # None once passed, or while locked kanji are still needed
+            "earliest_at": level_up_at,
+        }
+    return result
@@ -1,31 +1,78 @@
 import asyncio
 import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, delete, func, or_, select, update
 
+from .cache import response_cache
+from .catalog import (
+    primary_meaning,
+    primary_reading,
+    subject_catalog,
+    subject_search_key,
+)
 from .config import settings
-from .database import get_engine
+from .database import get_engine, get_writer_engine
+from .graph import subject_graph
+from .leeches import leech_change, leech_score
+from .metrics import SYNCS, SyncStepStats
 from .models import (
     Assignment,
+    LeechChange,
     ReviewStatistic,
+    SrsStage,
+    SrsSystem,
     Subject,
+    SubjectType,
+    SyncLease,
     SyncLog,
     SyncStatus,
     SyncType,
     User,
 )
+from .profiling import profiler
+from .reviews import insert_reviews, review_row
+from .rollups import (
+    add_review_rollups,
+    add_rollups,
+    has_rollups,
+    progress_deltas,
+    rebuild_rollups,
+)
+from .srs import srs_system_rows, srs_systems
 from .wanikani_client import WaniKaniClient
 
 logger = logging.getLogger(__name__)
 
+# How often to check whether another process has finished a user's sync
+LEASE_POLL_SECONDS = 1.0
+
+
+class SyncBusyError(ValueError):
+    """Another process held the user's sync lease for longer than allowed"""
+
+
+@dataclass
+class SyncResult:
+    records_updated: int
+    completed_at: datetime | None
+    # True when the result came from a sync started by another request
+    shared: bool = False
+
 
 class SyncService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.is_running = False
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._in_flight: dict[int, asyncio.Task[SyncResult]] = {}
 
     async def start(self):
         """Start the background sync scheduler"""
@@ -84,7 +131,7 @@ class SyncService:
         async def sync_user_with_semaphore(user: User):
             async with semaphore:
                 try:
-                    await self._sync_user_data(user)
+                    await self.sync_user(user)
                     logger.info(f"Successfully synced user {user.username}")
                 except Exception as e:
                     logger.error(f"Failed to sync user {user.username}: {e}")
@@ -94,12 +141,166 @@ class SyncService:
 
         logger.info("Background sync completed")
 
+    async def sync_user(
+        self,
+        user: User,
+        cooldown_seconds: float = 0,
+        max_wait_seconds: float | None = None,
+    ) -> SyncResult:
+        """Sync a user, collapsing concurrent and recent requests into one.
+
+        A request for a user whose sync is already running in this process
+        joins it and gets its result. With a cooldown, a sync that completed
+        within it is returned instead of starting another. Across processes, a
+        lease row makes other requests wait for the running sync and reuse
+        its result; with `max_wait_seconds`, waiting longer than that raises
+        SyncBusyError.
+        """
+        if cooldown_seconds > 0:
+            since = datetime.now(UTC) - timedelta(seconds=cooldown_seconds)
+            recent = self._recent_sync_result(user.id, since)
+            if recent:
+                return recent
+
+        assert user.id is not None
+        task = self._in_flight.get(user.id)
+        if task is not None:
+            result = await asyncio.shield(task)
+            return SyncResult(result.records_updated, result.completed_at, True)
+
+        task = asyncio.create_task(self._sync_with_lease(user, max_wait_seconds))
+        self._in_flight[user.id] = task
+        task.add_done_callback(lambda done: self._forget_in_flight(user.id, done))
+        return await asyncio.shield(task)
+
+    def _forget_in_flight(self, user_id: int, task: asyncio.Task):
+        if self._in_flight.get(user_id) is task:
+            del self._in_flight[user_id]
+
+    async def _sync_with_lease(
+        self, user: User, max_wait_seconds: float | None = None
+    ) -> SyncResult:
+        """Run a user's sync while holding their lease, or reuse another's"""
+        requested_at = datetime.now(UTC)
+        loop = asyncio.get_running_loop()
+        deadline = None if max_wait_seconds is None else loop.time() + max_wait_seconds
+        while not self._acquire_lease(user.id):
+            if deadline is not None and loop.time() >= deadline:
+                raise SyncBusyError(
+                    "A sync is already running in another process; "
+                    "try again in a few minutes"
+                )
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            recent = self._recent_sync_result(user.id, requested_at)
+            if recent:
+                return recent
+
+        renewal = asyncio.create_task(self._renew_lease(user.id))
+        try:
+            # Another process may have finished just before we got the lease
+            recent = self._recent_sync_result(user.id, requested_at)
+            if recent:
+                return recent
+            with profiler.profile("sync", "sync", user.id):
+                records_updated = await self._sync_user_data(user)
+            return SyncResult(records_updated, datetime.now(UTC))
+        finally:
+            renewal.cancel()
+            self._release_lease(user.id)
+
+    async def _renew_lease(self, user_id: int | None):
+        """Keep extending the user's lease while their sync runs"""
+        while True:
+            await asyncio.sleep(settings.sync_lease_seconds / 3)
+            if not self._extend_lease(user_id):
+                logger.warning(f"Lost the sync lease for user {user_id}")
+                return
+
+    def _acquire_lease(self, user_id: int | None) -> bool:
+        """Take the user's sync lease if it is free, expired or already ours"""
+        now = datetime.now(UTC)
+        expires_at = now + timedelta(seconds=settings.sync_lease_seconds)
+        with Session(get_writer_engine()) as session:
+            result = session.exec(
+                update(SyncLease)
+                .where(
+                    SyncLease.user_id == user_id,
+                    or_(
+                        SyncLease.expires_at < now,
+                        SyncLease.holder == self.holder_id,
+                    ),
+                )
+                .values(holder=self.holder_id, acquired_at=now, expires_at=expires_at)
+            )
+            if result.rowcount:
+                session.commit()
+                return True
+
+            try:
+                session.add(
+                    SyncLease(
+                        user_id=user_id,
+                        holder=self.holder_id,
+                        acquired_at=now,
+                        expires_at=expires_at,
+                    )
+                )
+                session.commit()
+                return True
+            except IntegrityError:
+                # Held by another process
+                session.rollback()
+                return False
+
+    def _extend_lease(self, user_id: int | None) -> bool:
+        """Push back the expiry of a lease this process holds"""
+        expires_at = datetime.now(UTC) + timedelta(seconds=settings.sync_lease_seconds)
+        with Session(get_writer_engine()) as session:
+            result = session.exec(
+                update(SyncLease)
+                .where(
+                    SyncLease.user_id == user_id,
+                    SyncLease.holder == self.holder_id,
+                )
+                .values(expires_at=expires_at)
+            )
+            session.commit()
+            return bool(result.rowcount)
+
+    def _release_lease(self, user_id: int | None):
+        with Session(get_writer_engine()) as session:
+            session.exec(
+                delete(SyncLease).where(
+                    SyncLease.user_id == user_id,
+                    SyncLease.holder == self.holder_id,
+                )
+            )
+            session.commit()
+
+    @staticmethod
+    def _recent_sync_result(user_id: int | None, since: datetime) -> SyncResult | None:
+        """Return the latest successful sync that completed after `since`"""
+        with Session(get_engine()) as session:
+            sync_log = session.exec(
+                select(SyncLog)
+                .where(
+                    SyncLog.user_id == user_id,
+                    SyncLog.status == SyncStatus.SUCCESS,
+                    SyncLog.completed_at >= since,
+                )
+                .order_by(col(SyncLog.completed_at).desc())
+            ).first()
+        if sync_log is None:
+            return None
+        return SyncResult(sync_log.records_updated, sync_log.completed_at, True)
+
     async def _sync_user_data(self, user: User) -> int:
         """Sync data for a single user"""
         engine = get_engine()
+        writer = get_writer_engine()
 
         # Create sync log
-        with Session(engine) as session:
+        with Session(writer) as session:
             sync_log = SyncLog(
                 user_id=user.id,
                 sync_type=SyncType.INCREMENTAL,
@@ -110,6 +311,8 @@ class SyncService:
             session.commit()
             session.refresh(sync_log)
 
+        # Per-collection timings and volumes, stored on the sync log
+        step_stats: list[SyncStepStats] = []
         try:
             client = WaniKaniClient(user.wanikani_api_key)
             records_updated = 0
@@ -145,7 +348,7 @@ class SyncService:
 
             # Update user profile
             user_data = await client.get_user()
-            with Session(engine) as session:
+            with Session(writer) as session:
                 db_user = session.get(User, user.id)
                 if db_user:
                     db_user.username = user_data["data"]["username"]
@@ -174,30 +377,55 @@ class SyncService:
                     session.commit()
                     records_updated += 1
 
+            # Rollups are kept up to date as data syncs; the first time, they
+            # are built from whatever is already stored, e.g. after an upgrade
+            if user.id is not None:
+                with writer.begin() as connection:
+                    if not has_rollups(connection, user.id):
+                        rebuild_rollups(connection, user.id)
+
+            # SRS systems are shared by all users and rarely change
+            try:
+                records_updated += await self._sync_srs_systems(client, step_stats)
+            except Exception as e:
+                logger.error(f"Error syncing SRS systems: {e}")
+
             # Sync subjects (radicals, kanji, vocabulary)
             try:
-                subjects_data = await client.get_subjects(updated_after=last_sync)
+                step = SyncStepStats("subjects")
+                step_stats.append(step)
+                with step.phase("fetch"):
+                    subjects_data = await client.get_subjects(
+                        updated_after=last_sync, stats=step
+                    )
                 logger.info(
                     f"Syncing {len(subjects_data)} subjects for user {user.username}"
                 )
 
+                synced_subject_ids: list[int] = []
                 for i, subject_item in enumerate(subjects_data):
                     try:
-                        # Handle the nested structure: top-level has id,
-                        # data has the actual subject info
-                        subject_id = subject_item.get("id")
-                        subject_data = subject_item.get("data", subject_item)
+                        with step.phase("parse"):
+                            # Handle the nested structure: top-level has id,
+                            # data has the actual subject info
+                            subject_id = subject_item.get("id")
+                            subject_data = subject_item.get("data", subject_item)
+
+                            # Add the ID and object_type to the data for processing
+                            if subject_id:
+                                subject_data["id"] = subject_id
+                                subject_data["object_type"] = subject_item.get(
+                                    "object"
+                                )  # radical, kanji, vocabulary
+                                subject_data["data_updated_at"] = subject_item.get(
+                                    "data_updated_at"
+                                )
 
-                        # Add the ID and object_type to the data for processing
                         if subject_id:
-                            subject_data["id"] = subject_id
-                            subject_data["object_type"] = subject_item.get(
-                                "object"
-                            )  # radical, kanji, vocabulary
-                            subject_data["data_updated_at"] = subject_item.get(
-                                "data_updated_at"
-                            )
-                            await self._upsert_subject(subject_data)
+                            with step.phase("write"):
+                                await self._upsert_subject(subject_data)
+                            synced_subject_ids.append(subject_id)
+                            step.rows_written += 1
                             records_updated += 1
 
                             # Log progress for large syncs
@@ -205,9 +433,20 @@ class SyncService:
                                 logger.info(
                                     f"Synced {i + 1}/{len(subjects_data)} subjects"
                                 )
+                        else:
+                            step.rows_skipped += 1
                     except Exception as e:
                         logger.error(f"Error syncing subject {subject_id}: {e}")
+                        step.rows_skipped += 1
                         continue
+                step.record()
+
+                # Keep this process's catalog in step with the subject table
+                if synced_subject_ids and subject_catalog.is_loaded:
+                    subject_catalog.refresh(synced_subject_ids)
+                # And rebuild the component graph from the new edges
+                if synced_subject_ids and subject_graph.is_loaded:
+                    subject_graph.load()
 
             except Exception as e:
                 logger.error(f"Error getting subjects: {e}")
@@ -215,7 +454,12 @@ class SyncService:
 
             # Sync assignments
             try:
-                assignments_data = await client.get_assignments(updated_after=last_sync)
+                step = SyncStepStats("assignments")
+                step_stats.append(step)
+                with step.phase("fetch"):
+                    assignments_data = await client.get_assignments(
+                        updated_after=last_sync, stats=step
+                    )
                 logger.info(
                     f"Syncing {len(assignments_data)} assignments for user "
                     f"{user.username}"
@@ -223,16 +467,25 @@ class SyncService:
 
                 for i, assignment_item in enumerate(assignments_data):
                     try:
-                        # Handle the nested structure: top-level has id,
-                        # data has the actual assignment info
-                        assignment_id = assignment_item.get("id")
-                        assignment_data = assignment_item.get("data", assignment_item)
+                        with step.phase("parse"):
+                            # Handle the nested structure: top-level has id,
+                            # data has the actual assignment info
+                            assignment_id = assignment_item.get("id")
+                            assignment_data = assignment_item.get(
+                                "data", assignment_item
+                            )
+
+                            # Add the ID to the data for processing
+                            if assignment_id:
+                                assignment_data["id"] = assignment_id
 
-                        # Add the ID to the data for processing
                         if assignment_id:
-                            assignment_data["id"] = assignment_id
                             if user.id is not None:
-                                await self._upsert_assignment(user.id, assignment_data)
+                                with step.phase("write"):
+                                    await self._upsert_assignment(
+                                        user.id, assignment_data
+                                    )
+                                step.rows_written += 1
                             records_updated += 1
 
                             # Log progress for large syncs
@@ -241,9 +494,13 @@ class SyncService:
                                     f"Synced {i + 1}/{len(assignments_data)} "
                                     f"assignments"
                                 )
+                        else:
+                            step.rows_skipped += 1
                     except Exception as e:
                         logger.error(f"Error syncing assignment {assignment_id}: {e}")
+                        step.rows_skipped += 1
                         continue
+                step.record()
 
             except Exception as e:
                 logger.error(f"Error getting assignments: {e}")
@@ -251,9 +508,12 @@ class SyncService:
 
             # Sync review statistics
             try:
-                review_stats_data = await client.get_review_statistics(
-                    updated_after=last_sync
-                )
+                step = SyncStepStats("review_statistics")
+                step_stats.append(step)
+                with step.phase("fetch"):
+                    review_stats_data = await client.get_review_statistics(
+                        updated_after=last_sync, stats=step
+                    )
                 logger.info(
                     f"Syncing {len(review_stats_data)} review statistics for user "
                     f"{user.username}"
@@ -261,19 +521,32 @@ class SyncService:
 
                 for i, stats_item in enumerate(review_stats_data):
                     try:
-                        # Handle the nested structure: top-level has id,
-                        # data has the actual stats info
-                        stats_id = stats_item.get("id")
-                        stats_data = stats_item.get("data", stats_item)
+                        with step.phase("parse"):
+                            # Handle the nested structure: top-level has id,
+                            # data has the actual stats info
+                            stats_id = stats_item.get("id")
+                            stats_data = stats_item.get("data", stats_item)
+
+                            # Add the ID and data_updated_at to the data for
+                            # processing
+                            if stats_id:
+                                stats_data["id"] = stats_id
+                                stats_data["data_updated_at"] = stats_item.get(
+                                    "data_updated_at"
+                                )
 
-                        # Add the ID and data_updated_at to the data for processing
                         if stats_id:
-                            stats_data["id"] = stats_id
-                            stats_data["data_updated_at"] = stats_item.get(
-                                "data_updated_at"
-                            )
                             if user.id is not None:
-                                await self._upsert_review_statistic(user.id, stats_data)
+                                # The first sync has no earlier state to
+                                # compare against, so it records no changes
+                                with step.phase("write"):
+                                    await self._upsert_review_statistic(
+                                        user.id,
+                                        stats_data,
+                                        sync_log.id,
+                                        track_leech_changes=not is_initial_sync,
+                                    )
+                                step.rows_written += 1
                             records_updated += 1
 
                             # Log progress for large syncs
@@ -282,42 +555,209 @@ class SyncService:
                                     f"Synced {i + 1}/{len(review_stats_data)} "
                                     f"review statistics"
                                 )
+                        else:
+                            step.rows_skipped += 1
                     except Exception as e:
                         logger.error(f"Error syncing review stat {stats_id}: {e}")
+                        step.rows_skipped += 1
                         continue
+                step.record()
 
             except Exception as e:
                 logger.error(f"Error getting review statistics: {e}")
 
+            # Sync review history, which only ever grows
+            try:
+                step = SyncStepStats("reviews")
+                step_stats.append(step)
+                if user.id is not None:
+                    records_updated += await self._ingest_reviews(user.id, client, step)
+                step.record()
+
+            except Exception as e:
+                logger.error(f"Error getting reviews: {e}")
+
+            self._prune_leech_changes(user.id)
+
             await client.close()
 
             # Update sync log
-            with Session(engine) as session:
+            with Session(writer) as session:
                 db_sync_log = session.get(SyncLog, sync_log.id)
                 if db_sync_log:
                     db_sync_log.status = SyncStatus.SUCCESS
                     db_sync_log.records_updated = records_updated
                     db_sync_log.completed_at = datetime.now(UTC)
+                    db_sync_log.phase_stats = {
+                        step.collection: step.as_dict() for step in step_stats
+                    }
                     session.add(db_sync_log)
-                    session.commit()
+                self._bump_sync_generation(session, user.id)
+                session.commit()
+            response_cache.invalidate_user(user.id)
+            SYNCS.inc(status="success")
 
             return records_updated
 
         except Exception as e:
             # Update sync log with error
-            with Session(engine) as session:
+            with Session(writer) as session:
                 db_sync_log = session.get(SyncLog, sync_log.id)
                 if db_sync_log:
                     db_sync_log.status = SyncStatus.ERROR
                     db_sync_log.error_message = str(e)
                     db_sync_log.completed_at = datetime.now(UTC)
+                    db_sync_log.phase_stats = {
+                        step.collection: step.as_dict() for step in step_stats
+                    }
                     session.add(db_sync_log)
-                    session.commit()
+                # Upserts commit individually, so a failed sync may still
+                # have changed data that cached responses were built from
+                self._bump_sync_generation(session, user.id)
+                session.commit()
+            response_cache.invalidate_user(user.id)
+            SYNCS.inc(status="error")
             raise
 
+    async def _sync_srs_systems(
+        self, client: WaniKaniClient, step_stats: list[SyncStepStats]
+    ) -> int:
+        """Refresh the stored SRS systems once SRS_SYSTEMS_TTL_HOURS have passed.
+
+        The request carries the ETag of the last fetch, so WaniKani answers
+        304 Not Modified and no rows are rewritten unless a system changed.
+        """
+        now = datetime.now(UTC)
+        with Session(get_engine()) as session:
+            synced_at, etag = session.exec(
+                select(func.min(SrsSystem.synced_at), func.max(SrsSystem.etag))
+            ).one()
+        if synced_at is not None:
+            # Naive on SQLite
+            synced_at = synced_at.replace(tzinfo=synced_at.tzinfo or UTC)
+            if now - synced_at < timedelta(hours=settings.srs_systems_ttl_hours):
+                return 0
+
+        step = SyncStepStats("spaced_repetition_systems")
+        step_stats.append(step)
+        with step.phase("fetch"):
+            items, etag = await client.get_spaced_repetition_systems(etag, step)
+        with step.phase("write"), Session(get_writer_engine()) as session:
+            if items is None:
+                session.exec(update(SrsSystem).values(synced_at=now))
+            else:
+                for item in items:
+                    system, stages = srs_system_rows(item)
+                    system.etag = etag
+                    system.synced_at = now
+                    session.exec(
+                        delete(SrsStage).where(SrsStage.system_id == system.id)
+                    )
+                    session.merge(system)
+                    session.add_all(stages)
+                    step.rows_written += 1
+            session.commit()
+        step.record()
+        srs_systems.load()
+        return step.rows_written
+
+    async def _ingest_reviews(
+        self, user_id: int, client: WaniKaniClient, step: SyncStepStats
+    ) -> int:
+        """Stream the user's new reviews into the database in batches.
+
+        Pages are written as they arrive, in batches of REVIEW_BATCH_SIZE
+        rows that skip reviews already stored.
+        The watermark only moves once every page is in: pages come in id
+        order rather than update order, so an interrupted run starts again
+        from the old watermark and its rows are skipped as duplicates.
+        """
+        writer = get_writer_engine()
+        with Session(get_engine()) as session:
+            watermark = session.exec(
+                select(User.reviews_updated_at).where(User.id == user_id)
+            ).one()
+
+        inserted = 0
+        newest = watermark
+        batch: list[dict] = []
+
+        def write_batch():
+            nonlocal inserted
+            with step.phase("write"), writer.begin() as connection:
+                inserted_ids = insert_reviews(connection, batch)
+                add_review_rollups(
+                    connection,
+                    user_id,
+                    [row for row in batch if row["id"] in inserted_ids],
+                )
+            count = len(inserted_ids)
+            inserted += count
+            step.rows_written += count
+            step.rows_skipped += len(batch) - count
+            batch.clear()
+
+        # Stored as naive UTC; WaniKani needs the offset
+        updated_after = watermark.replace(tzinfo=UTC) if watermark else None
+        pages = client.iter_reviews(updated_after=updated_after, stats=step)
+        while True:
+            with step.phase("fetch"):
+                page = await anext(pages, None)
+            if page is None:
+                break
+            with step.phase("parse"):
+                for item in page:
+                    row = review_row(user_id, item)
+                    batch.append(row)
+                    updated_at = row["data_updated_at"]
+                    if updated_at and (newest is None or updated_at > newest):
+                        newest = updated_at
+            if len(batch) >= settings.review_batch_size:
+                write_batch()
+        if batch:
+            write_batch()
+
+        if newest != watermark:
+            with Session(writer) as session:
+                session.exec(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(reviews_updated_at=newest)
+                )
+                session.commit()
+        logger.info(f"Ingested {inserted} reviews for user {user_id}")
+        return inserted
+
+    @staticmethod
+    def _bump_sync_generation(session: Session, user_id: int | None):
+        """Advance the user's sync generation so cached responses go stale.
+
+        Also records when the sync committed, which replica reads compare
+        with the replica's lag.
+        """
+        session.exec(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                sync_generation=User.sync_generation + 1, synced_at=datetime.now(UTC)
+            )
+        )
+
     async def _upsert_subject(self, subject_data: dict):
         """Insert or update a subject record"""
-        engine = get_engine()
+        engine = get_writer_engine()
+
+        # Materialise the values read paths need so they never parse the JSON
+        derived_fields = {
+            "primary_meaning": primary_meaning(subject_data["meanings"]),
+            "primary_reading": primary_reading(subject_data.get("readings")),
+            "search_key": subject_search_key(
+                subject_data.get("characters"),
+                subject_data["slug"],
+                subject_data["meanings"],
+                subject_data.get("readings"),
+            ),
+        }
 
         with Session(engine) as session:
             existing_subject = session.get(Subject, subject_data["id"])
@@ -329,6 +769,9 @@ class SyncService:
                 existing_subject.characters = subject_data.get("characters")
                 existing_subject.meanings = subject_data["meanings"]
                 existing_subject.readings = subject_data.get("readings")
+                existing_subject.primary_meaning = derived_fields["primary_meaning"]
+                existing_subject.primary_reading = derived_fields["primary_reading"]
+                existing_subject.search_key = derived_fields["search_key"]
                 existing_subject.component_subject_ids = subject_data.get(
                     "component_subject_ids"
                 )
@@ -336,6 +779,9 @@ class SyncService:
                     "amalgamation_subject_ids"
                 )
                 existing_subject.document_url = subject_data["document_url"]
+                existing_subject.spaced_repetition_system_id = subject_data.get(
+                    "spaced_repetition_system_id"
+                )
                 existing_subject.data_updated_at = datetime.fromisoformat(
                     subject_data["data_updated_at"].replace("Z", "+00:00")
                 )
@@ -354,11 +800,15 @@ class SyncService:
                     characters=subject_data.get("characters"),
                     meanings=subject_data["meanings"],
                     readings=subject_data.get("readings"),
+                    **derived_fields,
                     component_subject_ids=subject_data.get("component_subject_ids"),
                     amalgamation_subject_ids=subject_data.get(
                         "amalgamation_subject_ids"
                     ),
                     document_url=subject_data["document_url"],
+                    spaced_repetition_system_id=subject_data.get(
+                        "spaced_repetition_system_id"
+                    ),
                     data_updated_at=datetime.fromisoformat(
                         subject_data["data_updated_at"].replace("Z", "+00:00")
                     ),
@@ -374,7 +824,7 @@ class SyncService:
 
     async def _upsert_assignment(self, user_id: int, assignment_data: dict):
         """Insert or update an assignment record"""
-        engine = get_engine()
+        engine = get_writer_engine()
 
         # Get the assignment ID from the right place
         assignment_id = assignment_data.get("id")
@@ -385,8 +835,11 @@ class SyncService:
         with Session(engine) as session:
             existing_assignment = session.get(Assignment, assignment_id)
 
+            passed_before = burned_before = None
             if existing_assignment:
                 # Update existing
+                passed_before = existing_assignment.passed_at
+                burned_before = existing_assignment.burned_at
                 existing_assignment.srs_stage = assignment_data["srs_stage"]
                 existing_assignment.unlocked_at = (
                     datetime.fromisoformat(
@@ -433,6 +886,7 @@ class SyncService:
                 existing_assignment.hidden = assignment_data.get("hidden", False)
                 existing_assignment.data_updated_at = datetime.now(UTC)
                 session.add(existing_assignment)
+                assignment = existing_assignment
             else:
                 # Create new
                 assignment = Assignment(
@@ -476,15 +930,67 @@ class SyncService:
                 )
                 session.add(assignment)
 
+            # Passes and burns count towards the day they happened on
+            add_rollups(
+                session.connection(),
+                user_id,
+                progress_deltas(
+                    SubjectType(assignment_data["subject_type"]),
+                    passed_before,
+                    assignment.passed_at,
+                    burned_before,
+                    assignment.burned_at,
+                ),
+            )
+            session.commit()
+
+    @staticmethod
+    def _prune_leech_changes(user_id: int | None):
+        """Drop leech change records older than the retention window"""
+        cutoff = datetime.now(UTC) - timedelta(
+            days=settings.leech_change_retention_days
+        )
+        with Session(get_writer_engine()) as session:
+            session.exec(
+                delete(LeechChange).where(
+                    LeechChange.user_id == user_id, LeechChange.created_at < cutoff
+                )
+            )
             session.commit()
 
-    async def _upsert_review_statistic(self, user_id: int, stats_data: dict):
+    async def _upsert_review_statistic(
+        self,
+        user_id: int,
+        stats_data: dict,
+        sync_log_id: int | None = None,
+        track_leech_changes: bool = True,
+    ):
         """Insert or update a review statistic record"""
-        engine = get_engine()
+        engine = get_writer_engine()
+
+        score = leech_score(
+            stats_data["meaning_incorrect"],
+            stats_data["reading_incorrect"],
+            stats_data["meaning_current_streak"],
+            stats_data["reading_current_streak"],
+        )
 
         with Session(engine) as session:
             existing_stats = session.get(ReviewStatistic, stats_data["id"])
 
+            # Record items crossing the leech threshold in this sync
+            if track_leech_changes:
+                change = leech_change(
+                    user_id,
+                    stats_data["subject_id"],
+                    existing_stats.leech_score if existing_stats else 0.0,
+                    score,
+                    settings.leech_score_threshold,
+                    sync_log_id,
+                )
+                if change:
+                    session.add(change)
+
             if existing_stats:
                 # Update existing
                 existing_stats.meaning_correct = stats_data["meaning_correct"]
@@ -500,6 +1006,7 @@ class SyncService:
                     "reading_current_streak"
                 ]
                 existing_stats.percentage_correct = stats_data["percentage_correct"]
+                existing_stats.leech_score = score
                 existing_stats.hidden = stats_data["hidden"]
                 existing_stats.data_updated_at = datetime.fromisoformat(
                     stats_data["data_updated_at"].replace("Z", "+00:00")
@@ -521,6 +1028,7 @@ class SyncService:
                     reading_max_streak=stats_data["reading_max_streak"],
                     reading_current_streak=stats_data["reading_current_streak"],
                     percentage_correct=stats_data["percentage_correct"],
+                    leech_score=score,
                     hidden=stats_data["hidden"],
                     data_updated_at=datetime.fromisoformat(
                         stats_data["data_updated_at"].replace("Z", "+00:00")
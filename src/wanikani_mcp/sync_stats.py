@@ -0,0 +1,79 @@
+import math
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, col, select
+
+from .models import SyncLog, SyncStatus
+
+PHASE_FIELDS = ("fetch_ms", "rate_limit_wait_ms", "parse_ms", "write_ms")
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of the values, or None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _distribution(values: list[float]) -> dict[str, float | None]:
+    return {
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+    }
+
+
+def sync_summary(session: Session, since: datetime) -> dict[str, Any]:
+    """Summarise sync duration and throughput across users since a time.
+
+    Durations and rows per second cover successful syncs only. Per-collection
+    phase timings come from SyncLog.phase_stats, which older syncs lack.
+    """
+    rows = session.exec(
+        select(
+            SyncLog.user_id,
+            SyncLog.status,
+            SyncLog.started_at,
+            SyncLog.completed_at,
+            SyncLog.records_updated,
+            SyncLog.phase_stats,
+        ).where(
+            col(SyncLog.started_at) >= since,
+            col(SyncLog.completed_at).is_not(None),
+        )
+    ).all()
+
+    durations: list[float] = []
+    throughputs: list[float] = []
+    phase_values: dict[str, dict[str, list[float]]] = {}
+    errors = 0
+    for _, status, started_at, completed_at, records_updated, phase_stats in rows:
+        if status != SyncStatus.SUCCESS:
+            errors += 1
+            continue
+        seconds = (completed_at - started_at).total_seconds()
+        durations.append(seconds)
+        if seconds > 0:
+            throughputs.append(records_updated / seconds)
+        for collection, stats in (phase_stats or {}).items():
+            values = phase_values.setdefault(collection, {})
+            for field in (*PHASE_FIELDS, "rows_written"):
+                values.setdefault(field, []).append(stats.get(field, 0))
+
+    return {
+        "since": since.isoformat(),
+        "syncs": len(durations),
+        "errors": errors,
+        "users": len({row[0] for row in rows}),
+        "duration_seconds": _distribution(durations),
+        "rows_per_second": _distribution(throughputs),
+        "collections": {
+            collection: {
+                field: _distribution(field_values)
+                for field, field_values in values.items()
+            }
+            for collection, values in sorted(phase_values.items())
+        },
+    }
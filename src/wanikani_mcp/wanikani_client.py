@@ -1,10 +1,22 @@
 import asyncio
+import time
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
 import httpx
 
 from .config import settings
+from .metrics import (
+    WANIKANI_RATE_LIMIT_WAIT,
+    WANIKANI_REQUEST_DURATION,
+    WANIKANI_REQUESTS,
+    SyncStepStats,
+)
+
+# Retries of a request WaniKani answered with 429 Too Many Requests
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_WAIT_SECONDS = 60.0
 
 
 class RateLimiter:
@@ -57,97 +69,173 @@ class WaniKaniClient:
     async def close(self):
         await self.client.aclose()
 
-    async def _get(self, endpoint: str, params: dict | None = None) -> dict[str, Any]:
-        # Apply rate limiting
-        await self._rate_limiter.acquire()
-
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
+    async def _get(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> dict[str, Any]:
+        response = await self._request(endpoint, params, stats)
         return response.json()
 
-    async def get_user(self) -> dict[str, Any]:
-        return await self._get("user")
+    async def _get_if_changed(
+        self,
+        endpoint: str,
+        etag: str | None,
+        stats: SyncStepStats | None = None,
+    ) -> tuple[dict[str, Any] | None, str | None]:
+        """GET with If-None-Match; (None, etag) when nothing changed"""
+        headers = {"If-None-Match": etag} if etag else None
+        response = await self._request(endpoint, None, stats, headers)
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), response.headers.get("ETag")
+
+    async def _request(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        stats: SyncStepStats | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        # Label by collection, not by page cursor or resource id
+        endpoint_label = endpoint.lstrip("/").split("?")[0].split("/")[0]
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
-    async def get_subjects(
-        self, updated_after: datetime | None = None
-    ) -> list[dict[str, Any]]:
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            # Apply rate limiting
+            wait_start = time.perf_counter()
+            await self._rate_limiter.acquire()
+            wait = time.perf_counter() - wait_start
+            WANIKANI_RATE_LIMIT_WAIT.observe(wait)
+            if stats is not None:
+                stats.rate_limit_wait += wait
+
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(url, params=params, headers=headers)
+            except httpx.HTTPError:
+                WANIKANI_REQUESTS.inc(endpoint=endpoint_label, status="error")
+                raise
+            finally:
+                WANIKANI_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, endpoint=endpoint_label
+                )
+            WANIKANI_REQUESTS.inc(endpoint=endpoint_label, status=response.status_code)
+
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            # Our limiter and WaniKani's disagree (e.g. several processes share
+            # a key), so wait for the server's window to reset and try again
+            retry_wait = self._retry_wait(response, attempt)
+            if stats is not None:
+                stats.rate_limit_wait += retry_wait
+            await asyncio.sleep(retry_wait)
+
+        if stats is not None:
+            stats.pages += 1
+            stats.bytes += len(response.content)
+        # httpx counts 304 Not Modified as a redirect, but it answers a
+        # conditional request
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _retry_wait(response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait after a 429, from WaniKani's rate limit headers"""
+        if reset := response.headers.get("RateLimit-Reset"):
+            wait = float(reset) - time.time()
+        elif retry_after := response.headers.get("Retry-After"):
+            wait = float(retry_after)
+        else:
+            wait = 2.0**attempt
+        return min(max(wait, 0.0), MAX_RETRY_WAIT_SECONDS)
+
+    async def _iter_collection(
+        self,
+        endpoint: str,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield a collection endpoint's items one page at a time"""
         params: dict[str, str] | None = {}
         if updated_after:
             params["updated_after"] = updated_after.isoformat()
 
-        all_subjects = []
-        url = "subjects"
+        url = endpoint
 
         while url:
-            data = await self._get(url, params)
-            all_subjects.extend(data["data"])
+            data = await self._get(url, params, stats)
+            yield data["data"]
             url = data["pages"]["next_url"]
             if url:
                 url = url.replace(self.base_url + "/", "")
                 params = None
 
-        return all_subjects
-
-    async def get_assignments(
-        self, updated_after: datetime | None = None
+    async def _get_collection(
+        self,
+        endpoint: str,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
     ) -> list[dict[str, Any]]:
-        params: dict[str, str] | None = {}
-        if updated_after:
-            params["updated_after"] = updated_after.isoformat()
+        """Fetch every page of a collection endpoint"""
+        items = []
+        async for page in self._iter_collection(endpoint, updated_after, stats):
+            items.extend(page)
+        return items
 
-        all_assignments = []
-        url = "assignments"
+    async def get_user(self) -> dict[str, Any]:
+        return await self._get("user")
 
-        while url:
-            data = await self._get(url, params)
-            all_assignments.extend(data["data"])
-            url = data["pages"]["next_url"]
-            if url:
-                url = url.replace(self.base_url + "/", "")
-                params = None
+    async def get_subjects(
+        self,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> list[dict[str, Any]]:
+        return await self._get_collection("subjects", updated_after, stats)
 
-        return all_assignments
+    async def get_assignments(
+        self,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> list[dict[str, Any]]:
+        return await self._get_collection("assignments", updated_after, stats)
 
     async def get_reviews(
-        self, updated_after: datetime | None = None
+        self,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
     ) -> list[dict[str, Any]]:
-        params: dict[str, str] | None = {}
-        if updated_after:
-            params["updated_after"] = updated_after.isoformat()
-
-        all_reviews = []
-        url = "reviews"
-
-        while url:
-            data = await self._get(url, params)
-            all_reviews.extend(data["data"])
-            url = data["pages"]["next_url"]
-            if url:
-                url = url.replace(self.base_url + "/", "")
-                params = None
+        return await self._get_collection("reviews", updated_after, stats)
 
-        return all_reviews
+    def iter_reviews(
+        self,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield review history page by page; heavy users have 100k+ reviews"""
+        return self._iter_collection("reviews", updated_after, stats)
 
     async def get_review_statistics(
-        self, updated_after: datetime | None = None
+        self,
+        updated_after: datetime | None = None,
+        stats: SyncStepStats | None = None,
     ) -> list[dict[str, Any]]:
-        params: dict[str, str] | None = {}
-        if updated_after:
-            params["updated_after"] = updated_after.isoformat()
-
-        all_stats = []
-        url = "review_statistics"
-
-        while url:
-            data = await self._get(url, params)
-            all_stats.extend(data["data"])
-            url = data["pages"]["next_url"]
-            if url:
-                url = url.replace(self.base_url + "/", "")
-                params = None
-
-        return all_stats
+        return await self._get_collection("review_statistics", updated_after, stats)
+
+    async def get_spaced_repetition_systems(
+        self, etag: str | None = None, stats: SyncStepStats | None = None
+    ) -> tuple[list[dict[str, Any]] | None, str | None]:
+        """Fetch the SRS systems unless they are unchanged since `etag`.
+
+        There are only a couple of systems, so they fit on one page.
+        Returns the systems (None if unchanged) and the current ETag.
+        """
+        data, etag = await self._get_if_changed(
+            "spaced_repetition_systems", etag, stats
+        )
+        return (data["data"] if data is not None else None), etag
 
     async def get_summary(self) -> dict[str, Any]:
         """Get summary with current lesson and review counts"""
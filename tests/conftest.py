@@ -1,14 +1,22 @@
+import asyncio
 from datetime import UTC, datetime, timedelta
 
 import pytest
 from sqlmodel import Session, SQLModel, create_engine
 
+from benchmarks.datagen import Dataset
+from benchmarks.run import DatasetClient
+from wanikani_mcp import database
+from wanikani_mcp import sync_service as sync_service_module
+from wanikani_mcp.cache import response_cache
+from wanikani_mcp.graph import subject_graph
 from wanikani_mcp.models import (
     Assignment,
     LevelProgression,
     Review,
     ReviewStatistic,
     SrsStage,
+    SrsSystem,
     StudyMaterial,
     Subject,
     SubjectType,
@@ -18,6 +26,8 @@ from wanikani_mcp.models import (
     User,
     VoiceActor,
 )
+from wanikani_mcp.srs import srs_systems
+from wanikani_mcp.sync_service import SyncService
 
 
 @pytest.fixture
@@ -42,6 +52,36 @@ def sample_user():
     )
 
 
+@pytest.fixture
+def synced_user(request, engine, session, sample_user, monkeypatch):
+    """A user with a full sync of a generated account behind them.
+
+    The account defaults to 200 subjects from seed 3; pass other `Dataset`
+    arguments with `@pytest.mark.parametrize("synced_user", [{...}],
+    indirect=True)`.
+    """
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "writer_engine", None)
+    monkeypatch.setattr(sync_service_module, "WaniKaniClient", DatasetClient)
+    options = {"users": 1, "subjects": 200, "seed": 3}
+    dataset = Dataset(**{**options, **getattr(request, "param", {})})
+    monkeypatch.setattr(DatasetClient, "dataset", dataset, raising=False)
+    # The sync loads the global SRS systems and rebuilds the global graph
+    # from this test's database: restore both afterwards
+    monkeypatch.setattr(srs_systems, "_systems", srs_systems._systems)
+    monkeypatch.setattr(srs_systems, "_loaded_at", None)
+    for name in ("_graph", "_signature", "_checked_at", "version"):
+        monkeypatch.setattr(subject_graph, name, getattr(subject_graph, name))
+    data = next(iter(dataset.users.values()))
+    sample_user.wanikani_api_key = data.api_key
+    session.add(sample_user)
+    session.commit()
+    response_cache.clear()
+    asyncio.run(SyncService()._sync_user_data(sample_user))
+    yield session.get(User, sample_user.id)
+    response_cache.clear()
+
+
 @pytest.fixture
 def sample_subject():
     return Subject(
@@ -52,6 +92,9 @@ def sample_subject():
         characters="一",
         meanings=[{"meaning": "one", "primary": True}],
         readings=[{"reading": "いち", "primary": True, "type": "onyomi"}],
+        primary_meaning="one",
+        primary_reading="いち",
+        search_key="一|one|いち",
         document_url="https://www.wanikani.com/kanji/一",
     )
 
@@ -65,6 +108,8 @@ def sample_radical():
         slug="ground",
         characters="一",
         meanings=[{"meaning": "ground", "primary": True}],
+        primary_meaning="ground",
+        search_key="一|ground",
         document_url="https://www.wanikani.com/radicals/ground",
     )
 
@@ -79,6 +124,9 @@ def sample_vocabulary():
         characters="一つ",
         meanings=[{"meaning": "one thing", "primary": True}],
         readings=[{"reading": "ひとつ", "primary": True}],
+        primary_meaning="one thing",
+        primary_reading="ひとつ",
+        search_key="一つ|one thing|ひとつ",
         component_subject_ids=[1],
         document_url="https://www.wanikani.com/vocabulary/一つ",
     )
@@ -132,14 +180,22 @@ def sample_review_statistic(sample_user, sample_subject):
 
 
 @pytest.fixture
-def sample_srs_stage():
+def sample_srs_system():
+    return SrsSystem(
+        id=2,
+        name="Wanikani",
+        unlocking_stage_position=0,
+        starting_stage_position=1,
+        passing_stage_position=5,
+        burning_stage_position=9,
+    )
+
+
+@pytest.fixture
+def sample_srs_stage(sample_srs_system):
     return SrsStage(
-        id=1,
+        system_id=2,
         position=1,
-        meaning_correct=1,
-        meaning_incorrect=0,
-        reading_correct=1,
-        reading_incorrect=0,
         interval=14400000,  # 4 hours in milliseconds
         interval_unit="milliseconds",
     )
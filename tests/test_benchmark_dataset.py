@@ -0,0 +1,34 @@
+from datetime import UTC, datetime, timedelta
+
+from benchmarks.datagen import Dataset, parse_iso
+
+
+def test_dataset_is_deterministic():
+    first = Dataset(users=2, subjects=300, seed=7)
+    second = Dataset(users=2, subjects=300, seed=7)
+
+    assert len(first.subjects) == 300
+    assert first.subjects[10]["data"]["slug"] == second.subjects[10]["data"]["slug"]
+    assert [user.level for user in first.users.values()] == [
+        user.level for user in second.users.values()
+    ]
+
+
+def test_page_follows_ids_and_updated_after():
+    dataset = Dataset(users=1, subjects=300, seed=7)
+    api_key = next(iter(dataset.users))
+
+    first = dataset.page(api_key, "subjects", per_page=100)
+    assert len(first["data"]) == 100
+    assert first["total_count"] == 300
+    assert "page_after_id=100" in first["pages"]["next_url"]
+
+    last = dataset.page(api_key, "subjects", page_after_id=200, per_page=100)
+    assert [item["id"] for item in last["data"]][0] == 201
+    assert last["pages"]["next_url"] is None
+
+    since = datetime.now(UTC) - timedelta(minutes=1)
+    changed = dataset.touch(0.5)
+    updated = dataset.page(api_key, "assignments", updated_after=since)
+    assert 0 < updated["total_count"] <= changed
+    assert all(parse_iso(item["data_updated_at"]) > since for item in updated["data"])
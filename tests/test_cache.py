@@ -0,0 +1,76 @@
+import time
+
+from wanikani_mcp.cache import ResponseCache
+from wanikani_mcp.models import User
+from wanikani_mcp.sync_service import SyncService
+
+
+def test_cache_hit_and_miss():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+
+    assert cache.get(1, 0, "get_leeches", {"limit": 10}) is None
+    cache.set(1, 0, "get_leeches", {"limit": 10}, "leeches")
+
+    assert cache.get(1, 0, "get_leeches", {"limit": 10}) == "leeches"
+    assert cache.get(1, 0, "get_leeches", {"limit": 5}) is None
+    assert cache.get(2, 0, "get_leeches", {"limit": 10}) is None
+    assert cache.hits == 1
+    assert cache.misses == 3
+
+
+def test_cache_arguments_are_normalized():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set(1, 0, "tool", {"a": 1, "b": 2}, "value")
+
+    assert cache.get(1, 0, "tool", {"b": 2, "a": 1}) == "value"
+
+
+def test_cache_generation_change_misses():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set(1, 0, "user_progress", None, "old")
+
+    assert cache.get(1, 1, "user_progress") is None
+
+
+def test_cache_expiry():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set(1, 0, "review_forecast", None, "forecast", expires_in=0)
+
+    time.sleep(0.001)
+    assert cache.get(1, 0, "review_forecast") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set(1, 0, "a", None, "a")
+    cache.set(1, 0, "b", None, "b")
+    cache.get(1, 0, "a")
+    cache.set(1, 0, "c", None, "c")
+
+    assert cache.get(1, 0, "a") == "a"
+    assert cache.get(1, 0, "b") is None
+    assert cache.get(1, 0, "c") == "c"
+
+
+def test_cache_invalidate_user():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set(1, 0, "a", None, "a")
+    cache.set(2, 0, "a", None, "a")
+
+    cache.invalidate_user(1)
+
+    assert cache.get(1, 0, "a") is None
+    assert cache.get(2, 0, "a") == "a"
+
+
+def test_bump_sync_generation(session, sample_user):
+    session.add(sample_user)
+    session.commit()
+
+    SyncService._bump_sync_generation(session, sample_user.id)
+    session.commit()
+    session.refresh(sample_user)
+
+    assert sample_user.sync_generation == 1
+    assert session.get(User, sample_user.id).sync_generation == 1
@@ -0,0 +1,188 @@
+import asyncio
+import json
+
+import pytest
+
+from wanikani_mcp import database
+from wanikani_mcp.catalog import (
+    CatalogSubject,
+    SubjectCatalog,
+    normalize_search_text,
+    primary_meaning,
+    primary_reading,
+    subject_search_key,
+)
+from wanikani_mcp.models import Assignment, Subject, SubjectType
+
+
+@pytest.fixture
+def catalog(engine, session, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    return SubjectCatalog(refresh_seconds=600)
+
+
+def test_primary_meaning_and_reading():
+    meanings = [
+        {"meaning": "One", "primary": False},
+        {"meaning": "one", "primary": True},
+    ]
+    readings = [{"reading": "いち", "primary": True, "type": "onyomi"}]
+
+    assert primary_meaning(meanings) == "one"
+    assert primary_reading(readings) == "いち"
+    assert primary_meaning([]) is None
+    assert primary_reading(None) is None
+
+
+def test_subject_search_key():
+    key = subject_search_key(
+        "一つ",
+        "一つ",
+        [{"meaning": "One Thing", "primary": True}, {"meaning": "one thing"}],
+        [{"reading": "ひとつ", "primary": True}],
+    )
+
+    assert key == "一つ|one thing|ひとつ"
+    assert normalize_search_text("  ＯＮＥ  Thing ") == "one thing"
+
+
+def test_catalog_subject_from_row(sample_subject, sample_radical):
+    kanji = CatalogSubject.from_row(sample_subject)
+    radical = CatalogSubject.from_row(sample_radical)
+
+    assert kanji.object_type == "kanji"
+    assert kanji.primary_meaning == "one"
+    assert kanji.primary_reading == "いち"
+    assert radical.primary_reading is None
+    assert not hasattr(kanji, "__dict__")
+
+
+def test_catalog_load(catalog, session, sample_subject, sample_radical):
+    session.add(sample_subject)
+    session.add(sample_radical)
+    session.commit()
+
+    catalog.load()
+
+    assert len(catalog) == 2
+    assert catalog.get(1).primary_meaning == "one"
+    assert catalog.get(2).display == "一"
+    assert catalog.memory_footprint() > 0
+
+
+def test_catalog_get_many_loads_missing(catalog, session, sample_subject):
+    session.add(sample_subject)
+    session.commit()
+    catalog.load()
+    version = catalog.version
+
+    session.add(
+        Subject(
+            id=5,
+            object_type=SubjectType.VOCABULARY,
+            level=2,
+            slug="二つ",
+            characters="二つ",
+            meanings=[{"meaning": "two things", "primary": True}],
+            primary_meaning="two things",
+            document_url="https://www.wanikani.com/vocabulary/二つ",
+        )
+    )
+    session.commit()
+
+    subjects = catalog.get_many([1, 5, 99])
+
+    assert set(subjects) == {1, 5}
+    assert subjects[5].primary_meaning == "two things"
+    assert catalog.version > version
+
+
+def test_catalog_remembers_missing_subjects_until_the_next_refresh(
+    catalog, session, sample_subject, monkeypatch
+):
+    session.add(sample_subject)
+    session.commit()
+    catalog.load()
+    lookups = []
+    refresh = catalog.refresh
+
+    def counting(subject_ids=None):
+        lookups.append(None if subject_ids is None else sorted(subject_ids))
+        refresh(subject_ids)
+
+    monkeypatch.setattr(catalog, "refresh", counting)
+    assert set(catalog.get_many([1, 99])) == {1}
+    assert set(catalog.get_many([1, 99])) == {1}
+    assert lookups == [[99]]
+
+    # Synced later: the periodic refresh forgets what was missing
+    session.add(
+        Subject(
+            id=99,
+            object_type=SubjectType.RADICAL,
+            level=3,
+            slug="ninety-nine",
+            meanings=[],
+            document_url="https://www.wanikani.com/radicals/ninety-nine",
+        )
+    )
+    session.commit()
+    catalog.refresh()
+    assert set(catalog.get_many([1, 99])) == {1, 99}
+    assert lookups == [[99], None]
+
+
+def test_catalog_refresh_updates_changed_subjects(catalog, session, sample_subject):
+    session.add(sample_subject)
+    session.commit()
+    catalog.load()
+
+    sample_subject.primary_meaning = "single"
+    session.add(sample_subject)
+    session.commit()
+    catalog.refresh([1])
+
+    assert catalog.get(1).primary_meaning == "single"
+
+
+def test_item_search_treats_like_wildcards_literally(
+    catalog, session, sample_user, sample_subject, monkeypatch
+):
+    from wanikani_mcp import handlers
+
+    monkeypatch.setattr(handlers, "subject_catalog", catalog)
+    percent = Subject(
+        id=7,
+        object_type=SubjectType.VOCABULARY,
+        level=9,
+        slug="百パーセント",
+        characters="百パーセント",
+        meanings=[{"meaning": "100%", "primary": True}],
+        primary_meaning="100%",
+        search_key=subject_search_key(
+            "百パーセント", "百パーセント", [{"meaning": "100%"}], []
+        ),
+        document_url="https://www.wanikani.com/vocabulary/百パーセント",
+    )
+    session.add_all([sample_user, sample_subject, percent])
+    session.commit()
+    for subject in (sample_subject, percent):
+        session.add(
+            Assignment(
+                id=subject.id,
+                user_id=sample_user.id,
+                subject_id=subject.id,
+                subject_type=subject.object_type,
+                srs_stage=1,
+            )
+        )
+    session.commit()
+
+    def search(text):
+        uri = f"wanikani://item_database?mcp_api_key=test-mcp-key&search={text}"
+        response = json.loads(asyncio.run(handlers.read_resource(uri)))
+        return [item["id"] for item in response["items"]]
+
+    assert search("%25") == [7]
+    assert search("_") == []
+    assert search("one") == [1]
@@ -1,4 +1,5 @@
-from sqlmodel import Session, SQLModel, create_engine
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
 
 from wanikani_mcp.database import get_session
 
@@ -100,3 +101,169 @@ def test_database_foreign_keys():
         assert retrieved_assignment is not None
         assert retrieved_assignment.user.username == "test"
         assert retrieved_assignment.subject.slug == "test"
+
+
+def test_schema_revision_is_alembic_head():
+    from pathlib import Path
+
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    from wanikani_mcp.database import SCHEMA_REVISION
+
+    root = Path(__file__).parents[1]
+    config = Config(root / "alembic.ini")
+    config.set_main_option("script_location", str(root / "alembic"))
+
+    assert ScriptDirectory.from_config(config).get_current_head() == SCHEMA_REVISION
+
+
+def test_ensure_schema_stamps_a_new_database(tmp_path, monkeypatch):
+    from wanikani_mcp import database
+
+    engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.ensure_schema()
+    assert database.schema_revision(engine) == database.SCHEMA_REVISION
+
+    # A current database skips create_all entirely
+    def fail():
+        raise AssertionError("create_all should not run")
+
+    monkeypatch.setattr(database, "create_tables", fail)
+    database.ensure_schema()
+
+
+def test_ensure_schema_leaves_older_revisions_to_alembic(tmp_path, monkeypatch):
+    from wanikani_mcp import database
+
+    engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    monkeypatch.setattr(database, "engine", engine)
+    with engine.begin() as connection:
+        database.alembic_version.create(connection)
+        connection.execute(
+            database.alembic_version.insert().values(version_num="9d90676243fe")
+        )
+
+    database.ensure_schema()
+
+    from sqlalchemy import inspect
+
+    # Missing tables are still created, but the revision is not moved
+    assert inspect(engine).has_table("user")
+    assert database.schema_revision(engine) == "9d90676243fe"
+
+
+def test_sqlite_file_engines_get_the_performance_pragmas(tmp_path):
+    from wanikani_mcp import database
+
+    engine = database.make_engine(f"sqlite:///{tmp_path}/pragmas.db")
+    with engine.connect() as connection:
+
+        def pragma(name):
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == database.settings.sqlite_busy_timeout_ms
+        assert pragma("cache_size") == -database.settings.sqlite_cache_size_kib
+    engine.dispose()
+
+    # In-memory databases are left as they are
+    assert not database.is_sqlite_file("sqlite:///:memory:")
+    assert not database.is_sqlite_file("postgresql://localhost/wanikani")
+
+
+def test_writer_engine_is_shared_for_in_memory_databases(monkeypatch):
+    from wanikani_mcp import database
+
+    engine = create_engine("sqlite:///:memory:")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "writer_engine", None)
+
+    assert database.get_writer_engine() is engine
+
+
+def test_sqlite_writes_are_serialised_while_reads_continue(tmp_path, monkeypatch):
+    from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+    from wanikani_mcp import database
+    from wanikani_mcp.models import User
+
+    engine = database.make_engine(f"sqlite:///{tmp_path}/writer.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "writer_engine", None)
+    monkeypatch.setattr(database.settings, "sqlite_writer_timeout_seconds", 0.1)
+    SQLModel.metadata.create_all(engine)
+    writer = database.get_writer_engine()
+    assert writer is not engine
+    assert database.get_writer_engine() is writer
+
+    with Session(writer) as session:
+        session.add(
+            User(wanikani_api_key="wk", mcp_api_key="mcp", username="u", level=1)
+        )
+        session.flush()
+
+        # The single writer connection is taken...
+        with pytest.raises(PoolTimeout), writer.connect():
+            pass
+        # ...but WAL readers are not blocked and see the last commit
+        with Session(engine) as reader:
+            assert reader.exec(select(User)).all() == []
+
+        session.commit()
+
+    with Session(engine) as reader:
+        assert len(reader.exec(select(User)).all()) == 1
+    database.dispose_engines()
+
+
+def test_pool_settings_apply_to_pooled_engines(monkeypatch):
+    from wanikani_mcp import database
+
+    monkeypatch.setattr(database.settings, "database_pool_size", 7)
+    monkeypatch.setattr(database.settings, "database_pool_recycle_seconds", 600)
+
+    options = database.pool_options("postgresql://db/wanikani", "primary")
+    assert options["pool_size"] == 7
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 600
+    # SQLite files are pooled but never go stale; memory databases are not
+    assert "pool_pre_ping" not in database.pool_options("sqlite:///x.db", "primary")
+    assert database.pool_options("sqlite:///:memory:", "primary") == {}
+
+
+def test_pool_reports_checkouts_and_timeouts(tmp_path):
+    from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+    from wanikani_mcp import database
+    from wanikani_mcp.metrics import (
+        DB_POOL_CAPACITY,
+        DB_POOL_CHECKED_OUT,
+        DB_POOL_CHECKOUT_WAIT,
+        DB_POOL_TIMEOUTS,
+    )
+
+    engine = database.make_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        "pool-test",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    assert DB_POOL_CAPACITY.value(engine="pool-test") == 1
+
+    with engine.connect():
+        assert DB_POOL_CHECKED_OUT.value(engine="pool-test") == 1
+        with pytest.raises(PoolTimeout), engine.connect():
+            pass
+    assert DB_POOL_CHECKED_OUT.value(engine="pool-test") == 0
+    assert DB_POOL_TIMEOUTS.value(engine="pool-test") == 1
+    assert DB_POOL_CHECKOUT_WAIT.count(engine="pool-test") == 2
+
+    # Labels survive the pool being recreated
+    engine.dispose()
+    with engine.connect():
+        assert DB_POOL_CHECKED_OUT.value(engine="pool-test") == 1
+    engine.dispose()
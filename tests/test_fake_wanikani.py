@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+from benchmarks.datagen import Dataset
+from benchmarks.fake_wanikani import FakeApiOptions, create_fake_api
+
+
+def make_client(**options) -> tuple[TestClient, str]:
+    dataset = Dataset(users=1, subjects=300, seed=7)
+    app = create_fake_api(dataset, FakeApiOptions(**options))
+    return TestClient(app), next(iter(dataset.users))
+
+
+def test_fake_api_pages_like_wanikani():
+    client, api_key = make_client(page_size=100)
+    headers = {"Authorization": f"Bearer {api_key}"}
+
+    first = client.get("/v2/subjects", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["RateLimit-Limit"] == "60"
+    body = first.json()
+    assert len(body["data"]) == 100
+    next_url = body["pages"]["next_url"]
+    assert next_url.startswith("http://testserver/v2/subjects")
+
+    second = client.get(next_url, headers=headers).json()
+    assert second["data"][0]["id"] == 101
+
+    assert client.get("/v2/user", headers=headers).json()["object"] == "user"
+    assert client.get("/v2/user").status_code == 401
+
+
+def test_fake_api_enforces_rate_limit():
+    client, api_key = make_client(rate_limit=2)
+    headers = {"Authorization": f"Bearer {api_key}"}
+
+    statuses = [client.get("/v2/user", headers=headers).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    assert client.app.state.throttled == 1
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlmodel import select
+
+from wanikani_mcp.graph import (
+    GRAPH_COLUMNS,
+    Progress,
+    SubjectGraph,
+    critical_path,
+    unlock_impact,
+)
+from wanikani_mcp.models import Assignment, Subject, SubjectType
+from wanikani_mcp.srs import BUILTIN_SYSTEMS
+
+# Radicals 1 and 2; kanji 10 (from 1), 11 (from 1 and 2) and 12 (from 1);
+# vocabulary 20 (from 10 and 11)
+COMPONENTS = {
+    1: ("radical", []),
+    2: ("radical", []),
+    10: ("kanji", [1]),
+    11: ("kanji", [1, 2]),
+    12: ("kanji", [1]),
+    20: ("vocabulary", [10, 11, 404]),
+}
+
+
+def add_subjects(session, level=3):
+    for subject_id, (object_type, components) in COMPONENTS.items():
+        session.add(
+            Subject(
+                id=subject_id,
+                object_type=SubjectType(object_type),
+                level=level,
+                slug=f"{object_type}-{subject_id}",
+                meanings=[],
+                component_subject_ids=components,
+                document_url=f"https://www.wanikani.com/{object_type}/{subject_id}",
+                spaced_repetition_system_id=2,
+            )
+        )
+    session.commit()
+
+
+def build(session) -> SubjectGraph:
+    return SubjectGraph.build(session.exec(select(*GRAPH_COLUMNS)).all())
+
+
+def progress(graph, unlocked, passed) -> Progress:
+    return Progress(
+        unlocked=np.isin(graph.ids, unlocked),
+        passed=np.isin(graph.ids, passed),
+        srs_stage=np.where(np.isin(graph.ids, unlocked), 1, -1),
+    )
+
+
+def test_graph_holds_edges_both_ways(session):
+    add_subjects(session)
+    graph = build(session)
+    [radical, kanji, vocabulary] = graph.index([1, 11, 20])
+
+    assert graph.ids[graph.unlocked_by(radical)].tolist() == [10, 11, 12]
+    assert graph.ids[graph.components_of(kanji)].tolist() == [1, 2]
+    # The unknown component is dropped
+    assert graph.ids[graph.components_of(vocabulary)].tolist() == [10, 11]
+    assert graph.ids[graph.downstream(radical)].tolist() == [10, 11, 12, 20]
+    assert graph.index([404]).tolist() == [-1]
+
+
+def test_unlock_impact_ranks_items_by_what_they_unlock(session):
+    add_subjects(session)
+    graph = build(session)
+    # Radical 1 is passed; 2 and kanji 10 are unlocked but not yet
+    state = progress(graph, unlocked=[1, 2, 10, 12], passed=[1])
+
+    ranked = unlock_impact(graph, state)
+    # Radical 2 is all kanji 11 waits for; kanji 10 shares vocabulary 20
+    # with the still locked 11
+    assert [
+        (item["subject_id"], item["unlocks_on_pass"], item["holds_back"])
+        for item in ranked["items"]
+    ] == [(2, 1, 1), (10, 0, 1)]
+    assert ranked["items"][0]["unlocks"] == [11]
+
+    single = unlock_impact(graph, state, subject_id=1)
+    assert single["status"] == "passed"
+    assert [item["subject_id"] for item in single["unlocks"]] == [10, 11, 12]
+    assert single["downstream_locked"] == 2
+
+    with pytest.raises(ValueError):
+        unlock_impact(graph, state, subject_id=404)
+
+
+def test_critical_path_looks_through_locked_kanji(session, sample_user):
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+    session.add(sample_user)
+    add_subjects(session)
+    assignments = {
+        # subject: (stage, passed)
+        1: (5, True),
+        2: (4, False),
+        10: (4, False),
+        12: (0, False),
+    }
+    for subject_id, (stage, passed) in assignments.items():
+        session.add(
+            Assignment(
+                id=subject_id,
+                user_id=sample_user.id,
+                subject_id=subject_id,
+                subject_type=SubjectType(COMPONENTS[subject_id][0]),
+                srs_stage=stage,
+                unlocked_at=now - timedelta(days=5),
+                available_at=now - timedelta(hours=1) if stage else None,
+                passed_at=now - timedelta(days=1) if passed else None,
+            )
+        )
+    session.commit()
+
+    path = critical_path(
+        session, sample_user.id, 3, now, build(session), BUILTIN_SYSTEMS
+    )
+
+    # All 3 kanji are needed. Kanji 11 unlocks when radical 2 reaches Guru
+    # now, and Guru comes 4 reviews later, like the lesson for kanji 12
+    level_up_at = datetime(2026, 10, 22, 19, tzinfo=UTC)
+    assert path["level_up_at"] == level_up_at.isoformat()
+    assert (path["kanji"], path["kanji_required"], path["kanji_passed"]) == (3, 3, 0)
+    assert [
+        (item["subject_id"], item["slack_hours"], item["holds_back"])
+        for item in path["items"]
+    ] == [(2, 0, [11]), (11, 0, []), (12, 0, []), (10, 81.5, [])]
+    assert path["critical"] == 3
+
+
+@pytest.mark.parametrize("synced_user", [{"subjects": 300, "seed": 11}], indirect=True)
+def test_unlock_tools(session, synced_user):
+    from wanikani_mcp.handlers import call_tool
+
+    arguments = {"mcp_api_key": "test-mcp-key", "limit": 5}
+    [content] = asyncio.run(call_tool("get_unlock_impact", arguments))
+    impact = json.loads(content.text)
+    assert 0 < len(impact["items"]) <= 5
+    assert all(item["characters"] for item in impact["items"])
+
+    subject_id = impact["items"][0]["subject_id"]
+    arguments = {"mcp_api_key": "test-mcp-key", "subject_id": subject_id}
+    [content] = asyncio.run(call_tool("get_unlock_impact", arguments))
+    assert json.loads(content.text)["unlocks_on_pass"] >= 0
+
+    arguments = {"mcp_api_key": "test-mcp-key", "level": 1}
+    [content] = asyncio.run(call_tool("get_critical_path", arguments))
+    path = json.loads(content.text)
+    assert path["level"] == 1
+    assert path["kanji"] >= 1
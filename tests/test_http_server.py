@@ -0,0 +1,158 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from benchmarks.datagen import Dataset
+from benchmarks.run import DatasetClient
+from wanikani_mcp import database
+from wanikani_mcp.catalog import subject_catalog
+from wanikani_mcp.config import settings
+from wanikani_mcp.graph import subject_graph
+from wanikani_mcp.http_server import create_app
+from wanikani_mcp.models import User
+
+
+def test_health_endpoint():
+    client = TestClient(create_app())
+
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+def test_mcp_route_registered():
+    app = create_app()
+
+    paths = {route.path for route in app.routes}
+
+    assert "/mcp" in paths
+
+
+def test_metrics_endpoint():
+    client = TestClient(create_app())
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE wanikani_mcp_tool_calls_total counter" in response.text
+
+
+def rpc(client: TestClient, method: str, params: dict, request_id: int) -> dict:
+    """POST one JSON-RPC request to /mcp and return its response"""
+    response = client.post(
+        "/mcp",
+        json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": params},
+        headers={"Accept": "application/json, text/event-stream"},
+    )
+    assert response.status_code == 200
+    if response.headers["content-type"].startswith("text/event-stream"):
+        data = [
+            line.removeprefix("data:").strip()
+            for line in response.text.splitlines()
+            if line.startswith("data:")
+        ]
+        return json.loads(data[-1])
+    return response.json()
+
+
+@pytest.fixture
+def http_user(monkeypatch):
+    """A registered user in a database shared with the app's threads"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "writer_engine", None)
+    monkeypatch.setattr(settings, "sync_enabled", False)
+    # The lifespan loads the global catalog and graph from this database
+    for name in ("_subjects", "_absent", "_watermark", "_checked_at", "version"):
+        monkeypatch.setattr(subject_catalog, name, getattr(subject_catalog, name))
+    for name in ("_graph", "_signature", "_checked_at", "version"):
+        monkeypatch.setattr(subject_graph, name, getattr(subject_graph, name))
+    dataset = Dataset(users=1, subjects=50, seed=17)
+    monkeypatch.setattr(DatasetClient, "dataset", dataset, raising=False)
+    from wanikani_mcp import handlers
+
+    monkeypatch.setattr(handlers, "WaniKaniClient", DatasetClient)
+    data = next(iter(dataset.users.values()))
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            User(
+                wanikani_api_key=data.api_key,
+                mcp_api_key="test-mcp-key",
+                username="testuser",
+                level=5,
+            )
+        )
+        session.commit()
+    return data
+
+
+def test_stateless_mcp_requests(http_user):
+    with TestClient(create_app()) as client:
+        initialized = rpc(
+            client,
+            "initialize",
+            {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "1.0"},
+            },
+            1,
+        )
+        assert initialized["result"]["serverInfo"]["name"] == "wanikani-mcp"
+
+        # No session id: every request stands on its own
+        tools = rpc(client, "tools/list", {}, 2)["result"]["tools"]
+        assert "get_status" in {tool["name"] for tool in tools}
+
+        arguments = {"mcp_api_key": "test-mcp-key"}
+        called = rpc(
+            client, "tools/call", {"name": "get_status", "arguments": arguments}, 3
+        )
+        [content] = called["result"]["content"]
+        assert content["text"].startswith("WaniKani Status for testuser:")
+
+
+def test_http_workers_leave_sync_to_one_process(monkeypatch):
+    import uvicorn
+
+    from wanikani_mcp import server
+
+    monkeypatch.setattr(settings, "sync_enabled", True)
+    monkeypatch.setenv("SYNC_ENABLED", "true")
+    started = []
+    workers = {}
+
+    class Process:
+        def __init__(self, target, name, daemon):
+            self.target = target
+
+        def start(self):
+            started.append(self.target)
+
+        def terminate(self):
+            pass
+
+        def join(self, timeout=None):
+            pass
+
+    def run(app, **options):
+        workers.update(options, sync_enabled=os.environ["SYNC_ENABLED"])
+
+    monkeypatch.setattr(server.multiprocessing, "Process", Process)
+    monkeypatch.setattr(uvicorn, "run", run)
+    server.run_http_workers(None, None, 4)
+
+    assert started == [server._run_sync_process]
+    assert workers["workers"] == 4
+    assert workers["sync_enabled"] == "false"
@@ -0,0 +1,194 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlmodel import select
+
+from wanikani_mcp import database
+from wanikani_mcp.cache import response_cache
+from wanikani_mcp.catalog import SubjectCatalog
+from wanikani_mcp.leeches import (
+    leech_change,
+    leech_score,
+    recent_leech_changes,
+    top_leeches,
+)
+from wanikani_mcp.models import LeechChange, ReviewStatistic, Subject, SubjectType
+from wanikani_mcp.sync_service import SyncService
+
+
+def make_stat(stat_id: int, user_id: int, score: float) -> ReviewStatistic:
+    return ReviewStatistic(
+        id=stat_id,
+        user_id=user_id,
+        subject_id=stat_id,
+        subject_type=SubjectType.KANJI,
+        leech_score=score,
+    )
+
+
+def test_leech_score():
+    assert leech_score(0, 0, 1, 1) == 0.0
+    assert leech_score(5, 3, 1, 4) == 8.0
+    # The weaker streak decides
+    assert leech_score(4, 4, 4, 9) == 1.0
+    # A zero streak counts as one
+    assert leech_score(2, 0, 0, 0) == 2.0
+
+
+def test_leech_score_decreases_with_streak():
+    scores = [leech_score(6, 2, streak, streak) for streak in range(1, 6)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_leeches(session, sample_user):
+    session.add(sample_user)
+    session.commit()
+    other_user_id = sample_user.id + 1
+    for stat in [
+        make_stat(1, sample_user.id, 0.5),
+        make_stat(2, sample_user.id, 4.0),
+        make_stat(3, sample_user.id, 2.0),
+        make_stat(4, sample_user.id, 8.0),
+        make_stat(5, other_user_id, 9.0),
+    ]:
+        session.add(stat)
+    session.commit()
+
+    leeches = top_leeches(session, sample_user.id, min_score=1.0, limit=2)
+    assert [stat.id for stat in leeches] == [4, 2]
+
+    leeches = top_leeches(session, sample_user.id, min_score=1.0, limit=10)
+    assert [stat.id for stat in leeches] == [4, 2, 3]
+
+
+def make_change(
+    change_id: int, subject_id: int, became_leech: bool, created_at: datetime
+) -> LeechChange:
+    return LeechChange(
+        id=change_id,
+        user_id=1,
+        subject_id=subject_id,
+        became_leech=became_leech,
+        previous_score=0.5 if became_leech else 2.0,
+        leech_score=2.0 if became_leech else 0.5,
+        created_at=created_at,
+    )
+
+
+def test_leech_change_only_on_threshold_crossing():
+    assert leech_change(1, 1, 0.5, 0.8, threshold=1.0) is None
+    assert leech_change(1, 1, 2.0, 3.0, threshold=1.0) is None
+
+    entered = leech_change(1, 1, 0.5, 2.0, threshold=1.0, sync_log_id=7)
+    assert entered.became_leech is True
+    assert entered.sync_log_id == 7
+
+    left = leech_change(1, 1, 2.0, 0.5, threshold=1.0)
+    assert left.became_leech is False
+
+
+def test_recent_leech_changes(session, sample_user):
+    session.add(sample_user)
+    session.commit()
+    now = datetime.now(UTC)
+    for change in [
+        make_change(1, 10, True, now - timedelta(days=30)),
+        make_change(2, 11, True, now - timedelta(days=2)),
+        # Entered and recovered inside the window: no net change
+        make_change(3, 12, True, now - timedelta(days=2)),
+        make_change(4, 12, False, now - timedelta(days=1)),
+        make_change(5, 13, False, now - timedelta(hours=1)),
+    ]:
+        session.add(change)
+    session.commit()
+
+    changes = recent_leech_changes(
+        session, sample_user.id, now - timedelta(days=7), limit=10
+    )
+
+    assert [(c.subject_id, c.became_leech) for c in changes] == [
+        (13, False),
+        (11, True),
+    ]
+
+
+def test_upsert_review_statistic_records_leech_changes(
+    engine, session, sample_user, sample_subject, monkeypatch
+):
+    monkeypatch.setattr(database, "engine", engine)
+    session.add(sample_user)
+    session.add(sample_subject)
+    session.commit()
+    stats_data = {
+        "id": 1,
+        "subject_id": sample_subject.id,
+        "subject_type": "kanji",
+        "meaning_correct": 5,
+        "meaning_incorrect": 0,
+        "meaning_max_streak": 5,
+        "meaning_current_streak": 5,
+        "reading_correct": 5,
+        "reading_incorrect": 0,
+        "reading_max_streak": 5,
+        "reading_current_streak": 5,
+        "percentage_correct": 100,
+        "hidden": False,
+        "data_updated_at": "2026-01-01T00:00:00Z",
+    }
+    service = SyncService()
+
+    asyncio.run(service._upsert_review_statistic(sample_user.id, stats_data))
+    stats_data |= {"meaning_incorrect": 4, "meaning_current_streak": 1}
+    asyncio.run(service._upsert_review_statistic(sample_user.id, stats_data))
+    asyncio.run(
+        service._upsert_review_statistic(
+            sample_user.id, stats_data | {"reading_incorrect": 1}
+        )
+    )
+
+    changes = session.exec(select(LeechChange)).all()
+    assert len(changes) == 1
+    assert changes[0].became_leech is True
+    assert changes[0].leech_score == 4.0
+    assert session.get(ReviewStatistic, 1).leech_score == 5.0
+
+
+def test_get_leeches_tool_fills_the_limit(engine, session, sample_user, monkeypatch):
+    from wanikani_mcp import handlers
+
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(handlers, "subject_catalog", SubjectCatalog(600))
+    response_cache.clear()
+    session.add(sample_user)
+    session.commit()
+    # Subject 4, the top leech, has not been synced
+    for subject_id in (1, 2, 3, 5):
+        session.add(
+            Subject(
+                id=subject_id,
+                object_type=SubjectType.KANJI,
+                level=1,
+                slug=f"kanji-{subject_id}",
+                meanings=[],
+                document_url=f"https://www.wanikani.com/kanji/{subject_id}",
+            )
+        )
+    for stat in [
+        make_stat(2, sample_user.id, 4.0),
+        make_stat(3, sample_user.id, 2.0),
+        make_stat(4, sample_user.id, 8.0),
+        make_stat(5, sample_user.id, 1.5),
+    ]:
+        session.add(stat)
+    session.commit()
+
+    def leeches(limit):
+        arguments = {"mcp_api_key": "test-mcp-key", "limit": limit, "min_score": 1}
+        [content] = asyncio.run(handlers.call_tool("get_leeches", arguments))
+        return [line.split()[1] for line in content.text.splitlines()[2:]]
+
+    assert leeches(2) == ["kanji-2", "kanji-3"]
+    # Out of range limits are clamped
+    assert leeches(-1) == ["kanji-2"]
+    assert leeches(10**9) == ["kanji-2", "kanji-3", "kanji-5"]
+    response_cache.clear()
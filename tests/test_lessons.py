@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from wanikani_mcp.graph import GRAPH_COLUMNS, SubjectGraph
+from wanikani_mcp.lessons import lesson_order
+from wanikani_mcp.models import Assignment, Subject, SubjectType
+from wanikani_mcp.srs import BUILTIN_SYSTEMS
+
+# subject: (type, level, components, srs stage or None if locked)
+SUBJECTS = {
+    1: ("radical", 3, [], 5),
+    2: ("radical", 3, [], 0),
+    10: ("kanji", 3, [1], 0),
+    11: ("kanji", 3, [1, 2], None),
+    12: ("kanji", 3, [1], 0),
+    5: ("kanji", 2, [1], 0),
+    20: ("vocabulary", 2, [], 0),
+    21: ("vocabulary", 2, [5], None),
+}
+
+
+def test_lessons_on_the_level_up_path_come_first(session, sample_user):
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+    session.add(sample_user)
+    session.commit()
+    for subject_id, (object_type, level, components, stage) in SUBJECTS.items():
+        session.add(
+            Subject(
+                id=subject_id,
+                object_type=SubjectType(object_type),
+                level=level,
+                slug=f"{object_type}-{subject_id}",
+                meanings=[],
+                component_subject_ids=components,
+                document_url=f"https://www.wanikani.com/{object_type}/{subject_id}",
+                spaced_repetition_system_id=2,
+            )
+        )
+        if stage is not None:
+            session.add(
+                Assignment(
+                    id=subject_id,
+                    user_id=sample_user.id,
+                    subject_id=subject_id,
+                    subject_type=SubjectType(object_type),
+                    srs_stage=stage,
+                    unlocked_at=now - timedelta(days=2),
+                    passed_at=now - timedelta(days=1) if stage == 5 else None,
+                )
+            )
+    session.commit()
+    graph = SubjectGraph.build(session.exec(select(*GRAPH_COLUMNS)).all())
+
+    order = lesson_order(session, sample_user.id, 3, now, graph, BUILTIN_SYSTEMS)
+
+    # Radical 2 holds back kanji 11, the last kanji the level needs: its
+    # lesson now means Guru on the 22nd, then kanji 11's lesson and Guru
+    # on the 26th. Kanji 10 and 12 can wait 82 hours; kanji 5 unlocks a
+    # vocabulary item, and vocabulary 20 unlocks nothing
+    assert order["level_up_at"] == datetime(2026, 10, 26, 5, tzinfo=UTC).isoformat()
+    assert [
+        (lesson["subject_id"], lesson["reason"], lesson["slack_hours"])
+        for lesson in order["lessons"]
+    ] == [
+        (2, "level_up", 0),
+        (10, "level_up", 82),
+        (12, "level_up", 82),
+        (5, "unlocks", None),
+        (20, "other", None),
+    ]
+    assert order["lessons_available"] == 5
+    assert order["lessons"][3]["unlocks_on_pass"] == 1
+
+    limited = lesson_order(session, sample_user.id, 3, now, graph, BUILTIN_SYSTEMS, 2)
+    assert [lesson["subject_id"] for lesson in limited["lessons"]] == [2, 10]
+
+
+@pytest.mark.parametrize("synced_user", [{"subjects": 300, "seed": 13}], indirect=True)
+def test_get_lesson_order_tool(session, synced_user):
+    from wanikani_mcp.handlers import call_tool
+
+    arguments = {"mcp_api_key": "test-mcp-key", "limit": 5}
+    [content] = asyncio.run(call_tool("get_lesson_order", arguments))
+    order = json.loads(content.text)
+
+    session.refresh(synced_user)
+    assert order["level"] == synced_user.level
+    assert len(order["lessons"]) == min(order["lessons_available"], 5)
+    assert all(lesson["characters"] for lesson in order["lessons"])
+
+    # Served from the cache until the next sync
+    [again] = asyncio.run(call_tool("get_lesson_order", arguments))
+    assert again.text == content.text
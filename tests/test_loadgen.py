@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from benchmarks.loadgen import Sample, call_operation, parse_mix, summarize_samples
+from wanikani_mcp import database
+from wanikani_mcp.mcp_server import server
+
+
+def test_parse_mix():
+    assert parse_mix("get_leeches=3, user_progress") == {
+        "get_leeches": 3.0,
+        "user_progress": 1.0,
+    }
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("drop_tables=1")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("get_status=0")
+
+
+def test_summarize_samples_per_operation():
+    samples = [Sample("get_leeches", 0.01 * i, True) for i in range(1, 101)]
+    samples.append(Sample("sync_data", 2.0, False))
+
+    results = summarize_samples(samples, elapsed=10.0)
+
+    assert results["get_leeches"]["requests"] == 100
+    assert results["get_leeches"]["p50_ms"] == 500.0
+    assert results["get_leeches"]["p99_ms"] == 990.0
+    assert results["sync_data"]["errors"] == 1
+    assert results["total"]["throughput_per_second"] == 10.1
+
+
+def test_call_operation_counts_error_text_as_failure(
+    engine, session, sample_user, monkeypatch
+):
+    monkeypatch.setattr(database, "engine", engine)
+    session.add(sample_user)
+    session.commit()
+
+    async def call(operation, mcp_api_key):
+        async with create_connected_server_and_client_session(server) as client:
+            return await call_operation(client, operation, mcp_api_key)
+
+    assert asyncio.run(call("get_leeches", "test-mcp-key"))
+    assert not asyncio.run(call("get_leeches", "wrong-key"))
+    assert not asyncio.run(call("user_progress", "wrong-key"))
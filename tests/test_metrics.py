@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from wanikani_mcp.metrics import SYNC_ROWS, Metric, MetricsRegistry, SyncStepStats
+
+
+def test_counter_renders_per_label_series():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("status",))
+
+    requests.inc(status=200)
+    requests.inc(status=200)
+    requests.inc(status=429)
+
+    output = registry.render()
+    assert "# TYPE requests_total counter" in output
+    assert 'requests_total{status="200"} 2' in output
+    assert 'requests_total{status="429"} 1' in output
+
+
+def test_counter_rejects_wrong_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("status",))
+
+    with pytest.raises(ValueError):
+        requests.inc(endpoint="user")
+
+
+def test_metric_subclasses_must_yield_samples():
+    class Incomplete(Metric):
+        kind = "counter"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete_total", "Incomplete", ())
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram(
+        "latency_seconds", "Latency", ("tool",), buckets=(0.1, 1.0)
+    )
+
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, tool="get_status")
+
+    output = registry.render()
+    assert 'latency_seconds_bucket{tool="get_status",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{tool="get_status",le="1"} 3' in output
+    assert 'latency_seconds_bucket{tool="get_status",le="+Inf"} 4' in output
+    assert 'latency_seconds_count{tool="get_status"} 4' in output
+    assert latency.sum(tool="get_status") == pytest.approx(6.05)
+
+
+def test_sync_step_stats():
+    before = SYNC_ROWS.value(collection="test_collection")
+    step = SyncStepStats("test_collection")
+    with step.phase("fetch"):
+        pass
+    with step.phase("write"):
+        pass
+    step.rows_written = 25
+    step.rows_skipped = 2
+    step.pages = 3
+
+    step.record()
+
+    assert SYNC_ROWS.value(collection="test_collection") == before + 25
+    summary = step.as_dict()
+    assert summary["pages"] == 3
+    assert summary["rows_written"] == 25
+    assert summary["rows_skipped"] == 2
+    assert set(summary) >= {"fetch_ms", "rate_limit_wait_ms", "parse_ms", "write_ms"}
+
+
+def test_gauge_keeps_the_last_value():
+    registry = MetricsRegistry()
+    in_use = registry.gauge("in_use", "Connections in use", ("engine",))
+
+    in_use.set(3, engine="primary")
+    in_use.set(1, engine="primary")
+
+    output = registry.render()
+    assert "# TYPE in_use gauge" in output
+    assert 'in_use{engine="primary"} 1' in output
+
+
+def test_unknown_tools_and_resources_share_one_label():
+    from wanikani_mcp import mcp_server
+    from wanikani_mcp.metrics import RESOURCE_READS, TOOL_CALLS
+
+    assert "get_lesson_order" in mcp_server.TOOL_NAMES
+    assert sorted(mcp_server.RESOURCE_TYPES) == [
+        "item_database",
+        "review_forecast",
+        "user_progress",
+    ]
+    tools = TOOL_CALLS.value(tool="unknown")
+    resources = RESOURCE_READS.value(resource="unknown")
+
+    asyncio.run(mcp_server.call_tool("no_such_tool", {}))
+    asyncio.run(mcp_server.read_resource("wanikani://no_such_resource"))
+    assert TOOL_CALLS.value(tool="unknown") == tools + 1
+    assert RESOURCE_READS.value(resource="unknown") == resources + 1
+    assert TOOL_CALLS.value(tool="no_such_tool") == 0
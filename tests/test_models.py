@@ -108,12 +108,13 @@ def test_subject_types(session, sample_radical, sample_vocabulary):
     assert vocab.component_subject_ids == [1]
 
 
-def test_srs_stage_creation(session, sample_srs_stage):
+def test_srs_stage_creation(session, sample_srs_system, sample_srs_stage):
+    session.add(sample_srs_system)
     session.add(sample_srs_stage)
     session.commit()
 
-    stage = session.get(SrsStage, 1)
-    assert stage.position == 1
+    stage = session.get(SrsStage, (2, 1))
+    assert stage.system.name == "Wanikani"
     assert stage.interval == 14400000
     assert stage.interval_unit == "milliseconds"
 
@@ -0,0 +1,67 @@
+import pytest
+
+from wanikani_mcp.profiling import Profiler
+
+
+def make_profiler(tmp_path, **overrides) -> Profiler:
+    options = {
+        "mode": "cprofile",
+        "sample_rate": 1.0,
+        "targets": [],
+        "user_ids": [],
+        "directory": str(tmp_path),
+        "max_files": 3,
+    }
+    return Profiler(**(options | overrides))
+
+
+def test_cprofile_writes_profile(tmp_path):
+    profiler = make_profiler(tmp_path)
+
+    with profiler.profile("tool", "get_status", user_id=7):
+        sum(range(1000))
+
+    (path,) = tmp_path.iterdir()
+    assert path.suffix == ".prof"
+    assert "tool-get_status-user7" in path.name
+
+
+def test_tracemalloc_writes_report(tmp_path):
+    profiler = make_profiler(tmp_path, mode="tracemalloc")
+
+    with profiler.profile("sync", "sync"):
+        _ = [str(i) for i in range(1000)]
+
+    (path,) = tmp_path.iterdir()
+    assert path.suffix == ".txt"
+    assert "peak=" in path.read_text()
+
+
+def test_targets_and_users_filter(tmp_path):
+    profiler = make_profiler(tmp_path, targets=["get_leeches"], user_ids=[1])
+
+    assert profiler.wants("get_leeches", 1) is True
+    assert profiler.wants("get_status", 1) is False
+    assert profiler.wants("get_leeches", 2) is False
+
+    profiler.configure(mode="off")
+    assert profiler.wants("get_leeches", 1) is False
+
+
+def test_retention_keeps_newest_files(tmp_path):
+    profiler = make_profiler(tmp_path, max_files=2)
+
+    for _ in range(4):
+        with profiler.profile("tool", "get_status"):
+            pass
+
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_configure_rejects_bad_values(tmp_path):
+    profiler = make_profiler(tmp_path)
+
+    with pytest.raises(ValueError):
+        profiler.configure(mode="perf")
+    with pytest.raises(ValueError):
+        profiler.configure(sample_rate=2.0)
@@ -0,0 +1,147 @@
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from wanikani_mcp.models import Assignment, SubjectType
+from wanikani_mcp.projection import (
+    Workload,
+    drop_stages,
+    interval_hours,
+    load_workload,
+    project_workload,
+    simulate_reviews,
+)
+from wanikani_mcp.srs import BUILTIN_SYSTEMS
+
+INTERVALS = interval_hours(BUILTIN_SYSTEMS[2])
+
+
+def workload(
+    stages, due_hours, accuracy, lessons_available=0, systems=None
+) -> Workload:
+    return Workload(
+        stages=np.array(stages, dtype=np.int64),
+        due_hours=np.array(due_hours, dtype=np.int64),
+        accuracy=np.array(accuracy, dtype=float),
+        lesson_accuracy=float(np.mean(accuracy)) if accuracy else 0.85,
+        lessons_available=lessons_available,
+        systems=None if systems is None else np.array(systems, dtype=np.int64),
+    )
+
+
+def test_mistakes_drop_one_stage_or_two_from_guru():
+    assert list(drop_stages(np.arange(1, 9))) == [1, 1, 2, 3, 3, 4, 5, 6]
+
+
+def test_interval_hours_follow_the_srs_system():
+    assert list(INTERVALS) == [0, 4, 8, 23, 47, 167, 335, 719, 2879, 0]
+    assert interval_hours(BUILTIN_SYSTEMS[1])[1:4].tolist() == [2, 4, 8]
+
+
+def test_items_are_projected_on_their_own_srs_system():
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+    # Same item on the accelerated system, the standard one and an unknown one
+    items = workload([1, 1, 1], [0, 0, 0], [1.0] * 3, systems=[1, 2, 99])
+    daily = project_workload(items, BUILTIN_SYSTEMS, now, 1, 0)["daily"]
+    # Accelerated: hours 0, 4 and 12; standard (twice): hours 0 and 8
+    assert daily[0]["expected_reviews"] == 7
+
+
+def test_an_item_always_answered_correctly_climbs_the_stages():
+    reviews, burns = simulate_reviews(
+        workload([1], [0], [1.0]), INTERVALS, 24 * 10, np.array([], dtype=np.int64)
+    )
+    # Reaching stage 2 waits 8 hours, stage 3 23 hours, stage 4 47 hours
+    assert list(np.flatnonzero(reviews)) == [0, 8, 31, 78]
+    assert burns == 0
+
+
+def test_reviews_split_into_expected_values():
+    reviews, _ = simulate_reviews(
+        workload([1], [0], [0.5]), INTERVALS, 24, np.array([], dtype=np.int64)
+    )
+    # Half stays in stage 1 for another 4 hours, half moves to stage 2 (8h)
+    assert reviews[0] == 1
+    assert reviews[4] == pytest.approx(0.5)
+    assert reviews[8] == pytest.approx(0.75)
+
+
+def test_lessons_do_not_change_the_accuracy_of_items_in_their_band():
+    items = workload([1], [0], [0.51])
+    items.lesson_accuracy = 0.54
+    reviews, _ = simulate_reviews(items, INTERVALS, 24, np.array([0]))
+    # The item keeps its own 0.51: 0.49 of it is back with the lesson at 4h
+    assert reviews[4] == pytest.approx(1.49)
+    # At 8h: the item's 0.51 in stage 2, and what both got wrong at 4h
+    assert reviews[8] == pytest.approx(0.51 + 0.49 * 0.49 + 0.46)
+
+
+def test_lessons_stop_when_unlocked_items_run_out():
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+    new_items = workload([], [], [], lessons_available=5)
+    new_items.lesson_accuracy = 1.0
+    projection = project_workload(new_items, BUILTIN_SYSTEMS, now, 3, 3)
+    assert [day["lessons"] for day in projection["daily"]] == [3, 2, 0]
+    assert projection["daily"][0]["from"] == "2026-10-19T09:00:00+00:00"
+    # Each lesson comes back 4 and 12 hours later on its first day
+    assert projection["daily"][0]["expected_reviews"] == 6
+
+
+def test_load_workload_reads_stages_due_hours_and_accuracy(
+    session, sample_user, sample_subject, sample_radical, sample_review_statistic
+):
+    now = datetime.now(UTC)
+    session.add_all([sample_user, sample_subject, sample_radical])
+    session.commit()
+    unlocked = now - timedelta(days=3)
+    session.add_all(
+        [
+            Assignment(
+                id=1,
+                user_id=sample_user.id,
+                subject_id=1,
+                subject_type=SubjectType.KANJI,
+                srs_stage=3,
+                unlocked_at=unlocked,
+                available_at=now + timedelta(hours=5, minutes=10),
+            ),
+            # Overdue, and without statistics of its own
+            Assignment(
+                id=2,
+                user_id=sample_user.id,
+                subject_id=2,
+                subject_type=SubjectType.RADICAL,
+                srs_stage=6,
+                unlocked_at=unlocked,
+                available_at=now - timedelta(days=1),
+            ),
+            # A lesson
+            Assignment(
+                id=3,
+                user_id=sample_user.id,
+                subject_id=3,
+                subject_type=SubjectType.VOCABULARY,
+                srs_stage=0,
+                unlocked_at=unlocked,
+            ),
+        ]
+    )
+    session.add(sample_review_statistic)
+    session.commit()
+
+    loaded = load_workload(session, sample_user.id, now)
+    assert sorted(zip(loaded.stages, loaded.due_hours, strict=True)) == [
+        (3, 6),
+        (6, 0),
+    ]
+    # 8/10 meanings and 7/10 readings right; the radical gets the mean
+    assert loaded.accuracy == pytest.approx([0.56, 0.56])
+    assert loaded.lesson_accuracy == pytest.approx(0.56)
+    assert loaded.lessons_available == 1
+    assert list(loaded.systems) == [2, 2]
+
+    # No statistics at all
+    session.delete(sample_review_statistic)
+    session.commit()
+    assert list(load_workload(session, sample_user.id, now).accuracy) == [0.85] * 2
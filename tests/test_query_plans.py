@@ -0,0 +1,288 @@
+"""EXPLAIN every query of the hot paths and fail on scans of user-scoped tables.
+
+The SQL emitted by a full sync, the sync upserts and each read handler is
+captured from the engine and explained on SQLite, and on PostgreSQL when
+TEST_POSTGRES_URL points at a scratch database (its tables are dropped).
+PostgreSQL prefers sequential scans on tables this small, so they are
+switched off there: a Seq Scan that remains means no index can serve the
+query.
+"""
+
+import asyncio
+import json
+import os
+import re
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from benchmarks.datagen import Dataset
+from benchmarks.run import DatasetClient, flatten
+from wanikani_mcp import database
+from wanikani_mcp import sync_service as sync_service_module
+from wanikani_mcp.cache import response_cache
+from wanikani_mcp.catalog import subject_catalog
+from wanikani_mcp.config import settings
+from wanikani_mcp.mcp_server import call_tool, read_resource
+from wanikani_mcp.models import LeechChange, User
+from wanikani_mcp.sync_service import SyncService
+
+BACKENDS = {
+    "sqlite": None,
+    "postgresql": os.environ.get("TEST_POSTGRES_URL"),
+}
+# Tables holding per-user rows, which grow with every user
+USER_SCOPED_TABLES = {"user"} | {
+    table.name
+    for table in SQLModel.metadata.sorted_tables
+    if "user_id" in table.columns
+}
+EXPLAINED_STATEMENTS = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+# Indexes the read paths depend on, by a pattern of the query they serve
+EXPECTED_INDEXES = {
+    r"WHERE user\.mcp_api_key = \?": "ix_user_mcp_api_key",
+    r"reviewstatistic\.leech_score >= \?": "ix_reviewstatistic_user_id_leech_score",
+    r"assignment\.available_at [<>]": "ix_assignment_user_id_available_at",
+    r"leechchange\.created_at >= \?": "ix_leechchange_user_id_created_at",
+}
+
+
+class QueryCapture:
+    """Collect the statements the engines execute while active"""
+
+    def __init__(self, *engines):
+        self.active = False
+        self.queries: list[tuple[str, object]] = []
+        for engine in set(engines):
+            event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and not executemany and EXPLAINED_STATEMENTS.match(statement):
+            self.queries.append((statement, parameters))
+
+    def __enter__(self) -> "QueryCapture":
+        self.active = True
+        return self
+
+    def __exit__(self, *exc_info):
+        self.active = False
+
+
+def sqlite_scans(connection, statement: str, parameters) -> list[str]:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [
+        detail
+        for *_, detail in rows
+        if (match := re.match(r"SCAN (\w+)", detail))
+        and match.group(1) in USER_SCOPED_TABLES
+    ]
+
+
+def postgresql_scans(connection, statement: str, parameters) -> list[str]:
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    ).scalar()
+    scans = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if (
+            node["Node Type"] == "Seq Scan"
+            and node["Relation Name"] in USER_SCOPED_TABLES
+        ):
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def table_scans(engine, queries: list[tuple[str, object]]) -> dict[str, list[str]]:
+    """Map each query that scans a user-scoped table to its offending steps"""
+    explain = sqlite_scans if engine.dialect.name == "sqlite" else postgresql_scans
+    scans = {}
+    with engine.connect() as connection:
+        for statement, parameters in queries:
+            if found := explain(connection, statement, parameters):
+                scans[statement] = found
+        connection.rollback()
+    return scans
+
+
+def assert_indexes_used(engine, queries: list[tuple[str, object]]):
+    """Check that SQLite serves each expected query from its index"""
+    matched = set()
+    with engine.connect() as connection:
+        for statement, parameters in queries:
+            for pattern, index in EXPECTED_INDEXES.items():
+                if not re.search(pattern, statement):
+                    continue
+                matched.add(pattern)
+                plan = connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+                details = " ".join(detail for *_, detail in plan)
+                assert index in details, f"{index} unused: {statement}"
+    assert matched == set(EXPECTED_INDEXES)
+
+
+@pytest.fixture(params=list(BACKENDS))
+def plan_engine(request, tmp_path, monkeypatch):
+    url = BACKENDS[request.param]
+    if request.param == "sqlite":
+        url = f"sqlite:///{tmp_path}/plans.db"
+    elif not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    engine = create_engine(url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "writer_engine", None)
+    monkeypatch.setattr(sync_service_module, "WaniKaniClient", DatasetClient)
+    response_cache.clear()
+    yield engine
+    response_cache.clear()
+    if database.writer_engine is not None:
+        database.writer_engine.dispose()
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def dataset(plan_engine, monkeypatch):
+    """Two synced users, so every per-user query has rows to skip"""
+    dataset = Dataset(users=2, subjects=300, seed=7)
+    monkeypatch.setattr(DatasetClient, "dataset", dataset, raising=False)
+    with Session(plan_engine) as session:
+        for number, data in enumerate(dataset.users.values(), start=1):
+            session.add(
+                User(
+                    wanikani_api_key=data.api_key,
+                    mcp_api_key=f"plan-mcp-key-{number}",
+                    username=data.username,
+                    level=data.level,
+                )
+            )
+        session.commit()
+    return dataset
+
+
+def users(engine) -> list[User]:
+    with Session(engine) as session:
+        return list(session.exec(select(User).order_by(User.id)).all())
+
+
+def test_sync_queries_use_indexes(plan_engine, dataset):
+    # On SQLite the sync writes go through their own engine
+    capture = QueryCapture(plan_engine, database.get_writer_engine())
+    service = SyncService()
+
+    async def full_sync(synced_users):
+        for user in synced_users:
+            await service._sync_user_data(user)
+
+    async def incremental_sync(user):
+        # Then a manual sync through the lease and the cooldown check
+        await service._sync_user_data(user)
+        await service.sync_user(user, cooldown_seconds=300)
+        await service.sync_user(user)
+
+        user_data = dataset.users[user.wanikani_api_key].collections
+        await service._upsert_assignment(user.id, flatten(user_data["assignments"][0]))
+        await service._upsert_review_statistic(
+            user.id, flatten(user_data["review_statistics"][0])
+        )
+
+    synced_users = users(plan_engine)
+    with capture:
+        asyncio.run(full_sync(synced_users))
+    dataset.touch(0.1)
+    user = users(plan_engine)[0]
+    with capture:
+        asyncio.run(incremental_sync(user))
+
+    assert capture.queries
+    assert table_scans(plan_engine, capture.queries) == {}
+
+
+def test_read_queries_use_indexes(plan_engine, dataset, monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", "plan-admin-key")
+    service = SyncService()
+
+    async def sync():
+        for user in users(plan_engine):
+            await service._sync_user_data(user)
+
+    asyncio.run(sync())
+    with Session(plan_engine) as session:
+        user = users(plan_engine)[0]
+        session.add(
+            LeechChange(
+                user_id=user.id,
+                subject_id=1,
+                became_leech=True,
+                previous_score=0.5,
+                leech_score=2.0,
+            )
+        )
+        session.commit()
+    subject_catalog.load()
+    mcp_api_key = user.mcp_api_key
+    capture = QueryCapture(plan_engine)
+
+    async def run():
+        await call_tool("get_leeches", {"mcp_api_key": mcp_api_key})
+        await call_tool("get_leech_changes", {"mcp_api_key": mcp_api_key})
+        await call_tool(
+            "get_activity_trend", {"mcp_api_key": mcp_api_key, "subject_type": "kanji"}
+        )
+        await call_tool(
+            "project_workload", {"mcp_api_key": mcp_api_key, "lessons_per_day": 10}
+        )
+        await call_tool("get_guru_eta", {"mcp_api_key": mcp_api_key})
+        await call_tool("get_unlock_impact", {"mcp_api_key": mcp_api_key})
+        await call_tool("get_critical_path", {"mcp_api_key": mcp_api_key})
+        await call_tool("get_lesson_order", {"mcp_api_key": mcp_api_key})
+        await call_tool(
+            "get_sync_stats", {"admin_api_key": settings.admin_api_key, "hours": 1}
+        )
+        for uri in [
+            "wanikani://user_progress",
+            "wanikani://review_forecast",
+            "wanikani://item_database",
+            "wanikani://item_database?search=ka",
+        ]:
+            separator = "&" if "?" in uri else "?"
+            response = await read_resource(f"{uri}{separator}mcp_api_key={mcp_api_key}")
+            assert "error" not in json.loads(response)
+
+    with capture:
+        asyncio.run(run())
+
+    assert len(capture.queries) >= 10
+    assert table_scans(plan_engine, capture.queries) == {}
+    if plan_engine.dialect.name == "sqlite":
+        assert_indexes_used(plan_engine, capture.queries)
+
+
+def test_scans_are_reported(plan_engine, dataset):
+    since = datetime.now(UTC) - timedelta(days=1)
+    capture = QueryCapture(plan_engine)
+
+    with capture, Session(plan_engine) as session:
+        # data_updated_at has no index
+        session.exec(
+            text("SELECT COUNT(*) FROM assignment WHERE data_updated_at >= :since"),
+            params={"since": since},
+        ).one()
+
+    scans = table_scans(plan_engine, capture.queries)
+    assert len(scans) == 1
+    [steps] = scans.values()
+    assert steps[0].startswith(
+        "SCAN assignment"
+        if plan_engine.dialect.name == "sqlite"
+        else "Seq Scan on assignment"
+    )
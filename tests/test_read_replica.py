@@ -0,0 +1,143 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+from wanikani_mcp import database
+from wanikani_mcp.cache import response_cache
+from wanikani_mcp.config import settings
+from wanikani_mcp.database import ReplicaRouter
+from wanikani_mcp.metrics import READ_ROUTES
+from wanikani_mcp.models import ReviewStatistic, User
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A primary and a replica, as two SQLite files with the same schema"""
+    primary = database.make_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica_url = f"sqlite:///{tmp_path}/replica.db"
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "writer_engine", None)
+    monkeypatch.setattr(database, "read_engine", None)
+    monkeypatch.setattr(settings, "read_database_url", replica_url)
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter(5, 30))
+    replica = database.get_read_engine()
+    for engine in (primary, replica):
+        SQLModel.metadata.create_all(engine)
+    response_cache.clear()
+    yield primary, replica
+    response_cache.clear()
+    database.dispose_engines()
+
+
+def set_lag(monkeypatch, lag: float | None):
+    monkeypatch.setattr(ReplicaRouter, "_measure_lag", staticmethod(lambda: lag))
+
+
+def test_reads_use_the_replica_once_it_has_the_last_sync(databases, monkeypatch):
+    set_lag(monkeypatch, 2.0)
+    router = database.replica_router
+    now = datetime.now(UTC)
+
+    assert router.use_replica(None)
+    assert router.use_replica(now - timedelta(minutes=5))
+    # Naive datetimes, as SQLite returns them, are taken as UTC
+    assert router.use_replica((now - timedelta(minutes=5)).replace(tzinfo=None))
+    # Lag plus the check interval has not passed since the sync committed
+    assert not router.use_replica(now - timedelta(seconds=6))
+
+
+@pytest.mark.parametrize("lag", [None, 31.0])
+def test_unknown_or_excessive_lag_falls_back_to_the_primary(
+    databases, monkeypatch, lag
+):
+    set_lag(monkeypatch, lag)
+    assert not database.replica_router.use_replica(None)
+
+
+def test_without_a_replica_reads_use_the_primary(databases, monkeypatch):
+    primary, _ = databases
+    monkeypatch.setattr(settings, "read_database_url", "")
+    before = READ_ROUTES.value(target="primary")
+
+    with database.read_session() as session:
+        assert session.get_bind() is primary
+    assert READ_ROUTES.value(target="primary") == before + 1
+
+
+def test_lag_is_measured_once_per_interval(databases, monkeypatch):
+    measurements = []
+
+    def measure():
+        measurements.append(1)
+        return 0.5
+
+    monkeypatch.setattr(ReplicaRouter, "_measure_lag", staticmethod(measure))
+    router = database.replica_router
+    assert router.lag() == router.lag() == 0.5
+    assert len(measurements) == 1
+
+    router.invalidate()
+    router.lag()
+    assert len(measurements) == 2
+
+
+def test_get_leeches_reads_from_the_routed_database(databases, monkeypatch):
+    from wanikani_mcp.catalog import subject_catalog
+    from wanikani_mcp.handlers import call_tool
+
+    primary, replica = databases
+    set_lag(monkeypatch, 1.0)
+    monkeypatch.setattr(subject_catalog, "get_many", lambda ids: {})
+    synced_long_ago = datetime.now(UTC) - timedelta(hours=1)
+    for engine in (primary, replica):
+        with Session(engine) as session:
+            session.add(
+                User(
+                    id=1,
+                    wanikani_api_key="wk",
+                    mcp_api_key="replica-key",
+                    username="replica",
+                    level=3,
+                    synced_at=synced_long_ago,
+                )
+            )
+            session.commit()
+    # Only the replica has the user's statistics
+    with Session(replica) as session:
+        session.add(
+            ReviewStatistic(
+                id=1,
+                user_id=1,
+                subject_id=1,
+                subject_type="kanji",
+                meaning_correct=1,
+                meaning_incorrect=5,
+                meaning_max_streak=1,
+                meaning_current_streak=0,
+                reading_correct=1,
+                reading_incorrect=5,
+                reading_max_streak=1,
+                reading_current_streak=0,
+                percentage_correct=20,
+                leech_score=10.0,
+            )
+        )
+        session.commit()
+
+    replica_reads = READ_ROUTES.value(target="replica")
+    asyncio.run(call_tool("get_leeches", {"mcp_api_key": "replica-key"}))
+    assert READ_ROUTES.value(target="replica") == replica_reads + 1
+
+    # After a sync commits on the primary, reads stay there for a while
+    with Session(primary) as session:
+        user = session.get(User, 1)
+        user.synced_at = datetime.now(UTC)
+        user.sync_generation += 1
+        session.add(user)
+        session.commit()
+    primary_reads = READ_ROUTES.value(target="primary")
+    asyncio.run(call_tool("get_leeches", {"mcp_api_key": "replica-key"}))
+    assert READ_ROUTES.value(target="primary") == primary_reads + 1
+    assert READ_ROUTES.value(target="replica") == replica_reads + 1
@@ -0,0 +1,167 @@
+import asyncio
+import os
+from datetime import UTC, date, datetime
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, func, select, text
+
+from benchmarks.datagen import PAGE_SIZES, Dataset, iso
+from benchmarks.run import DatasetClient
+from wanikani_mcp import database
+from wanikani_mcp.config import settings
+from wanikani_mcp.metrics import SyncStepStats
+from wanikani_mcp.models import Review, User
+from wanikani_mcp.reviews import (
+    insert_reviews,
+    next_month,
+    partition_name,
+    review_row,
+)
+from wanikani_mcp.sync_service import SyncService
+
+
+def review_resource(review_id: int, created_at: str, **data) -> dict:
+    return {
+        "id": review_id,
+        "object": "review",
+        "data_updated_at": created_at,
+        "data": {
+            "created_at": created_at,
+            "assignment_id": 10,
+            "subject_id": 1,
+            "starting_srs_stage": 1,
+            "ending_srs_stage": 2,
+            "incorrect_meaning_answers": 0,
+            "incorrect_reading_answers": 1,
+        }
+        | data,
+    }
+
+
+def test_review_row_stores_naive_utc():
+    row = review_row(5, review_resource(1, "2026-03-31T23:30:00.000000-02:00"))
+
+    assert row["user_id"] == 5
+    assert row["created_at"] == datetime(2026, 4, 1, 1, 30)
+    assert row["data_updated_at"] == datetime(2026, 4, 1, 1, 30)
+
+
+def test_partition_names_and_bounds():
+    assert partition_name(date(2026, 4, 1)) == "review_2026_04"
+    assert next_month(date(2026, 12, 1)) == date(2027, 1, 1)
+
+
+def test_insert_reviews_skips_reviews_already_stored(engine, session):
+    rows = [
+        review_row(1, review_resource(review_id, "2026-04-01T10:00:00Z"))
+        for review_id in (1, 2)
+    ]
+    with engine.begin() as connection:
+        assert insert_reviews(connection, rows) == {1, 2}
+    with engine.begin() as connection:
+        more = rows + [review_row(1, review_resource(3, "2026-05-01T10:00:00Z"))]
+        assert insert_reviews(connection, more) == {3}
+        assert insert_reviews(connection, []) == set()
+
+    assert session.exec(select(func.count()).select_from(Review)).one() == 3
+
+
+@pytest.fixture
+def review_sync(engine, session, sample_user, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(settings, "review_batch_size", 7)
+    dataset = Dataset(users=1, subjects=200, seed=3)
+    data = next(iter(dataset.users.values()))
+    sample_user.wanikani_api_key = data.api_key
+    session.add(sample_user)
+    session.commit()
+    client = DatasetClient(data.api_key)
+    client.dataset = dataset
+    return sample_user.id, client, data.collections["reviews"]
+
+
+def review_count(session) -> int:
+    session.expire_all()
+    return session.exec(select(func.count()).select_from(Review)).one()
+
+
+def test_reviews_are_ingested_in_batches_up_to_a_watermark(session, review_sync):
+    user_id, client, reviews = review_sync
+    service = SyncService()
+    assert len(reviews) > 7
+
+    step = SyncStepStats("reviews")
+    assert asyncio.run(service._ingest_reviews(user_id, client, step)) == len(reviews)
+    assert review_count(session) == len(reviews)
+    assert step.rows_written == len(reviews)
+    watermark = session.get(User, user_id).reviews_updated_at
+    assert watermark == max(review_row(user_id, r)["data_updated_at"] for r in reviews)
+
+    # Only reviews made since the watermark are fetched next time
+    reviews.append(review_resource(reviews[-1]["id"] + 1, iso(datetime.now(UTC))))
+    step = SyncStepStats("reviews")
+    assert asyncio.run(service._ingest_reviews(user_id, client, step)) == 1
+    assert step.rows_written + step.rows_skipped == 1
+    assert review_count(session) == len(reviews)
+
+
+def test_an_interrupted_ingestion_resumes_from_the_old_watermark(
+    session, review_sync, monkeypatch
+):
+    user_id, client, reviews = review_sync
+    service = SyncService()
+    fetch_page = DatasetClient._get
+    pages = []
+
+    async def fail_on_second_page(self, endpoint, params=None, stats=None):
+        pages.append(endpoint)
+        if len(pages) == 2:
+            raise RuntimeError("connection reset")
+        return await fetch_page(self, endpoint, params, stats)
+
+    monkeypatch.setattr(settings, "review_batch_size", 1)
+    monkeypatch.setitem(PAGE_SIZES, "reviews", 5)
+    monkeypatch.setattr(DatasetClient, "_get", fail_on_second_page)
+    with pytest.raises(RuntimeError):
+        asyncio.run(service._ingest_reviews(user_id, client, SyncStepStats("r")))
+    written = review_count(session)
+    assert 0 < written < len(reviews)
+    assert session.get(User, user_id).reviews_updated_at is None
+
+    monkeypatch.setattr(DatasetClient, "_get", fetch_page)
+    step = SyncStepStats("reviews")
+    asyncio.run(service._ingest_reviews(user_id, client, step))
+    assert step.rows_skipped == written
+    assert review_count(session) == len(reviews)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set"
+)
+def test_postgresql_stores_reviews_in_monthly_partitions(sample_user, sample_subject):
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as session:
+            session.add(sample_user)
+            session.add(sample_subject)
+            session.commit()
+            user_id = sample_user.id
+        rows = [
+            review_row(user_id, review_resource(1, "2026-03-31T23:59:59Z")),
+            review_row(user_id, review_resource(2, "2026-04-01T00:00:00Z")),
+        ]
+        with engine.begin() as connection:
+            assert insert_reviews(connection, rows) == {1, 2}
+            assert insert_reviews(connection, rows) == set()
+            partitions = connection.execute(
+                text(
+                    "SELECT tableoid::regclass::text, count(*) FROM review "
+                    "GROUP BY tableoid"
+                )
+            ).all()
+        assert dict(partitions) == {"review_2026_03": 1, "review_2026_04": 1}
+    finally:
+        SQLModel.metadata.drop_all(engine)
+        engine.dispose()
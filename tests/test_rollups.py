@@ -0,0 +1,129 @@
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+
+from sqlmodel import select, update
+
+from wanikani_mcp.models import Assignment, DailyRollup, Review, SubjectType, User
+from wanikani_mcp.rollups import (
+    ROLLUP_COUNTS,
+    activity_trend,
+    add_rollups,
+    progress_deltas,
+    rebuild_rollups,
+)
+from wanikani_mcp.sync_service import SyncService
+
+
+def rollups(session) -> dict:
+    session.expire_all()
+    return {
+        (rollup.day, rollup.subject_type): tuple(
+            getattr(rollup, name) for name in ROLLUP_COUNTS
+        )
+        for rollup in session.exec(select(DailyRollup))
+    }
+
+
+def totals(session, name: str) -> int:
+    return sum(getattr(rollup, name) for rollup in session.exec(select(DailyRollup)))
+
+
+def test_sync_keeps_rollups_equal_to_a_rebuild(engine, session, synced_user):
+    review_count = len(session.exec(select(Review.id)).all())
+    passed = session.exec(
+        select(Assignment.id).where(Assignment.passed_at.is_not(None))
+    ).all()
+    assert review_count and passed
+    assert totals(session, "reviews") == review_count
+    assert totals(session, "items_passed") == len(passed)
+    assert (
+        totals(session, "reviews_correct") + totals(session, "reviews_incorrect")
+        == review_count
+    )
+
+    incremental = rollups(session)
+    with engine.begin() as connection:
+        rebuild_rollups(connection, synced_user.id)
+    assert rollups(session) == incremental
+
+
+def test_reviews_fetched_again_are_not_counted_twice(session, synced_user):
+    before = rollups(session)
+    session.exec(update(User).values(reviews_updated_at=None))
+    session.commit()
+
+    asyncio.run(SyncService()._sync_user_data(synced_user))
+    assert rollups(session) == before
+
+
+def test_rollups_are_built_from_stored_data_on_the_first_sync(session, synced_user):
+    # As after upgrading a database that already has the history
+    before = rollups(session)
+    session.exec(DailyRollup.__table__.delete())
+    session.commit()
+
+    asyncio.run(SyncService()._sync_user_data(synced_user))
+    assert rollups(session) == before
+
+
+def test_passes_and_burns_count_once_on_their_utc_day():
+    passed_at = datetime(2026, 4, 1, 23, 30, tzinfo=timezone(timedelta(hours=-2)))
+    deltas = progress_deltas(SubjectType.KANJI, None, passed_at, None, None)
+    assert dict(deltas) == {(date(2026, 4, 2), SubjectType.KANJI): {"items_passed": 1}}
+
+    # Already passed before this update; the burn is new
+    burned_at = datetime(2026, 9, 1, 8)
+    deltas = progress_deltas(SubjectType.KANJI, passed_at, passed_at, None, burned_at)
+    assert dict(deltas) == {(date(2026, 9, 1), SubjectType.KANJI): {"items_burned": 1}}
+
+
+def test_activity_trend_reads_the_rollups(engine, session, sample_user):
+    session.add(sample_user)
+    session.commit()
+    today = date(2026, 10, 19)
+    with engine.begin() as connection:
+        add_rollups(
+            connection,
+            sample_user.id,
+            {
+                (today, SubjectType.KANJI): {"reviews": 4, "reviews_correct": 3},
+                (today, SubjectType.RADICAL): {"reviews": 1, "reviews_correct": 1},
+                (today - timedelta(days=2), SubjectType.KANJI): {"items_passed": 2},
+                # Outside the window
+                (today - timedelta(days=7), SubjectType.KANJI): {"reviews": 9},
+            },
+        )
+        # Counts add up rather than replace
+        add_rollups(
+            connection,
+            sample_user.id,
+            {(today, SubjectType.KANJI): {"reviews": 1, "reviews_incorrect": 1}},
+        )
+
+    trend = activity_trend(session, sample_user.id, 3, today)
+    assert [day["day"] for day in trend["daily"]] == [
+        "2026-10-17",
+        "2026-10-18",
+        "2026-10-19",
+    ]
+    assert trend["daily"][0]["items_passed"] == 2
+    assert trend["daily"][1]["reviews"] == 0
+    assert trend["daily"][1]["accuracy"] is None
+    assert trend["totals"]["reviews"] == 6
+    assert trend["totals"]["accuracy"] == 66.7
+    assert trend["totals"]["active_days"] == 1
+
+    kanji = activity_trend(session, sample_user.id, 3, today, SubjectType.KANJI)
+    assert kanji["totals"]["reviews"] == 5
+    assert kanji["totals"]["reviews_incorrect"] == 1
+
+
+def test_get_activity_trend_tool(session, synced_user):
+    from wanikani_mcp.handlers import call_tool
+
+    arguments = {"mcp_api_key": synced_user.mcp_api_key, "days": 1000}
+    [content] = asyncio.run(call_tool("get_activity_trend", arguments))
+    trend = json.loads(content.text)
+    assert len(trend["daily"]) == 365
+    assert trend["subject_type"] == "all"
@@ -0,0 +1,75 @@
+import signal
+import sys
+
+import pytest
+
+from wanikani_mcp import database, mcp_server, server
+from wanikani_mcp.config import settings
+from wanikani_mcp.server import ServerManager
+from wanikani_mcp.sync_service import sync_service
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """What the server started, with the stdio transport and database faked"""
+    started = []
+
+    async def start_sync():
+        started.append("sync")
+
+    async def stop_sync():
+        pass
+
+    async def stdio_main(on_initialized=None):
+        started.append("stdio")
+        await on_initialized()
+
+    async def http_server(self, host=None, port=None):
+        started.append("http")
+
+    monkeypatch.setattr(server, "setup_logging", lambda: None)
+    monkeypatch.setattr(settings, "sync_enabled", True)
+    monkeypatch.setattr(sync_service, "start", start_sync)
+    monkeypatch.setattr(sync_service, "stop", stop_sync)
+    monkeypatch.setattr(mcp_server, "main", stdio_main)
+    monkeypatch.setattr(ServerManager, "prepare_database", lambda self: None)
+    monkeypatch.setattr(ServerManager, "run_http_server", http_server)
+    monkeypatch.setattr(database, "ensure_schema", lambda: None)
+    return started
+
+
+def run_main(monkeypatch, *args: str):
+    monkeypatch.setattr(sys, "argv", ["wanikani-mcp", *args])
+    server.main()
+
+
+def test_serve_starts_sync_unless_disabled(started, monkeypatch):
+    run_main(monkeypatch)
+    assert started == ["stdio", "sync"]
+
+    started.clear()
+    run_main(monkeypatch, "serve", "--mode", "http")
+    assert started == ["http"]
+
+
+def test_serve_no_sync_flag(started, monkeypatch):
+    run_main(monkeypatch, "serve", "--no-sync")
+    assert started == ["stdio"]
+    assert settings.sync_enabled is False
+
+
+def test_sync_enabled_setting_is_respected(started, monkeypatch):
+    monkeypatch.setattr(settings, "sync_enabled", False)
+    run_main(monkeypatch, "serve")
+    assert started == ["stdio"]
+
+
+def test_sync_worker_starts_only_the_scheduler(started, monkeypatch):
+    async def start_sync():
+        started.append("sync")
+        # Stop the worker the way a supervisor would
+        signal.raise_signal(signal.SIGTERM)
+
+    monkeypatch.setattr(sync_service, "start", start_sync)
+    run_main(monkeypatch, "sync-worker")
+    assert started == ["sync"]
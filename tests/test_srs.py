@@ -0,0 +1,170 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import select, update
+
+from benchmarks.datagen import Dataset
+from benchmarks.run import DatasetClient
+from wanikani_mcp import database
+from wanikani_mcp.models import (
+    Assignment,
+    SrsStage,
+    SrsSystem,
+    Subject,
+    SubjectType,
+)
+from wanikani_mcp.srs import (
+    BUILTIN_SYSTEMS,
+    SrsSchedule,
+    SrsSystems,
+    guru_eta,
+    srs_system_rows,
+    srs_systems,
+)
+from wanikani_mcp.sync_service import SyncService
+
+STANDARD = BUILTIN_SYSTEMS[2]
+
+
+def test_srs_system_rows_parse_the_api_resource():
+    resource = Dataset(users=1, subjects=10).srs_systems[0]
+    system, stages = srs_system_rows(resource)
+    schedule = SrsSchedule.from_stages(system, stages)
+
+    assert (system.id, system.passing_stage_position) == (1, 5)
+    assert [stage.position for stage in stages] == list(range(10))
+    assert schedule == BUILTIN_SYSTEMS[1]
+
+
+def test_reviews_land_on_the_hour():
+    reached_at = datetime(2026, 10, 19, 9, 45, tzinfo=UTC)
+    assert STANDARD.next_review_at(1, reached_at) == datetime(
+        2026, 10, 19, 13, tzinfo=UTC
+    )
+    assert STANDARD.next_review_at(9, reached_at) is None
+    # A lesson done now: stage 1 at 13:00, 2 at 21:00, 3 at 20:00 the next
+    # day, and Guru on the review 47 hours after that
+    assert STANDARD.earliest_at(0, reached_at, 5) == datetime(
+        2026, 10, 22, 19, tzinfo=UTC
+    )
+    assert STANDARD.earliest_at(5, reached_at, 5) is None
+
+
+def test_lookup_falls_back_to_builtin_and_standard_systems(
+    engine, session, monkeypatch
+):
+    monkeypatch.setattr(database, "engine", engine)
+    lookup = SrsSystems(refresh_seconds=600)
+    # Nothing synced yet
+    lookup.load()
+    assert lookup.get(1) == BUILTIN_SYSTEMS[1]
+    assert lookup.get(None) == STANDARD
+    assert lookup.get(99) == STANDARD
+    with pytest.raises(TypeError):
+        lookup.all()[3] = STANDARD
+
+
+@pytest.mark.parametrize("synced_user", [{"seed": 5}], indirect=True)
+def test_sync_stores_systems_and_skips_them_within_the_ttl(
+    session, synced_user, monkeypatch
+):
+    systems = session.exec(select(SrsSystem).order_by(SrsSystem.id)).all()
+    assert [system.name for system in systems] == ["Wanikani Accelerated", "Wanikani"]
+    assert systems[0].etag
+    assert len(session.exec(select(SrsStage)).all()) == 20
+    assert srs_systems.get(1) == BUILTIN_SYSTEMS[1]
+    subject = session.exec(select(Subject).where(Subject.level == 1)).first()
+    assert subject.spaced_repetition_system_id == 1
+
+    requests = []
+    get_if_changed = DatasetClient._get_if_changed
+
+    async def counting(self, endpoint, etag, stats=None):
+        requests.append(etag)
+        return await get_if_changed(self, endpoint, etag, stats)
+
+    monkeypatch.setattr(DatasetClient, "_get_if_changed", counting)
+    asyncio.run(SyncService()._sync_user_data(synced_user))
+    assert requests == []
+
+    # Once the TTL has passed, the ETag comes back unchanged
+    expired = datetime.now(UTC) - timedelta(days=30)
+    session.exec(update(SrsSystem).values(synced_at=expired))
+    session.commit()
+    asyncio.run(SyncService()._sync_user_data(synced_user))
+    assert requests == [systems[0].etag]
+    session.expire_all()
+    refreshed = session.exec(select(SrsSystem)).all()
+    # Naive on SQLite
+    assert all(system.synced_at > expired.replace(tzinfo=None) for system in refreshed)
+    assert len(session.exec(select(SrsStage)).all()) == 20
+
+
+def test_guru_eta_estimates_items_and_level_up(session, sample_user):
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+    session.add(sample_user)
+    for subject_id in range(1, 11):
+        session.add(
+            Subject(
+                id=subject_id,
+                object_type=SubjectType.KANJI,
+                level=3,
+                slug=f"kanji-{subject_id}",
+                meanings=[],
+                document_url="https://www.wanikani.com/kanji/1",
+                spaced_repetition_system_id=2,
+            )
+        )
+    session.commit()
+    stages = {1: 5, 2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5, 8: 4, 9: 0}
+    for subject_id, stage in stages.items():
+        session.add(
+            Assignment(
+                id=subject_id,
+                user_id=sample_user.id,
+                subject_id=subject_id,
+                subject_type=SubjectType.KANJI,
+                srs_stage=stage,
+                unlocked_at=now - timedelta(days=10),
+                available_at=now - timedelta(hours=1) if stage else None,
+            )
+        )
+    session.commit()
+
+    eta = guru_eta(session, sample_user.id, 3, now, systems=BUILTIN_SYSTEMS)
+    by_id = {item["subject_id"]: item for item in eta["items"]}
+    # Stage 4 is overdue: Guru on the next review, now
+    assert by_id[8]["guru_at"] == now.isoformat()
+    assert by_id[9]["status"] == "lesson"
+    assert by_id[10]["status"] == "locked"
+    # 9 of 10 kanji are needed: the lesson is the last one that can make it
+    assert eta["level_up"] == {
+        "kanji": 10,
+        "kanji_required": 9,
+        "kanji_passed": 7,
+        "locked_kanji": 1,
+        "earliest_at": by_id[9]["guru_at"],
+    }
+
+
+@pytest.mark.parametrize("synced_user", [{"seed": 5}], indirect=True)
+def test_get_guru_eta_tool(session, synced_user):
+    from wanikani_mcp.handlers import call_tool
+
+    arguments = {"mcp_api_key": "test-mcp-key", "level": 1}
+    [content] = asyncio.run(call_tool("get_guru_eta", arguments))
+    eta = json.loads(content.text)
+
+    assert eta["level"] == 1
+    assert eta["items"] and all(item["characters"] for item in eta["items"])
+    assert eta["level_up"]["kanji"] >= 1
+
+    arguments = {"mcp_api_key": "test-mcp-key", "subject_type": "radical"}
+    [content] = asyncio.run(call_tool("get_guru_eta", arguments))
+    eta = json.loads(content.text)
+    session.refresh(synced_user)
+    assert eta["level"] == synced_user.level
+    assert {item["subject_type"] for item in eta["items"]} <= {"radical"}
+    assert "level_up" not in eta
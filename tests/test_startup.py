@@ -0,0 +1,53 @@
+import asyncio
+import subprocess
+import sys
+
+from wanikani_mcp.mcp_server import DeferredStartup
+
+
+def test_stdio_server_imports_stay_light():
+    # Everything needed to answer the initialize handshake, and nothing more
+    code = (
+        "import sys, wanikani_mcp.server, wanikani_mcp.mcp_server; "
+        "print(sorted({'sqlalchemy', 'sqlmodel', 'apscheduler'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_deferred_startup_runs_once_and_gates_calls():
+    events = []
+
+    async def work():
+        events.append("started")
+        await asyncio.sleep(0.01)
+        events.append("finished")
+
+    async def call():
+        await startup.wait()
+        events.append("call")
+
+    async def run():
+        startup.work = work
+        await asyncio.gather(call(), call())
+        startup.begin()
+        await startup.wait()
+
+    startup = DeferredStartup()
+    asyncio.run(run())
+
+    assert events == ["started", "finished", "call", "call"]
+
+
+def test_deferred_startup_failure_does_not_block_calls():
+    async def work():
+        raise RuntimeError("database unavailable")
+
+    async def run():
+        startup.work = work
+        await startup.wait()
+
+    startup = DeferredStartup()
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from wanikani_mcp import database
+from wanikani_mcp import sync_service as sync_service_module
+from wanikani_mcp.config import settings
+from wanikani_mcp.models import SyncLog, SyncStatus, SyncType
+from wanikani_mcp.sync_service import SyncBusyError, SyncService
+
+
+def test_concurrent_syncs_run_once(engine, session, sample_user, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    session.add(sample_user)
+    session.commit()
+    service = SyncService()
+    calls = []
+
+    async def fake_sync(user):
+        calls.append(user.id)
+        await asyncio.sleep(0.01)
+        return 42
+
+    monkeypatch.setattr(service, "_sync_user_data", fake_sync)
+
+    async def run():
+        return await asyncio.gather(*(service.sync_user(sample_user) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == [sample_user.id]
+    assert [result.records_updated for result in results] == [42] * 5
+    assert sum(not result.shared for result in results) == 1
+    assert service._in_flight == {}
+
+
+def test_cooldown_reuses_recent_sync(engine, session, sample_user, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    session.add(sample_user)
+    session.commit()
+    session.add(
+        SyncLog(
+            user_id=sample_user.id,
+            sync_type=SyncType.INCREMENTAL,
+            status=SyncStatus.SUCCESS,
+            records_updated=7,
+            completed_at=datetime.now(UTC) - timedelta(minutes=1),
+        )
+    )
+    session.commit()
+    service = SyncService()
+
+    async def fake_sync(user):
+        return 99
+
+    monkeypatch.setattr(service, "_sync_user_data", fake_sync)
+
+    cached = asyncio.run(service.sync_user(sample_user, cooldown_seconds=300))
+    assert cached.shared is True
+    assert cached.records_updated == 7
+
+    fresh = asyncio.run(service.sync_user(sample_user, cooldown_seconds=30))
+    assert fresh.shared is False
+    assert fresh.records_updated == 99
+
+
+def test_sync_lease(engine, session, sample_user, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    session.add(sample_user)
+    session.commit()
+    first = SyncService()
+    second = SyncService()
+
+    assert first._acquire_lease(sample_user.id) is True
+    # Re-entrant for the holder, exclusive for everyone else
+    assert first._acquire_lease(sample_user.id) is True
+    assert second._acquire_lease(sample_user.id) is False
+
+    first._release_lease(sample_user.id)
+    assert second._acquire_lease(sample_user.id) is True
+
+
+def test_lease_is_renewed_while_the_sync_runs(
+    engine, session, sample_user, monkeypatch
+):
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(settings, "sync_lease_seconds", 0.3)
+    session.add(sample_user)
+    session.commit()
+    first = SyncService()
+    second = SyncService()
+    taken = []
+
+    async def slow_sync(user):
+        # Several lease lengths: the renewals keep it from the other process
+        for _ in range(4):
+            await asyncio.sleep(0.2)
+            taken.append(second._acquire_lease(user.id))
+        return 1
+
+    monkeypatch.setattr(first, "_sync_user_data", slow_sync)
+    asyncio.run(first.sync_user(sample_user))
+
+    assert taken == [False] * 4
+    # Released once done
+    assert second._acquire_lease(sample_user.id) is True
+
+
+def test_waiting_for_another_process_is_bounded(
+    engine, session, sample_user, monkeypatch
+):
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(sync_service_module, "LEASE_POLL_SECONDS", 0.01)
+    session.add(sample_user)
+    session.commit()
+    other_process = SyncService()
+    assert other_process._acquire_lease(sample_user.id) is True
+
+    with pytest.raises(SyncBusyError):
+        asyncio.run(SyncService().sync_user(sample_user, max_wait_seconds=0.05))
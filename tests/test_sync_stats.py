@@ -0,0 +1,49 @@
+from datetime import UTC, datetime, timedelta
+
+from wanikani_mcp.models import SyncLog, SyncStatus, SyncType
+from wanikani_mcp.sync_stats import percentile, sync_summary
+
+
+def make_log(user_id, status, seconds, records, phase_stats=None, hours_ago=1):
+    started_at = datetime.now(UTC) - timedelta(hours=hours_ago)
+    return SyncLog(
+        user_id=user_id,
+        sync_type=SyncType.INCREMENTAL,
+        status=status,
+        records_updated=records,
+        started_at=started_at,
+        completed_at=started_at + timedelta(seconds=seconds),
+        phase_stats=phase_stats,
+    )
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0], 0.95) == 3.0
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+
+
+def test_sync_summary(session, sample_user):
+    session.add(sample_user)
+    session.commit()
+    subjects = {"subjects": {"fetch_ms": 400, "write_ms": 100, "rows_written": 50}}
+    for log in [
+        make_log(sample_user.id, SyncStatus.SUCCESS, 10, 100, subjects),
+        make_log(sample_user.id, SyncStatus.SUCCESS, 20, 100, subjects),
+        make_log(sample_user.id, SyncStatus.ERROR, 5, 0),
+        # Outside the window
+        make_log(sample_user.id, SyncStatus.SUCCESS, 999, 1, hours_ago=48),
+    ]:
+        session.add(log)
+    session.commit()
+
+    summary = sync_summary(session, datetime.now(UTC) - timedelta(hours=24))
+
+    assert summary["syncs"] == 2
+    assert summary["errors"] == 1
+    assert summary["users"] == 1
+    assert summary["duration_seconds"] == {"p50": 10.0, "p95": 20.0}
+    assert summary["rows_per_second"] == {"p50": 5.0, "p95": 10.0}
+    assert summary["collections"]["subjects"]["fetch_ms"]["p95"] == 400
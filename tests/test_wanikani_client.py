@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+
+from wanikani_mcp.metrics import SyncStepStats
+from wanikani_mcp.wanikani_client import WaniKaniClient
+
+
+def test_get_collection_follows_pages_and_records_stats():
+    base_url = "https://api.wanikani.com/v2"
+    pages = {
+        "/v2/subjects": {
+            "data": [{"id": 1}, {"id": 2}],
+            "pages": {"next_url": f"{base_url}/subjects?page_after_id=2"},
+        },
+        "/v2/subjects?page_after_id=2": {
+            "data": [{"id": 3}],
+            "pages": {"next_url": None},
+        },
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.raw_path.decode()
+        return httpx.Response(200, json=pages[path])
+
+    async def run():
+        client = WaniKaniClient("test-key")
+        client.base_url = base_url
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        stats = SyncStepStats("subjects")
+        try:
+            items = await client.get_subjects(stats=stats)
+        finally:
+            await client.close()
+        return items, stats
+
+    items, stats = asyncio.run(run())
+
+    assert [item["id"] for item in items] == [1, 2, 3]
+    assert stats.pages == 2
+    assert stats.bytes > 0
+
+
+def test_get_retries_after_rate_limit(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"data": {"level": 5}}),
+    ]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr("wanikani_mcp.wanikani_client.asyncio.sleep", fake_sleep)
+
+    async def run():
+        client = WaniKaniClient("test-key")
+        client.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: responses.pop(0))
+        )
+        stats = SyncStepStats("user")
+        try:
+            data = await client._get("/user", stats=stats)
+        finally:
+            await client.close()
+        return data, stats
+
+    data, stats = asyncio.run(run())
+
+    assert data["data"]["level"] == 5
+    assert sleeps == [2.0]
+    assert stats.pages == 1
+    assert stats.rate_limit_wait >= 2.0
+
+
+def test_srs_systems_request_is_conditional():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == 'W/"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200, json={"data": [{"id": 1}]}, headers={"ETag": 'W/"v1"'}
+        )
+
+    async def run():
+        client = WaniKaniClient("test-key")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            first = await client.get_spaced_repetition_systems()
+            second = await client.get_spaced_repetition_systems(first[1])
+        finally:
+            await client.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == ([{"id": 1}], 'W/"v1"')
+    assert second == (None, 'W/"v1"')
+    assert seen == [None, 'W/"v1"']